@@ -8,7 +8,8 @@ import {
   AdminPaymentProvider,
   AdminWalletOut,
   AdminWalletCreate,
-  AdminWalletUpdate
+  AdminWalletUpdate,
+  AdminOnboardingJob
 } from './types'
 
 const client = axios.create({ baseURL: 'http://localhost:8000' })
@@ -71,9 +72,23 @@ export async function createPaymentProvider(payload: {
   return resp.data
 }
 
-export async function fetchCompanies(): Promise<AdminCompanyListItem[]> {
-  const resp = await client.get('/admin/companies/')
-  return resp.data
+export type AdminCompaniesParams = {
+  limit?: number
+  cursor?: string
+  name?: string
+  is_active?: boolean
+  country_code?: string
+}
+
+export type AdminCompaniesPage = {
+  items: AdminCompanyListItem[]
+  next_cursor: string | null
+}
+
+// One page per call; pass next_cursor back as `cursor` to load the next one
+export async function fetchCompanies(params: AdminCompaniesParams = {}): Promise<AdminCompaniesPage> {
+  const resp = await client.get('/admin/companies/', { params })
+  return { items: resp.data, next_cursor: resp.headers['x-next-cursor'] || null }
 }
 
 export async function createCompany(payload: AdminCompanyCreatePayload): Promise<AdminCompanyOut> {
@@ -96,6 +111,16 @@ export async function toggleCompany(id: number): Promise<AdminCompanyOut> {
   return resp.data
 }
 
+export async function createOnboardingJob(companyId: number): Promise<AdminOnboardingJob> {
+  const resp = await client.post(`/admin/companies/${companyId}/onboarding-jobs`)
+  return resp.data
+}
+
+export async function getOnboardingJob(jobId: string): Promise<AdminOnboardingJob> {
+  const resp = await client.get(`/admin/onboarding-jobs/${jobId}`)
+  return resp.data
+}
+
 export async function checkHealth(): Promise<{ ok: boolean }> {
   try {
     await client.get('/health')
@@ -114,6 +139,11 @@ export type AdminPaymentsParams = {
   created_from?: string
   created_to?: string
   txn_id?: string
+  txn_match?: 'exact' | 'prefix' | 'contains'
+  q?: string
+  pagination?: 'offset' | 'keyset'
+  cursor?: string
+  count?: 'exact' | 'estimated' | 'cached'
 }
 
 export async function fetchAdminPayments(params: AdminPaymentsParams = {}) {
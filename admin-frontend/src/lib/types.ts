@@ -85,3 +85,18 @@ export type AdminWalletUpdate = {
   daily_limit?: number | null
   is_active?: boolean | null
 }
+
+// Background render of a company's onboarding HTML/PDF.
+export type AdminOnboardingJob = {
+  job_id: string
+  company_id: number
+  status: 'queued' | 'running' | 'succeeded' | 'failed'
+  environment: string
+  created_at: string
+  finished_at?: string | null
+  html_path?: string | null
+  pdf_path?: string | null
+  html_url?: string | null
+  pdf_url?: string | null
+  error?: string | null
+}
@@ -1,4 +1,4 @@
-import React, {useEffect, useMemo, useState} from 'react'
+import React, {useEffect, useState} from 'react'
 import { fetchCompanies, toggleCompany } from '../lib/api'
 import { AdminCompanyListItem } from '../lib/types'
 import Layout from '../components/Layout'
@@ -9,24 +9,52 @@ function formatNumber(value: number | null | undefined): string {
   return Number(value).toLocaleString()
 }
 
+const PAGE_SIZE = 50
+const SEARCH_DEBOUNCE_MS = 300
+
 export default function CompaniesList(){
   const [companies, setCompanies] = useState<AdminCompanyListItem[]>([])
   const [loading, setLoading] = useState(true)
   const [error, setError] = useState<string | null>(null)
   const [search, setSearch] = useState('')
+  const [nextCursor, setNextCursor] = useState<string | null>(null)
+  const [loadingMore, setLoadingMore] = useState(false)
   const navigate = useNavigate()
 
+  // name is a prefix search on the server; the first page reloads as the user types
+  const name = search.trim()
+
   useEffect(()=>{
     let mounted = true
     setLoading(true)
-    fetchCompanies().then(data=>{
-      if(mounted){ setCompanies(data) }
-    }).catch(err=>{
-      setError(err?.message || 'Failed to load')
-    }).finally(()=> mounted && setLoading(false))
+    setError(null)
+    const timer = setTimeout(()=>{
+      fetchCompanies({ limit: PAGE_SIZE, name: name || undefined }).then(page=>{
+        if(mounted){
+          setCompanies(page.items)
+          setNextCursor(page.next_cursor)
+        }
+      }).catch(err=>{
+        if(mounted) setError(err?.message || 'Failed to load')
+      }).finally(()=> mounted && setLoading(false))
+    }, name ? SEARCH_DEBOUNCE_MS : 0)
 
-    return ()=>{ mounted = false }
-  },[])
+    return ()=>{ mounted = false; clearTimeout(timer) }
+  },[name])
+
+  async function loadMore(){
+    if(!nextCursor) return
+    setLoadingMore(true)
+    try{
+      const page = await fetchCompanies({ limit: PAGE_SIZE, name: name || undefined, cursor: nextCursor })
+      setCompanies(cs => [...cs, ...page.items])
+      setNextCursor(page.next_cursor)
+    }catch(err: any){
+      setError(err?.message || 'Failed to load')
+    }finally{
+      setLoadingMore(false)
+    }
+  }
 
   async function handleToggle(id:number){
     try{
@@ -66,17 +94,6 @@ export default function CompaniesList(){
     }
   }
 
-  const filtered = useMemo(()=>{
-    const q = search.trim().toLowerCase()
-    if(!q) return companies
-    return companies.filter(c => {
-      const name = (c.name || '').toLowerCase()
-      const country = (c.country_code || '').toLowerCase()
-      const key = (c.api_key || '').toLowerCase()
-      return name.includes(q) || country.includes(q) || key.includes(q)
-    })
-  },[companies, search])
-
   return (
     <Layout>
       <div className="max-w-5xl mx-auto px-4 py-6">
@@ -89,7 +106,7 @@ export default function CompaniesList(){
             <input
               value={search}
               onChange={e=>setSearch(e.target.value)}
-              placeholder="Search by name, country, or API key..."
+              placeholder="Search by name prefix..."
               className="border rounded p-2"
             />
             <Link to="/companies/new" className="px-4 py-2 bg-blue-600 text-white rounded">Create Company</Link>
@@ -112,7 +129,7 @@ export default function CompaniesList(){
               </tr>
             </thead>
             <tbody>
-              {filtered.map(c => (
+              {companies.map(c => (
                 <tr key={c.id} className="border-t hover:bg-gray-50">
                   <td className="p-3 align-top text-right">{formatNumber(c.id)}</td>
                   <td className="p-3 align-top">{c.name}</td>
@@ -133,6 +150,13 @@ export default function CompaniesList(){
               ))}
             </tbody>
           </table>
+          {nextCursor && (
+            <div className="mt-4 text-center">
+              <button onClick={loadMore} disabled={loadingMore} className="px-4 py-2 border rounded">
+                {loadingMore ? 'Loading...' : 'Load more'}
+              </button>
+            </div>
+          )}
         </div>
       </div>
     </Layout>
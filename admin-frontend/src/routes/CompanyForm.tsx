@@ -1,7 +1,7 @@
 import React, { useEffect, useState } from 'react'
 import { useParams, useNavigate } from 'react-router-dom'
 import Layout from '../components/Layout'
-import { fetchCountries, fetchCountryWithProviders, createCompany, getCompany, updateCompany } from '../lib/api'
+import { fetchCountries, fetchCountryWithProviders, createCompany, getCompany, updateCompany, createOnboardingJob, getOnboardingJob } from '../lib/api'
 import { AdminCountry, AdminCompanyOut, AdminCompanyCreatePayload, AdminPaymentProvider } from '../lib/types'
 
 export default function CompanyForm(){
@@ -180,19 +180,20 @@ export default function CompanyForm(){
     setPdfError(null)
     setPdfLink(null)
     try{
-      const res = await fetch(`http://localhost:8000/admin/companies/${company.id}/onboarding-pdf`, {
-        method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
-      })
-      if(!res.ok){
-        const txt = await res.text()
-        throw new Error(txt || `Request failed: ${res.status}`)
+      // rendering runs in a background job on the server; poll until it finishes
+      let job = await createOnboardingJob(company.id)
+      while(job.status === 'queued' || job.status === 'running'){
+        await new Promise(resolve => setTimeout(resolve, 1000))
+        job = await getOnboardingJob(job.job_id)
+      }
+      if(job.status === 'failed'){
+        throw new Error(job.error || 'Onboarding generation failed')
       }
-      const data = await res.json()
-      if(data.download_url){
-        setPdfLink(data.download_url)
-      } else if(data.html_path){
-        setPdfError('PDF not available; use server-side HTML to print to PDF.')
+      if(job.pdf_url){
+        setPdfLink(`http://localhost:8000${job.pdf_url}`)
+      } else if(job.html_url){
+        setPdfLink(`http://localhost:8000${job.html_url}`)
+        setPdfError('PDF not available; open the HTML and print it to PDF.')
       } else {
         setPdfError('Unexpected response from server')
       }
@@ -32,12 +32,16 @@ export default function PaymentsHistory(){
   const [total, setTotal] = useState<number>(0)
   const [page, setPage] = useState<number>(1)
   const [pageSize] = useState<number>(25)
+  const [nextCursor, setNextCursor] = useState<string | null>(null)
+  const [prevCursor, setPrevCursor] = useState<string | null>(null)
 
-  async function load(pageToLoad = 1){
+  // Keyset pagination: every page costs the same regardless of depth
+  async function load(pageToLoad = 1, cursor?: string | null){
     setLoading(true)
     setError(null)
     try{
-      const params:any = { page: pageToLoad, page_size: pageSize }
+      const params:any = { pagination: 'keyset', count: 'cached', page_size: pageSize }
+      if(cursor) params.cursor = cursor
       if(txnId) params.txn_id = txnId
       if(minAmount !== '') params.min_amount = Number(minAmount)
       if(maxAmount !== '') params.max_amount = Number(maxAmount)
@@ -48,7 +52,9 @@ export default function PaymentsHistory(){
       const resp = await fetchAdminPayments(params)
       setItems(resp.items || [])
       setTotal(resp.total || 0)
-      setPage(resp.page || pageToLoad)
+      setPage(pageToLoad)
+      setNextCursor(resp.next_cursor ?? null)
+      setPrevCursor(resp.prev_cursor ?? null)
     }catch(err:any){
       setError(err?.message || String(err))
     }finally{ setLoading(false) }
@@ -64,6 +70,8 @@ export default function PaymentsHistory(){
     setItems([])
     setTotal(0)
     setPage(1)
+    setNextCursor(null)
+    setPrevCursor(null)
     setError(null)
   }
 
@@ -157,9 +165,9 @@ export default function PaymentsHistory(){
                 <div className="mt-4 flex items-center justify-between">
                   <div className="text-sm text-gray-600">Total: {total}</div>
                   <div className="flex items-center gap-2">
-                    <button className="px-3 py-1 border rounded" disabled={page <= 1} onClick={()=> load(page-1)}>Previous</button>
+                    <button className="px-3 py-1 border rounded" disabled={!prevCursor} onClick={()=> load(page-1, prevCursor)}>Previous</button>
                     <div className="text-sm">Page {page} / {totalPages}</div>
-                    <button className="px-3 py-1 border rounded" disabled={page >= totalPages} onClick={()=> load(page+1)}>Next</button>
+                    <button className="px-3 py-1 border rounded" disabled={!nextCursor} onClick={()=> load(page+1, nextCursor)}>Next</button>
                   </div>
                 </div>
               </div>
@@ -16,7 +16,7 @@ settings = get_settings()
 from app.db.base import Base
 # Import models so Alembic can autogenerate migrations (registers models on Base.metadata)
 # Do not import models inside app.db.base to avoid circular imports.
-from app.models import company, channel, wallet, payment, country  # noqa: F401
+from app.models import company, channel, wallet, payment, country, payment_rollup  # noqa: F401
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -0,0 +1,32 @@
+"""add (wallet_id, created_at) index for per-wallet daily aggregates
+
+Revision ID: a1d5f9b3c7e2
+Revises: f4c8a2e6b0d3
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a1d5f9b3c7e2'
+down_revision = 'f4c8a2e6b0d3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    indexes = [ix['name'] for ix in inspector.get_indexes('payments')]
+    if 'ix_payments_wallet_id_created_at' not in indexes:
+        op.create_index('ix_payments_wallet_id_created_at', 'payments', ['wallet_id', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    indexes = [ix['name'] for ix in inspector.get_indexes('payments')]
+    if 'ix_payments_wallet_id_created_at' in indexes:
+        op.drop_index('ix_payments_wallet_id_created_at', table_name='payments')
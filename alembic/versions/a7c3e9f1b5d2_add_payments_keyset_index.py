@@ -0,0 +1,32 @@
+"""add (created_at, id) index for keyset pagination
+
+Revision ID: a7c3e9f1b5d2
+Revises: f2b6d8e0a3c5
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7c3e9f1b5d2'
+down_revision = 'f2b6d8e0a3c5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    indexes = [ix['name'] for ix in inspector.get_indexes('payments')]
+    if 'ix_payments_created_at_id' not in indexes:
+        op.create_index('ix_payments_created_at_id', 'payments', ['created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    indexes = [ix['name'] for ix in inspector.get_indexes('payments')]
+    if 'ix_payments_created_at_id' in indexes:
+        op.drop_index('ix_payments_created_at_id', table_name='payments')
@@ -0,0 +1,46 @@
+"""add pg_trgm index on payments.txn_id
+
+Revision ID: b4d8f2a6c1e3
+Revises: a7c3e9f1b5d2
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b4d8f2a6c1e3'
+down_revision = 'a7c3e9f1b5d2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    # SQLite has no trigram support; prefix search uses the existing
+    # ix_payments_txn_id b-tree index through a range predicate instead.
+    if bind.dialect.name != 'postgresql':
+        return
+    inspector = sa.inspect(bind)
+    indexes = [ix['name'] for ix in inspector.get_indexes('payments')]
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    if 'ix_payments_txn_id_trgm' not in indexes:
+        op.create_index(
+            'ix_payments_txn_id_trgm',
+            'payments',
+            ['txn_id'],
+            unique=False,
+            postgresql_using='gin',
+            postgresql_ops={'txn_id': 'gin_trgm_ops'},
+        )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+    inspector = sa.inspect(bind)
+    indexes = [ix['name'] for ix in inspector.get_indexes('payments')]
+    if 'ix_payments_txn_id_trgm' in indexes:
+        op.drop_index('ix_payments_txn_id_trgm', table_name='payments')
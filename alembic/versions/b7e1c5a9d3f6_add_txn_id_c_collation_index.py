@@ -0,0 +1,34 @@
+"""add C-collation index on payments.txn_id for prefix search
+
+Revision ID: b7e1c5a9d3f6
+Revises: a1d5f9b3c7e2
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e1c5a9d3f6'
+down_revision = 'a1d5f9b3c7e2'
+branch_labels = None
+depends_on = None
+
+
+# `query_helpers.prefix_match` compares `txn_id COLLATE "C"` so its range is
+# correct in any database locale; only an index on the same expression can
+# serve it. SQLite compares byte-wise already and keeps using ix_payments_txn_id.
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+    op.execute('CREATE INDEX IF NOT EXISTS ix_payments_txn_id_c ON payments ((txn_id COLLATE "C"))')
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+    op.execute('DROP INDEX IF EXISTS ix_payments_txn_id_c')
@@ -0,0 +1,57 @@
+"""add hourly payment rollup and watermark tables
+
+Revision ID: c6e0a4b8d2f7
+Revises: b4d8f2a6c1e3
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c6e0a4b8d2f7'
+down_revision = 'b4d8f2a6c1e3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    tables = inspector.get_table_names()
+    if 'payment_rollups_hourly' not in tables:
+        op.create_table(
+            'payment_rollups_hourly',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('company_id', sa.Integer(), sa.ForeignKey('companies.id'), nullable=False),
+            sa.Column('channel_id', sa.Integer(), sa.ForeignKey('channels.id'), nullable=True),
+            sa.Column('wallet_id', sa.Integer(), sa.ForeignKey('wallets.id'), nullable=True),
+            sa.Column('bucket', sa.DateTime(timezone=True), nullable=False),
+            sa.Column('status', sa.String(), nullable=False),
+            sa.Column('count', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('sum_amount', sa.BigInteger(), nullable=False, server_default='0'),
+        )
+        op.create_index(
+            'ix_payment_rollups_hourly_bucket_company',
+            'payment_rollups_hourly',
+            ['bucket', 'company_id'],
+            unique=False,
+        )
+    if 'rollup_watermarks' not in tables:
+        op.create_table(
+            'rollup_watermarks',
+            sa.Column('name', sa.String(), primary_key=True),
+            sa.Column('watermark', sa.DateTime(timezone=True), nullable=True),
+        )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    tables = inspector.get_table_names()
+    if 'rollup_watermarks' in tables:
+        op.drop_table('rollup_watermarks')
+    if 'payment_rollups_hourly' in tables:
+        op.drop_index('ix_payment_rollups_hourly_bucket_company', table_name='payment_rollups_hourly')
+        op.drop_table('payment_rollups_hourly')
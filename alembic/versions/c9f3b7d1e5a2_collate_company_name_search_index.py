@@ -0,0 +1,36 @@
+"""rebuild the companies lower(name) index in the C collation
+
+Revision ID: c9f3b7d1e5a2
+Revises: b7e1c5a9d3f6
+Create Date: 2026-10-19 18:30:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'c9f3b7d1e5a2'
+down_revision = 'b7e1c5a9d3f6'
+branch_labels = None
+depends_on = None
+
+
+# The admin name search is `query_helpers.prefix_match(lower(name))`, which
+# compares `lower(name) COLLATE "C"` on Postgres; a plain lower(name) index in
+# the database locale cannot serve it. SQLite keeps the index from f4c8a2e6b0d3.
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+    op.execute('DROP INDEX IF EXISTS ix_companies_name_lower')
+    op.execute('CREATE INDEX ix_companies_name_lower ON companies ((lower(name) COLLATE "C"))')
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+    op.execute('DROP INDEX IF EXISTS ix_companies_name_lower')
+    op.execute('CREATE INDEX ix_companies_name_lower ON companies (lower(name))')
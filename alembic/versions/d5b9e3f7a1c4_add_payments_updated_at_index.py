@@ -0,0 +1,38 @@
+"""add payments.updated_at index and seed the hourly rollup watermark
+
+Revision ID: d5b9e3f7a1c4
+Revises: c9f3b7d1e5a2
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5b9e3f7a1c4'
+down_revision = 'c9f3b7d1e5a2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    indexes = [ix['name'] for ix in inspector.get_indexes('payments')]
+    # Serves the rollup refresh's "updated since the watermark" scan
+    if 'ix_payments_updated_at' not in indexes:
+        op.create_index('ix_payments_updated_at', 'payments', ['updated_at'], unique=False)
+    # The refresh locks this row with SELECT ... FOR UPDATE, which needs it to exist
+    op.execute(
+        "INSERT INTO rollup_watermarks (name, watermark) SELECT 'payments_hourly', NULL "
+        "WHERE NOT EXISTS (SELECT 1 FROM rollup_watermarks WHERE name = 'payments_hourly')"
+    )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    indexes = [ix['name'] for ix in inspector.get_indexes('payments')]
+    if 'ix_payments_updated_at' in indexes:
+        op.drop_index('ix_payments_updated_at', table_name='payments')
@@ -0,0 +1,162 @@
+"""partition payments by month on created_at (Postgres only)
+
+Rebuilds `payments` as a table partitioned by RANGE (created_at) with one
+partition per month and a default partition, copying the existing rows. The
+table is locked for the duration of the copy, so run it in a maintenance
+window. SQLite and other databases are left untouched.
+
+Postgres requires unique indexes on a partitioned table to include the
+partition key, so the global uniqueness of `txn_id` is kept by a guard table
+(`payment_txn_ids`) filled by a trigger; a duplicate txn_id still fails the
+INSERT with a unique violation.
+
+Revision ID: d8a2c6e4f0b9
+Revises: c6e0a4b8d2f7
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.db.partitioning import add_months, create_partition_sql, is_partitioned, month_bounds
+
+
+# revision identifiers, used by Alembic.
+revision = 'd8a2c6e4f0b9'
+down_revision = 'c6e0a4b8d2f7'
+branch_labels = None
+depends_on = None
+
+MONTHS_AHEAD = 2
+
+TXN_GUARD_FUNCTION = """
+CREATE OR REPLACE FUNCTION payments_txn_id_guard() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        IF OLD.txn_id IS NOT NULL THEN
+            DELETE FROM payment_txn_ids WHERE txn_id = OLD.txn_id;
+        END IF;
+        RETURN NULL;
+    END IF;
+    IF TG_OP = 'UPDATE' THEN
+        IF NEW.txn_id IS NOT DISTINCT FROM OLD.txn_id THEN
+            RETURN NULL;
+        END IF;
+        IF OLD.txn_id IS NOT NULL THEN
+            DELETE FROM payment_txn_ids WHERE txn_id = OLD.txn_id;
+        END IF;
+    END IF;
+    IF NEW.txn_id IS NOT NULL THEN
+        INSERT INTO payment_txn_ids (txn_id) VALUES (NEW.txn_id);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+
+def _index_defs(bind, table):
+    rows = bind.execute(
+        sa.text("SELECT indexname, indexdef FROM pg_indexes WHERE tablename = :table"),
+        {"table": table},
+    ).all()
+    return [(name, indexdef) for name, indexdef in rows if name != f"{table}_pkey"]
+
+
+def _foreign_key_defs(bind, table):
+    return bind.execute(
+        sa.text(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = to_regclass(:table) AND contype = 'f'"
+        ),
+        {"table": table},
+    ).all()
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql' or is_partitioned(bind, 'payments'):
+        return
+
+    op.execute('LOCK TABLE payments IN ACCESS EXCLUSIVE MODE')
+    indexes = _index_defs(bind, 'payments')
+    foreign_keys = _foreign_key_defs(bind, 'payments')
+
+    # The partition key must be NOT NULL
+    op.execute('UPDATE payments SET created_at = COALESCE(updated_at, now()) WHERE created_at IS NULL')
+
+    op.execute('ALTER TABLE payments RENAME TO payments_unpartitioned')
+    op.execute('ALTER TABLE payments_unpartitioned RENAME CONSTRAINT payments_pkey TO payments_unpartitioned_pkey')
+    op.execute('ALTER SEQUENCE IF EXISTS payments_id_seq OWNED BY NONE')
+
+    op.execute(
+        'CREATE TABLE payments (LIKE payments_unpartitioned INCLUDING DEFAULTS) '
+        'PARTITION BY RANGE (created_at)'
+    )
+    op.execute('ALTER TABLE payments ALTER COLUMN created_at SET NOT NULL')
+    op.execute('ALTER TABLE payments ADD CONSTRAINT payments_pkey PRIMARY KEY (id, created_at)')
+    for name, definition in foreign_keys:
+        op.execute(f'ALTER TABLE payments ADD CONSTRAINT "{name}" {definition}')
+
+    oldest = bind.execute(sa.text('SELECT min(created_at) FROM payments_unpartitioned')).scalar()
+    month, _ = month_bounds(oldest or date.today())
+    last = add_months(month_bounds(date.today())[0], MONTHS_AHEAD)
+    while month <= last:
+        op.execute(create_partition_sql(month, 'payments'))
+        month = add_months(month, 1)
+    op.execute('CREATE TABLE payments_default PARTITION OF payments DEFAULT')
+
+    op.execute('INSERT INTO payments SELECT * FROM payments_unpartitioned')
+
+    op.execute('CREATE TABLE payment_txn_ids (txn_id VARCHAR PRIMARY KEY)')
+    op.execute('INSERT INTO payment_txn_ids (txn_id) SELECT DISTINCT txn_id FROM payments WHERE txn_id IS NOT NULL')
+    op.execute(TXN_GUARD_FUNCTION)
+    op.execute(
+        'CREATE TRIGGER payments_txn_id_guard AFTER INSERT OR UPDATE OF txn_id OR DELETE ON payments '
+        'FOR EACH ROW EXECUTE FUNCTION payments_txn_id_guard()'
+    )
+
+    op.execute('DROP TABLE payments_unpartitioned')
+    op.execute('ALTER SEQUENCE IF EXISTS payments_id_seq OWNED BY payments.id')
+
+    # Recreate the indexes captured before the rename on the parent; Postgres
+    # cascades them to every partition. Unique indexes cannot omit the
+    # partition key, so txn_id uniqueness is enforced by payment_txn_ids.
+    for _, definition in indexes:
+        op.execute(definition.replace('CREATE UNIQUE INDEX', 'CREATE INDEX', 1))
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql' or not is_partitioned(bind, 'payments'):
+        return
+
+    op.execute('LOCK TABLE payments IN ACCESS EXCLUSIVE MODE')
+    indexes = _index_defs(bind, 'payments')
+    foreign_keys = _foreign_key_defs(bind, 'payments')
+
+    op.execute('DROP TRIGGER IF EXISTS payments_txn_id_guard ON payments')
+    op.execute('DROP FUNCTION IF EXISTS payments_txn_id_guard()')
+
+    op.execute('ALTER TABLE payments RENAME TO payments_partitioned')
+    op.execute('ALTER TABLE payments_partitioned RENAME CONSTRAINT payments_pkey TO payments_partitioned_pkey')
+    op.execute('ALTER SEQUENCE IF EXISTS payments_id_seq OWNED BY NONE')
+
+    op.execute('CREATE TABLE payments (LIKE payments_partitioned INCLUDING DEFAULTS)')
+    op.execute('ALTER TABLE payments ALTER COLUMN created_at DROP NOT NULL')
+    op.execute('ALTER TABLE payments ADD CONSTRAINT payments_pkey PRIMARY KEY (id)')
+    op.execute('INSERT INTO payments SELECT * FROM payments_partitioned')
+    for name, definition in foreign_keys:
+        op.execute(f'ALTER TABLE payments ADD CONSTRAINT "{name}" {definition}')
+
+    op.execute('DROP TABLE payments_partitioned CASCADE')
+    op.execute('DROP TABLE IF EXISTS payment_txn_ids')
+    op.execute('ALTER SEQUENCE IF EXISTS payments_id_seq OWNED BY payments.id')
+
+    for name, definition in indexes:
+        definition = definition.replace(' ON ONLY public.payments ', ' ON public.payments ', 1)
+        if name == 'ix_payments_txn_id':
+            definition = definition.replace('CREATE INDEX', 'CREATE UNIQUE INDEX', 1)
+        op.execute(definition)
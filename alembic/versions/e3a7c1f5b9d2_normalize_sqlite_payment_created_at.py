@@ -0,0 +1,34 @@
+"""normalize payments.created_at written by CURRENT_TIMESTAMP on SQLite
+
+`created_at` is part of the Payment mapper's identity (matching the Postgres
+primary key (id, created_at)), so ORM UPDATEs filter on it. On SQLite the
+column is text: rows defaulted by CURRENT_TIMESTAMP hold "YYYY-MM-DD
+HH:MM:SS", which never equals the "YYYY-MM-DD HH:MM:SS.ffffff" the ORM binds.
+Rewrite them in the ORM's format. Other databases store real timestamps and
+are left untouched.
+
+Revision ID: e3a7c1f5b9d2
+Revises: d5b9e3f7a1c4
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3a7c1f5b9d2'
+down_revision = 'd5b9e3f7a1c4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != 'sqlite':
+        return
+    op.execute("UPDATE payments SET created_at = created_at || '.000000' WHERE length(created_at) = 19")
+
+
+def downgrade() -> None:
+    # the normalized values stay valid under the previous revision
+    pass
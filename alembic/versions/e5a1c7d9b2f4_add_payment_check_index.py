@@ -0,0 +1,38 @@
+"""add payments (company_id, amount, created_at) index
+
+Revision ID: e5a1c7d9b2f4
+Revises: d3f8b2c1a6e5
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5a1c7d9b2f4'
+down_revision = 'd3f8b2c1a6e5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # payments: composite index used by the amount-scoped /payments/check probe
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    indexes = [ix['name'] for ix in inspector.get_indexes('payments')]
+    if 'ix_payments_company_amount_created_at' not in indexes:
+        op.create_index(
+            'ix_payments_company_amount_created_at',
+            'payments',
+            ['company_id', 'amount', 'created_at'],
+            unique=False,
+        )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    indexes = [ix['name'] for ix in inspector.get_indexes('payments')]
+    if 'ix_payments_company_amount_created_at' in indexes:
+        op.drop_index('ix_payments_company_amount_created_at', table_name='payments')
@@ -0,0 +1,54 @@
+"""add full-text search over payments.raw_message
+
+Postgres gets a GIN index on `to_tsvector('simple', raw_message)`. SQLite gets
+an external-content FTS5 table (`payments_fts`) kept in sync with `payments`
+by triggers and rebuilt from the existing rows.
+
+Revision ID: e9b3d7f1a5c8
+Revises: d8a2c6e4f0b9
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.models.payment import SQLITE_FTS_DDL
+
+
+# revision identifiers, used by Alembic.
+revision = 'e9b3d7f1a5c8'
+down_revision = 'd8a2c6e4f0b9'
+branch_labels = None
+depends_on = None
+
+SQLITE_FTS_TRIGGERS = ('payments_fts_ai', 'payments_fts_ad', 'payments_fts_au')
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        inspector = sa.inspect(bind)
+        indexes = [ix['name'] for ix in inspector.get_indexes('payments')]
+        if 'ix_payments_raw_message_fts' not in indexes:
+            op.execute(
+                "CREATE INDEX ix_payments_raw_message_fts ON payments "
+                "USING gin (to_tsvector('simple', raw_message))"
+            )
+    elif bind.dialect.name == 'sqlite':
+        options = bind.exec_driver_sql('PRAGMA compile_options').scalars().all()
+        if 'ENABLE_FTS5' not in options:
+            # Without FTS5 the `q` filter falls back to LIKE
+            return
+        for statement in SQLITE_FTS_DDL:
+            op.execute(statement)
+        op.execute("INSERT INTO payments_fts(payments_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        op.execute('DROP INDEX IF EXISTS ix_payments_raw_message_fts')
+    elif bind.dialect.name == 'sqlite':
+        for trigger in SQLITE_FTS_TRIGGERS:
+            op.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+        op.execute('DROP TABLE IF EXISTS payments_fts')
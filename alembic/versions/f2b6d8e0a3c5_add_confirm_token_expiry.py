@@ -0,0 +1,44 @@
+"""add payments.confirm_expires_at and sweep index
+
+Revision ID: f2b6d8e0a3c5
+Revises: e5a1c7d9b2f4
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2b6d8e0a3c5'
+down_revision = 'e5a1c7d9b2f4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    payment_cols = [c['name'] for c in inspector.get_columns('payments')]
+    if 'confirm_expires_at' not in payment_cols:
+        op.add_column('payments', sa.Column('confirm_expires_at', sa.DateTime(timezone=True), nullable=True))
+    indexes = [ix['name'] for ix in inspector.get_indexes('payments')]
+    if 'ix_payments_status_confirm_expires_at' not in indexes:
+        op.create_index(
+            'ix_payments_status_confirm_expires_at',
+            'payments',
+            ['status', 'confirm_expires_at'],
+            unique=False,
+        )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    indexes = [ix['name'] for ix in inspector.get_indexes('payments')]
+    if 'ix_payments_status_confirm_expires_at' in indexes:
+        op.drop_index('ix_payments_status_confirm_expires_at', table_name='payments')
+    cols = [c['name'] for c in inspector.get_columns('payments')]
+    if 'confirm_expires_at' in cols:
+        with op.batch_alter_table('payments') as batch_op:
+            batch_op.drop_column('confirm_expires_at')
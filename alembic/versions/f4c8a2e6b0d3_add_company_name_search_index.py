@@ -0,0 +1,27 @@
+"""add lower(name) index on companies for the admin name search
+
+Revision ID: f4c8a2e6b0d3
+Revises: e9b3d7f1a5c8
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'f4c8a2e6b0d3'
+down_revision = 'e9b3d7f1a5c8'
+branch_labels = None
+depends_on = None
+
+
+# Expression indexes are not reflected by every dialect's inspector, so
+# existence is checked with IF [NOT] EXISTS instead (SQLite and Postgres).
+
+
+def upgrade() -> None:
+    op.execute('CREATE INDEX IF NOT EXISTS ix_companies_name_lower ON companies (lower(name))')
+
+
+def downgrade() -> None:
+    op.execute('DROP INDEX IF EXISTS ix_companies_name_lower')
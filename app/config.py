@@ -1,5 +1,6 @@
 # Refactored by Copilot
 from functools import lru_cache
+from typing import Optional
 from pydantic import field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -23,14 +24,67 @@ class Settings(BaseSettings):
             raise RuntimeError("SECRET_KEY must be set to a secure value in environment variables")
         return v
 
+    # Connection pool of each engine (ignored on SQLite). pre_ping and recycle
+    # drop connections broken by a failover or closed by the server.
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # Optional dedicated primary pools per traffic class so a burst of one
+    # cannot starve the others; 0 shares the default engine
+    DB_INGEST_POOL_SIZE: int = 0
+    DB_MERCHANT_POOL_SIZE: int = 0
+    DB_ADMIN_POOL_SIZE: int = 0
+
+    # Optional read replica for /admin GET endpoints and reporting; reads fall
+    # back to the primary when its replication lag exceeds the limit
+    READ_REPLICA_URL: Optional[str] = None
+    READ_REPLICA_MAX_LAG_SECONDS: float = 30.0
+    # An unreachable replica must not stall requests: connection attempts and
+    # the lag probe give up quickly (the replica then counts as stale)
+    READ_REPLICA_CONNECT_TIMEOUT_SECONDS: int = 2
+    READ_REPLICA_LAG_CHECK_TIMEOUT_MS: int = 1000
+
     # Defaults used for merchant onboarding and local development
     DEFAULT_MERCHANT_BASE_URL_DEV: str = "http://localhost:8000"
     DEFAULT_MERCHANT_DOCS_URL: str = "https://docs.example.com/merchant-integration"
     DEFAULT_WALLET_DAILY_LIMIT: float = 100000.0
     # Onboarding PDF output directory (relative to repo root)
     ONBOARDING_OUTPUT_DIR: str = "generated_onboarding"
+    # Worker processes rendering onboarding documents in the background
+    # (0 renders inline in the request), and how long the synchronous
+    # /onboarding-pdf endpoint waits for its job
+    ONBOARDING_JOB_WORKERS: int = 1
+    ONBOARDING_JOB_WAIT_SECONDS: int = 120
+    # Status files of onboarding jobs, one per job id. Every API worker must
+    # see the same directory; kept outside ONBOARDING_OUTPUT_DIR, which is
+    # served as /static/onboarding
+    ONBOARDING_JOB_DIR: str = "generated_onboarding_jobs"
     # Environment name used in generated docs
     ENVIRONMENT_NAME: str = "dev"
+    # In-memory index of recent unmatched payments consulted by /payments/check
+    HOT_PAYMENT_INDEX_ENABLED: bool = True
+    HOT_PAYMENT_WINDOW_MINUTES: int = 30
+    # Lifetime of a confirm_token issued by /payments/check
+    CONFIRM_TOKEN_TTL_MINUTES: int = 15
+    # Expired pending payments younger than this go back to "new", older ones become "expired"
+    PENDING_REVERT_WINDOW_MINUTES: int = 60
+    # How often the background sweeper runs (0 disables it)
+    PENDING_SWEEP_INTERVAL_SECONDS: int = 60
+    # How long /admin/payments keeps a total computed with count=cached
+    PAYMENTS_COUNT_CACHE_TTL_SECONDS: int = 30
+    # How often the hourly payment rollup behind /admin/stats is refreshed (0 disables it)
+    PAYMENT_ROLLUP_INTERVAL_SECONDS: int = 300
+    # Monthly payments partitions (Postgres): how many future months to pre-create,
+    # and how often to check (0 disables the job)
+    PAYMENT_PARTITIONS_MONTHS_AHEAD: int = 2
+    PAYMENT_PARTITION_INTERVAL_SECONDS: int = 6 * 60 * 60
+    # Longest an admin list ETag stays valid when a write was not seen by this
+    # process (another worker, a script); 0 disables conditional GETs
+    ADMIN_ETAG_MAX_AGE_SECONDS: int = 60
+    # Longest the in-process countries/providers cache is trusted before a reload
+    REFERENCE_DATA_TTL_SECONDS: int = 300
 
 
 @lru_cache()
@@ -0,0 +1,116 @@
+"""ETag / conditional GET support for admin reference-data endpoints.
+
+Each cacheable resource ("companies", "countries", ...) has an in-process
+version counter that the create, update and toggle endpoints bump after a
+successful write. A GET derives its ETag from the counters it depends on, so
+`If-None-Match` can be answered with `304 Not Modified` before any query runs.
+
+The ETag also carries a random per-process token (a restart, or a request
+served by another worker, never matches an old tag) and the current
+`ADMIN_ETAG_MAX_AGE_SECONDS` window, which bounds how long a tag can stay
+valid for writes this process did not see (another worker, a script, a
+direct SQL change). Set it to 0 to disable conditional GETs.
+
+Tagged GETs may read from the replica, which can still lack a write this
+process just made: a body built from it would be cached under the new tag.
+`bumped_within` lets `app.db.session.read_db_for` send those reads to the
+primary until the replica has had `READ_REPLICA_MAX_LAG_SECONDS` to catch up.
+"""
+import threading
+import time
+import uuid
+from typing import Dict, Optional
+
+from fastapi import Request, Response
+
+from app.config import settings
+
+COMPANIES = "companies"
+COUNTRIES = "countries"
+PAYMENT_PROVIDERS = "payment_providers"
+
+
+def company_wallets(company_id: int) -> str:
+    return f"wallets:{company_id}"
+
+
+class ResourceVersions:
+    """Thread-safe monotonically increasing version counter per resource."""
+
+    def __init__(self) -> None:
+        self._versions: Dict[str, int] = {}
+        self._bumped_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def get(self, resource: str) -> int:
+        with self._lock:
+            return self._versions.get(resource, 0)
+
+    def bump(self, *resources: str) -> None:
+        now = time.monotonic()
+        with self._lock:
+            for resource in resources:
+                self._versions[resource] = self._versions.get(resource, 0) + 1
+                self._bumped_at[resource] = now
+
+    def bumped_within(self, seconds: float, *resources: str) -> bool:
+        """Whether any of `resources` was bumped in the last `seconds`."""
+        since = time.monotonic() - seconds
+        with self._lock:
+            return any(self._bumped_at.get(resource, float("-inf")) > since for resource in resources)
+
+
+resource_versions = ResourceVersions()
+_PROCESS_TOKEN = uuid.uuid4().hex[:12]
+
+
+def bump(*resources: str) -> None:
+    """Invalidate the ETags of every GET depending on `resources`."""
+    resource_versions.bump(*resources)
+
+
+def bumped_within(seconds: float, *resources: str) -> bool:
+    """Whether this process wrote any of `resources` in the last `seconds`."""
+    return resource_versions.bumped_within(seconds, *resources)
+
+
+def etag_for(*resources: str) -> Optional[str]:
+    """Current weak ETag for a response built from `resources`, or None if disabled."""
+    max_age = settings.ADMIN_ETAG_MAX_AGE_SECONDS
+    if max_age <= 0:
+        return None
+    window = int(time.time() // max_age)
+    versions = ".".join(str(resource_versions.get(resource)) for resource in resources)
+    return f'W/"{_PROCESS_TOKEN}-{window}-{versions}"'
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # weak comparison: W/"x" and "x" are the same tag
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def conditional_get(request: Request, response: Response, *resources: str) -> Optional[Response]:
+    """Answer a GET from the client's cache when its ETag is still current.
+
+    Returns a bodiless 304 response when `If-None-Match` matches; otherwise
+    sets `ETag` on `response` and returns None so the endpoint builds the
+    body as usual.
+    """
+    etag = etag_for(*resources)
+    if etag is None:
+        return None
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
@@ -0,0 +1,179 @@
+"""Monthly range partitions of the `payments` table (Postgres only).
+
+The migration `d8a2c6e4f0b9` turns `payments` into a table partitioned by
+`RANGE (created_at)` with one partition per calendar month (named
+`payments_YYYY_MM`) plus a `payments_default` catch-all. Queries that bound
+`created_at` (the check probe, the matching window, the admin date filters)
+are pruned to the relevant months by the planner without any code change.
+
+This module creates upcoming partitions ahead of time and detaches, archives
+or drops old ones. It is used by the periodic maintenance job and by
+`scripts/payment_partitions.py`, both under the advisory lock of the
+"payment-partition-maintenance" job so two processes never run the DDL at
+once. Every function is a no-op on databases where
+`payments` is not partitioned (e.g. SQLite in tests and local development).
+"""
+from dataclasses import dataclass
+from datetime import date, datetime
+import logging
+import re
+from typing import List, Optional, Tuple, Union
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+logger = logging.getLogger("payment_gateway")
+
+PARTITIONED_TABLE = "payments"
+ARCHIVE_SCHEMA = "archive"
+# Global txn_id uniqueness guard kept by a trigger (see migration d8a2c6e4f0b9)
+TXN_GUARD_TABLE = "payment_txn_ids"
+
+_PARTITION_RE = re.compile(r"^(?P<table>\w+)_(?P<year>\d{4})_(?P<month>\d{2})$")
+
+
+@dataclass(frozen=True)
+class Partition:
+    name: str
+    start: date
+    end: date
+
+
+def month_bounds(day: Union[date, datetime]) -> Tuple[date, date]:
+    """First day of the month containing `day` and first day of the next month."""
+    start = date(day.year, day.month, 1)
+    return start, add_months(start, 1)
+
+
+def add_months(day: date, months: int) -> date:
+    """Shift a first-of-month date by `months` (may be negative)."""
+    index = day.year * 12 + (day.month - 1) + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(start: date, table: str = PARTITIONED_TABLE) -> str:
+    return f"{table}_{start:%Y_%m}"
+
+
+def parse_partition_name(name: str, table: str = PARTITIONED_TABLE) -> Optional[Partition]:
+    """Return the month covered by a partition name, or None for other tables."""
+    match = _PARTITION_RE.match(name)
+    if match is None or match.group("table") != table:
+        return None
+    start = date(int(match.group("year")), int(match.group("month")), 1)
+    return Partition(name=name, start=start, end=add_months(start, 1))
+
+
+def create_partition_sql(start: date, table: str = PARTITIONED_TABLE) -> str:
+    start, end = month_bounds(start)
+    return (
+        f'CREATE TABLE IF NOT EXISTS "{partition_name(start, table)}" '
+        f'PARTITION OF "{table}" '
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    )
+
+
+def is_partitioned(conn: Connection, table: str = PARTITIONED_TABLE) -> bool:
+    if conn.dialect.name != "postgresql":
+        return False
+    relkind = conn.execute(
+        text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:table)"),
+        {"table": table},
+    ).scalar()
+    return relkind == "p"
+
+
+def list_partitions(conn: Connection, table: str = PARTITIONED_TABLE) -> List[Partition]:
+    """Monthly partitions currently attached to `table`, oldest first."""
+    if not is_partitioned(conn, table):
+        return []
+    names = conn.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(:table)"
+        ),
+        {"table": table},
+    ).scalars()
+    partitions = [p for p in (parse_partition_name(name, table) for name in names) if p is not None]
+    return sorted(partitions, key=lambda p: p.start)
+
+
+def ensure_monthly_partitions(
+    conn: Connection,
+    months_ahead: int = 2,
+    today: Optional[date] = None,
+    table: str = PARTITIONED_TABLE,
+) -> List[str]:
+    """Create the partitions for the current month and `months_ahead` more.
+
+    Partitions must exist before rows for their month arrive; otherwise rows
+    land in the default partition, and the month can then only be created
+    after moving them out. Returns the names of the partitions created.
+    """
+    if not is_partitioned(conn, table):
+        return []
+    existing = {p.name for p in list_partitions(conn, table)}
+    start, _ = month_bounds(today or date.today())
+    created = []
+    for offset in range(months_ahead + 1):
+        month = add_months(start, offset)
+        name = partition_name(month, table)
+        if name in existing:
+            continue
+        conn.execute(text(create_partition_sql(month, table)))
+        created.append(name)
+    if created:
+        logger.info("Created payment partitions: %s", ", ".join(created))
+    return created
+
+
+def retire_partitions(
+    conn: Connection,
+    keep_months: int,
+    action: str = "detach",
+    today: Optional[date] = None,
+    table: str = PARTITIONED_TABLE,
+) -> List[str]:
+    """Detach, archive or drop partitions older than `keep_months` full months.
+
+    - "detach": the partition becomes a standalone table with the same name.
+    - "archive": detach and move the table into the `archive` schema.
+    - "drop": detach and drop the table and its rows.
+
+    The partition's txn_ids are removed from the `payment_txn_ids` guard in
+    the same transaction: once detached its rows are no longer payments, and
+    the DETACH/DROP bypasses the trigger that would otherwise delete them.
+
+    Returns the names of the partitions retired.
+    """
+    if action not in ("detach", "archive", "drop"):
+        raise ValueError(f"Unknown action: {action}")
+    if keep_months < 1:
+        raise ValueError("keep_months must be at least 1")
+
+    current, _ = month_bounds(today or date.today())
+    cutoff = add_months(current, -keep_months)
+    expired = [p for p in list_partitions(conn, table) if p.end <= cutoff]
+    if not expired:
+        return []
+    has_guard = conn.execute(text("SELECT to_regclass(:table) IS NOT NULL"), {"table": TXN_GUARD_TABLE}).scalar()
+    retired = []
+    for partition in expired:
+        if has_guard:
+            conn.execute(
+                text(
+                    f'DELETE FROM "{TXN_GUARD_TABLE}" AS guard USING "{partition.name}" AS retired '
+                    "WHERE guard.txn_id = retired.txn_id"
+                )
+            )
+        conn.execute(text(f'ALTER TABLE "{table}" DETACH PARTITION "{partition.name}"'))
+        if action == "archive":
+            conn.execute(text(f'CREATE SCHEMA IF NOT EXISTS "{ARCHIVE_SCHEMA}"'))
+            conn.execute(text(f'ALTER TABLE "{partition.name}" SET SCHEMA "{ARCHIVE_SCHEMA}"'))
+        elif action == "drop":
+            conn.execute(text(f'DROP TABLE "{partition.name}"'))
+        retired.append(partition.name)
+    if retired:
+        logger.info("Retired payment partitions (%s): %s", action, ", ".join(retired))
+    return retired
@@ -1,26 +1,69 @@
 # Refactored by Copilot
+from contextlib import contextmanager
 from datetime import datetime
-from sqlalchemy import create_engine, event
-from sqlalchemy.orm import sessionmaker
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from fastapi import Depends
+from sqlalchemy import Engine, QueuePool, create_engine, event, make_url, text
+from sqlalchemy.orm import Session, sessionmaker
 from app.config import get_settings
+from app.core import etag
 
 settings = get_settings()
 
-# Single engine used by the application
-engine = create_engine(settings.DATABASE_URL, future=True)
-
-# Register a SQLite-compatible "now()" SQL function so existing
-# DEFAULT now() in schemas works without errors when using SQLite.
-if engine.url.get_backend_name() == "sqlite":
-    @event.listens_for(engine, "connect")
-    def _sqlite_register_now_function(dbapi_connection, connection_record):
-        # sqlite3 connection: register a SQL function named "now"
-        # that returns UTC timestamp as text.
-        def _now():
-            return datetime.utcnow().isoformat(" ")
-
-        # dbapi_connection is a sqlite3.Connection
-        dbapi_connection.create_function("now", 0, _now)
+logger = logging.getLogger("payment_gateway")
+
+
+def _sqlite_register_now_function(dbapi_connection, connection_record):
+    # Register a SQLite-compatible "now()" SQL function so existing
+    # DEFAULT now() in schemas works without errors when using SQLite.
+    def _now():
+        return datetime.utcnow().isoformat(" ")
+
+    # dbapi_connection is a sqlite3.Connection
+    dbapi_connection.create_function("now", 0, _now)
+
+
+def engine_options(url: str, pool_size: Optional[int] = None) -> Dict[str, Any]:
+    """Pool arguments for `create_engine` from the DB_POOL_* settings.
+
+    SQLite gets none: its dialect picks a pool suited to the file or
+    in-memory database, and sizing/timeout arguments do not apply to it.
+    """
+    if make_url(url).get_backend_name() == "sqlite":
+        return {}
+    return {
+        "pool_size": settings.DB_POOL_SIZE if pool_size is None else pool_size,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+def create_app_engine(
+    url: str,
+    pool_size: Optional[int] = None,
+    connect_args: Optional[Dict[str, Any]] = None,
+) -> Engine:
+    """Engine configured the same way for the primary, role pools and replica.
+
+    `connect_args` go to the DBAPI `connect()` of server databases only.
+    """
+    options = engine_options(url, pool_size)
+    if connect_args and options:
+        options["connect_args"] = connect_args
+    new_engine = create_engine(url, future=True, **options)
+    if new_engine.url.get_backend_name() == "sqlite":
+        event.listen(new_engine, "connect", _sqlite_register_now_function)
+    return new_engine
+
+
+# Default engine used by the application
+engine = create_app_engine(settings.DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
@@ -30,3 +73,236 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# Optional dedicated pools on the primary, one per traffic class. A role
+# without one uses the default engine. Never on SQLite, where another engine
+# would be another (in-memory) database.
+INGEST = "ingest"
+MERCHANT = "merchant"
+ADMIN = "admin"
+
+_ROLE_POOL_SIZES = {
+    INGEST: settings.DB_INGEST_POOL_SIZE,
+    MERCHANT: settings.DB_MERCHANT_POOL_SIZE,
+    ADMIN: settings.DB_ADMIN_POOL_SIZE,
+}
+role_engines: Dict[str, Engine] = {
+    role: create_app_engine(settings.DATABASE_URL, pool_size=size)
+    for role, size in _ROLE_POOL_SIZES.items()
+    if size > 0 and engine.url.get_backend_name() != "sqlite"
+}
+_role_sessions = {
+    role: sessionmaker(autocommit=False, autoflush=False, bind=role_engine)
+    for role, role_engine in role_engines.items()
+}
+
+
+def _role_db(role: str, db: Session):
+    factory = _role_sessions.get(role)
+    if factory is None:
+        yield db
+        return
+    role_db = factory()
+    try:
+        yield role_db
+    finally:
+        role_db.close()
+
+
+# Like `get_read_db`, these build on `get_db` (whose session is never
+# connected when a dedicated pool is used), so overriding `get_db` in tests
+# still covers every route.
+def get_ingest_db(db: Session = Depends(get_db)):
+    """Session for the SMS ingest path (`/incoming-sms`)."""
+    yield from _role_db(INGEST, db)
+
+
+def get_merchant_db(db: Session = Depends(get_db)):
+    """Session for merchant API traffic (`/wallets`, `/payments`) and its auth."""
+    yield from _role_db(MERCHANT, db)
+
+
+def get_admin_db(db: Session = Depends(get_db)):
+    """Session for the admin panel endpoints."""
+    yield from _role_db(ADMIN, db)
+
+
+# Optional read replica for admin listings and reporting
+read_engine = (
+    create_app_engine(
+        settings.READ_REPLICA_URL,
+        connect_args={"connect_timeout": settings.READ_REPLICA_CONNECT_TIMEOUT_SECONDS},
+    )
+    if settings.READ_REPLICA_URL
+    else None
+)
+ReadSessionLocal = (
+    sessionmaker(autocommit=False, autoflush=False, bind=read_engine) if read_engine is not None else None
+)
+
+# Postgres standby: 0 when everything received has been replayed, otherwise
+# the age of the last replayed transaction.
+_REPLICA_LAG_SQL = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+
+
+class ReplicaLagGuard:
+    """Decide whether the replica is fresh enough to serve reads.
+
+    The lag is measured at most once per `check_interval_seconds` and shared
+    by all requests of the process. A replica whose lag is unknown (query
+    failed) or above `max_lag_seconds` is treated as stale.
+
+    Only one request runs the probe; the others meanwhile get the previous
+    verdict (stale before the first probe finished) instead of queueing
+    behind a slow or unreachable replica.
+    """
+
+    def __init__(
+        self,
+        max_lag_seconds: float,
+        check_interval_seconds: float = 5.0,
+        timeout_ms: int = 1000,
+    ) -> None:
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval_seconds = check_interval_seconds
+        self.timeout_ms = timeout_ms
+        self._checked_at: Optional[float] = None
+        self._fresh = False
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def measure_lag(self, bind) -> Optional[float]:
+        if bind.dialect.name != "postgresql":
+            return 0.0
+        try:
+            with bind.connect() as conn:
+                conn.execute(
+                    text("SELECT set_config('statement_timeout', :timeout, true)"),
+                    {"timeout": str(self.timeout_ms)},
+                )
+                lag = conn.execute(_REPLICA_LAG_SQL).scalar()
+        except Exception:
+            logger.warning("Read replica lag check failed", exc_info=True)
+            return None
+        return float(lag) if lag is not None else 0.0
+
+    def is_fresh(self, bind) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            due = self._checked_at is None or now - self._checked_at >= self.check_interval_seconds
+            if not due or self._probing:
+                return self._fresh
+            self._probing = True
+
+        lag = None
+        try:
+            lag = self.measure_lag(bind)
+        finally:
+            fresh = lag is not None and lag <= self.max_lag_seconds
+            with self._lock:
+                self._fresh = fresh
+                self._checked_at = time.monotonic()
+                self._probing = False
+        if not fresh:
+            logger.info("Read replica stale (lag=%s); reading from primary", lag)
+        return fresh
+
+
+replica_guard = ReplicaLagGuard(
+    max_lag_seconds=settings.READ_REPLICA_MAX_LAG_SECONDS,
+    timeout_ms=settings.READ_REPLICA_LAG_CHECK_TIMEOUT_MS,
+)
+
+
+def _read_session(db: Session, *resources: str):
+    if ReadSessionLocal is None or not replica_guard.is_fresh(read_engine):
+        yield db
+        return
+    # the replica may not have this process's latest write to `resources` yet
+    if resources and etag.bumped_within(settings.READ_REPLICA_MAX_LAG_SECONDS, *resources):
+        yield db
+        return
+    replica = ReadSessionLocal()
+    try:
+        yield replica
+    finally:
+        replica.close()
+
+
+def get_read_db(db: Session = Depends(get_admin_db)):
+    """Session for read-only admin and reporting queries.
+
+    Yields a replica session when `READ_REPLICA_URL` is set and the replica is
+    within `READ_REPLICA_MAX_LAG_SECONDS`; otherwise falls back to the primary
+    admin session from `get_admin_db` (which is never connected when the
+    replica is used).
+    """
+    yield from _read_session(db)
+
+
+def read_db_for(*resources: str):
+    """`get_read_db` for a response tagged with the ETag `resources`.
+
+    After this process bumped one of them, reads go to the primary for
+    `READ_REPLICA_MAX_LAG_SECONDS`, so the new tag is never given to a body
+    read from a replica that has not replayed the write yet.
+    """
+
+    def dependency(db: Session = Depends(get_admin_db)):
+        yield from _read_session(db, *resources)
+
+    return dependency
+
+
+def read_db_for_company_wallets(company_id: int, db: Session = Depends(get_admin_db)):
+    """`read_db_for` the wallets of the company in the path."""
+    yield from _read_session(db, etag.company_wallets(company_id))
+
+
+@contextmanager
+def unit_of_work(db):
+    """Run the block as one transaction: commit on success, roll back on error.
+
+    Objects are not expired by the commit, so the values written in the block
+    (including rows loaded through UPDATE ... RETURNING) can be returned to the
+    caller without a refresh SELECT.
+    """
+    expire_on_commit = getattr(db, "expire_on_commit", True)
+    setattr(db, "expire_on_commit", False)
+    try:
+        yield db
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        setattr(db, "expire_on_commit", expire_on_commit)
+
+
+def pool_stats(bind: Engine) -> Dict[str, Any]:
+    """Current usage of an engine's connection pool, for monitoring."""
+    pool = bind.pool
+    stats: Dict[str, Any] = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+            timeout=pool.timeout(),
+        )
+    return stats
+
+
+def all_pool_stats() -> Dict[str, Dict[str, Any]]:
+    """Pool statistics of every engine of the process, keyed by role."""
+    stats = {"default": pool_stats(engine)}
+    for role, role_engine in role_engines.items():
+        stats[role] = pool_stats(role_engine)
+    if read_engine is not None:
+        stats["replica"] = pool_stats(read_engine)
+    return stats
@@ -0,0 +1,60 @@
+"""Dialect-specific SQL expressions shared by models and repositories.
+
+Each construct compiles to the portable form by default and to its Postgres
+form on Postgres, so index definitions in `app.models` and the queries in
+`app.repositories` that those indexes serve are built from the same
+expression.
+"""
+from sqlalchemy import DateTime
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+
+class binary_collation(FunctionElement):
+    """`expr COLLATE "C"` on Postgres; the bare expression elsewhere.
+
+    SQLite compares text byte-wise already (BINARY), while Postgres orders
+    text by the database locale, where punctuation is ignored at the first
+    comparison level ("AB-9" sorts after "AB."). Indexes meant to serve
+    `prefix_match` must be built on the same collated expression.
+    """
+
+    inherit_cache = True
+
+    def __init__(self, expr):
+        super().__init__(expr)
+        self.type = expr.type
+
+
+@compiles(binary_collation)
+def _compile_binary_collation(element, compiler, **kw):
+    return compiler.process(element.clauses, **kw)
+
+
+@compiles(binary_collation, "postgresql")
+def _compile_binary_collation_postgresql(element, compiler, **kw):
+    return '(%s) COLLATE "C"' % compiler.process(element.clauses, **kw)
+
+
+class hour_bucket(FunctionElement):
+    """Start of the UTC hour containing a timestamp column.
+
+    `date_trunc` in UTC on Postgres. SQLite stores timestamps as text, so
+    the hour is cut out with `strftime` in the same layout SQLAlchemy writes,
+    which keeps the result comparable with bound datetimes.
+    """
+
+    type = DateTime(timezone=True)
+    inherit_cache = True
+
+
+@compiles(hour_bucket)
+def _compile_hour_bucket(element, compiler, **kw):
+    return "strftime('%%Y-%%m-%%d %%H:00:00.000000', %s)" % compiler.process(element.clauses, **kw)
+
+
+@compiles(hour_bucket, "postgresql")
+def _compile_hour_bucket_postgresql(element, compiler, **kw):
+    return "(date_trunc('hour', %s AT TIME ZONE 'UTC') AT TIME ZONE 'UTC')" % compiler.process(
+        element.clauses, **kw
+    )
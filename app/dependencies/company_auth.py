@@ -1,7 +1,7 @@
 from fastapi import Depends, Header, HTTPException, status
 from sqlalchemy.orm import Session
 
-from app.db.session import get_db
+from app.db.session import get_merchant_db
 from app.models.company import Company
 
 
@@ -40,7 +40,7 @@ def get_company_by_api_key(db: Session, api_key: str) -> Company:
 
 def get_current_company(
     x_api_key: str = Header(..., alias="X-API-Key"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_merchant_db),
 ) -> Company:
     """
     FastAPI dependency to resolve the current Company from the X-API-Key header.
@@ -8,14 +8,14 @@ Note: logic/behavior unchanged — only docstrings and type hints added.
 """
 from fastapi import Depends, HTTPException, Header, status
 from sqlalchemy.orm import Session
-from app.db.session import get_db
+from app.db.session import get_ingest_db, get_merchant_db
 from app.models.company import Company
 from app.models.channel import Channel
 
 
 def get_current_company(
     x_api_key: str = Header(..., alias="X-API-Key"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_merchant_db),
 ) -> Company:
     """Resolve the current Company from `X-API-Key` header.
 
@@ -79,7 +79,7 @@ def get_current_company(
 
 def get_current_channel(
     channel_api_key: str = Header(..., alias="channel_api_key"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_ingest_db),
 ) -> Channel:
     """Resolve the current Channel from `channel_api_key` header.
 
@@ -14,14 +14,35 @@ from app.routers.admin_wallets import router as admin_wallets_router
 from app.routers.admin_companies import router as admin_companies_router
 from app.routers.admin_payment_providers import router as admin_payment_providers_router
 from app.routers.admin_payments import router as admin_payments_router
+from app.routers.admin_stats import router as admin_stats_router
+from app.routers.admin_onboarding_jobs import router as admin_onboarding_jobs_router
 from pathlib import Path
+from contextlib import asynccontextmanager
 from fastapi.staticfiles import StaticFiles
 from app.config import settings
+from app.services.maintenance import start_periodic_tasks, stop_periodic_tasks
+from app.services.onboarding_jobs import onboarding_jobs
+from app.services.reference_data import preload_reference_data
 
 # Configure logging early
 setup_logging()
 
-app = FastAPI(title="Payment Gateway API")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Countries and payment providers are served from memory after this
+    preload_reference_data()
+    # Background maintenance (e.g. expired confirm-token sweep)
+    start_periodic_tasks()
+    try:
+        yield
+    finally:
+        stop_periodic_tasks()
+        # Stop the onboarding render workers (started on first job)
+        onboarding_jobs.shutdown()
+
+
+app = FastAPI(title="Payment Gateway API", lifespan=lifespan)
 
 # Mount onboarding static files (generated HTML/PDF) so they can be downloaded
 onboarding_dir = Path(settings.ONBOARDING_OUTPUT_DIR)
@@ -45,6 +66,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Register global exception handlers
@@ -75,6 +97,8 @@ app.include_router(admin_companies_router)
 app.include_router(admin_payment_providers_router)
 app.include_router(admin_geo_router)
 app.include_router(admin_payments_router)
+app.include_router(admin_stats_router)
+app.include_router(admin_onboarding_jobs_router)
 
 
 @app.get("/")
@@ -6,5 +6,16 @@ from .channel import Channel  # noqa: F401
 from .wallet import Wallet  # noqa: F401
 from .payment import Payment  # noqa: F401
 from .country import Country, PaymentProvider, CountryPaymentProvider  # noqa: F401
+from .payment_rollup import PaymentRollupHourly, RollupWatermark  # noqa: F401
 
-__all__ = ["Company", "Channel", "Wallet", "Payment", "Country", "PaymentProvider", "CountryPaymentProvider"]
+__all__ = [
+    "Company",
+    "Channel",
+    "Wallet",
+    "Payment",
+    "Country",
+    "PaymentProvider",
+    "CountryPaymentProvider",
+    "PaymentRollupHourly",
+    "RollupWatermark",
+]
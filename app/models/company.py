@@ -1,8 +1,9 @@
 # Refactored by Copilot
-from sqlalchemy import Column, Integer, String, Boolean, DateTime
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.db.base import Base
+from app.db.sql_functions import binary_collation
 from app.config import settings, get_settings
 
 
@@ -20,6 +21,12 @@ class Company(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.current_timestamp())
     updated_at = Column(DateTime(timezone=True), onupdate=func.current_timestamp(), server_default=func.current_timestamp())
 
+    __table_args__ = (
+        # Serves the case-insensitive name-prefix search of the admin listing;
+        # `lower(name) COLLATE "C"` on Postgres, like query_helpers.prefix_match
+        Index("ix_companies_name_lower", binary_collation(func.lower(name))),
+    )
+
     channels = relationship("Channel", back_populates="company")
     wallets = relationship("Wallet", back_populates="company")
     payments = relationship("Payment", back_populates="company")
@@ -1,4 +1,6 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from datetime import datetime, timezone
+
+from sqlalchemy import DDL, Column, Integer, String, DateTime, ForeignKey, Index, event, text
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 
@@ -6,7 +8,40 @@ from app.db.base import Base
 
 
 class Payment(Base):
+    # On Postgres the table is partitioned by month on created_at (primary key
+    # (id, created_at)); see app/db/partitioning.py. The mapper uses the same
+    # identity, so ORM UPDATEs and DELETEs filter on created_at and touch a
+    # single partition. The table-level key stays `id` for SQLite's rowid ids.
     __tablename__ = "payments"
+    __table_args__ = (
+        # Serves the /payments/check probe (company_id = ? AND amount = ? AND
+        # created_at > ? ORDER BY created_at DESC LIMIT 1)
+        Index("ix_payments_company_amount_created_at", "company_id", "amount", "created_at"),
+        # Serves the bulk sweep of expired pending confirmations
+        Index("ix_payments_status_confirm_expires_at", "status", "confirm_expires_at"),
+        # Serves keyset pagination of the admin payments listing
+        Index("ix_payments_created_at_id", "created_at", "id"),
+        # Serves per-wallet daily aggregates (wallet utilization, wallet selection)
+        Index("ix_payments_wallet_id_created_at", "wallet_id", "created_at"),
+        # Serves the rollup refresh's scan for payments updated since its watermark
+        Index("ix_payments_updated_at", "updated_at"),
+        # Serves prefix txn_id search (query_helpers.prefix_match compares in
+        # the "C" collation on Postgres; SQLite uses the txn_id index)
+        Index("ix_payments_txn_id_c", text('(txn_id COLLATE "C")')).ddl_if(dialect="postgresql"),
+        # Serves substring txn_id search in the admin listing (Postgres only)
+        Index(
+            "ix_payments_txn_id_trgm",
+            "txn_id",
+            postgresql_using="gin",
+            postgresql_ops={"txn_id": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+        # Serves full-text search over raw_message (Postgres; SQLite uses payments_fts)
+        Index(
+            "ix_payments_raw_message_fts",
+            text("to_tsvector('simple', raw_message)"),
+            postgresql_using="gin",
+        ).ddl_if(dialect="postgresql"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
 
@@ -26,9 +61,17 @@ class Payment(Base):
     status = Column(String, nullable=False, default="new")
     order_id = Column(String, nullable=True)
     confirm_token = Column(String, nullable=True, index=True)
+    confirm_expires_at = Column(DateTime(timezone=True), nullable=True)
 
-    # Use CURRENT_TIMESTAMP for server-side defaults (compatible with SQLite)
-    created_at = Column(DateTime(timezone=True), server_default=func.current_timestamp())
+    # Use CURRENT_TIMESTAMP for server-side defaults (compatible with SQLite).
+    # The ORM sets created_at itself: as part of the identity it is bound back
+    # in UPDATE ... WHERE, which on SQLite only matches a value stored in the
+    # ORM's own format (CURRENT_TIMESTAMP there has no fractional seconds).
+    created_at = Column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        server_default=func.current_timestamp(),
+    )
     updated_at = Column(DateTime(timezone=True), onupdate=func.current_timestamp(), server_default=func.current_timestamp())
     used_at = Column(DateTime(timezone=True), nullable=True)
 
@@ -36,8 +79,47 @@ class Payment(Base):
     channel = relationship("Channel", back_populates="payments")
     wallet = relationship("Wallet", back_populates="payments")
 
+    __mapper_args__ = {"primary_key": [id, created_at]}
+
     def __init__(self, *args, **kwargs):
         # ensure a Python-side default for status when instantiating without DB
         if "status" not in kwargs:
             kwargs["status"] = "new"
         super().__init__(*args, **kwargs)
+
+
+# gin_trgm_ops needs the pg_trgm extension before the table's indexes are created
+event.listen(
+    Payment.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+
+
+# SQLite: external-content FTS5 table over raw_message, kept in sync by triggers.
+SQLITE_FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS payments_fts USING fts5(raw_message, content='payments', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS payments_fts_ai AFTER INSERT ON payments BEGIN "
+    "INSERT INTO payments_fts(rowid, raw_message) VALUES (new.id, new.raw_message); END",
+    "CREATE TRIGGER IF NOT EXISTS payments_fts_ad AFTER DELETE ON payments BEGIN "
+    "INSERT INTO payments_fts(payments_fts, rowid, raw_message) VALUES ('delete', old.id, old.raw_message); END",
+    "CREATE TRIGGER IF NOT EXISTS payments_fts_au AFTER UPDATE OF raw_message ON payments BEGIN "
+    "INSERT INTO payments_fts(payments_fts, rowid, raw_message) VALUES ('delete', old.id, old.raw_message); "
+    "INSERT INTO payments_fts(rowid, raw_message) VALUES (new.id, new.raw_message); END",
+]
+
+
+def _sqlite_with_fts5(ddl, target, bind, **kw) -> bool:
+    if bind.dialect.name != "sqlite":
+        return False
+    options = bind.exec_driver_sql("PRAGMA compile_options").scalars().all()
+    return "ENABLE_FTS5" in options
+
+
+for _statement in SQLITE_FTS_DDL:
+    event.listen(Payment.__table__, "after_create", DDL(_statement).execute_if(callable_=_sqlite_with_fts5))
+event.listen(
+    Payment.__table__,
+    "before_drop",
+    DDL("DROP TABLE IF EXISTS payments_fts").execute_if(dialect="sqlite"),
+)
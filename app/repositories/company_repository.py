@@ -0,0 +1,72 @@
+"""Repository layer for Company-related DB access.
+
+This module centralizes the queries used by the admin company endpoints.
+"""
+from typing import List, Optional, Tuple
+
+from sqlalchemy import Row, func
+from sqlalchemy.orm import Session, joinedload, selectinload
+
+from app.models.channel import Channel
+from app.models.company import Company
+from app.models.wallet import Wallet
+from app.repositories.query_helpers import prefix_match
+
+
+def get_company_aggregate(db: Session, company_id: int) -> Optional[Company]:
+    """Load a company with everything the admin detail view reads.
+
+    Channels (with their provider) and wallets (with their channel and that
+    channel's provider) are loaded eagerly in three statements whatever the
+    number of channels and wallets, so serializing the result never issues
+    lazy loads. Already-loaded instances are overwritten with fresh rows, so
+    this can be called right after a write in the same session.
+    """
+    return (
+        db.query(Company)
+        .options(
+            selectinload(Company.channels).joinedload(Channel.provider),
+            selectinload(Company.wallets).joinedload(Wallet.channel).joinedload(Channel.provider),
+        )
+        .filter(Company.id == company_id)
+        .populate_existing()
+        .first()
+    )
+
+
+def company_exists(db: Session, company_id: int) -> bool:
+    return db.query(Company.id).filter(Company.id == company_id).first() is not None
+
+
+def list_companies(
+    db: Session,
+    limit: int = 100,
+    cursor: Optional[int] = None,
+    name: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    country_code: Optional[str] = None,
+) -> Tuple[List[Row], Optional[int]]:
+    """Page through companies in id order for the admin listing.
+
+    `cursor` is the last id of the previous page. `name` is a
+    case-insensitive prefix served by the `lower(name)` index. Only the
+    columns of `AdminCompanyListItem` are selected.
+
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    q = db.query(Company.id, Company.name, Company.country_code, Company.is_active)
+    if cursor is not None:
+        q = q.filter(Company.id > cursor)
+    if name is not None and name.strip() != "":
+        q = q.filter(prefix_match(func.lower(Company.name), name.strip().lower()))
+    if is_active is not None:
+        q = q.filter(Company.is_active == is_active)
+    if country_code is not None and country_code != "":
+        q = q.filter(Company.country_code == country_code)
+
+    rows = q.order_by(Company.id.asc()).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = rows[-1].id
+    return rows, next_cursor
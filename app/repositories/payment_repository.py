@@ -5,11 +5,25 @@ This module centralizes queries and persistence for `Payment` entities so
 service logic can remain focused on domain behavior.
 """
 from datetime import timedelta, datetime, timezone
-from typing import Optional, Sequence, List
+from typing import Iterator, Optional, Sequence, List, Tuple
+from weakref import WeakKeyDictionary
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy import desc, or_, and_, func, text, tuple_
 
+from app.config import settings
+from app.models.channel import Channel
+from app.models.company import Company
 from app.models.payment import Payment
+from app.repositories.query_helpers import (
+    CURSOR_NEXT,
+    CURSOR_PREV,
+    TTLCache,
+    decode_cursor,
+    encode_cursor,
+    fts5_match_query,
+    prefix_match,
+    search_terms,
+)
 
 
 def create(db: Session, payment: Payment) -> Payment:
@@ -29,29 +43,32 @@ def create(db: Session, payment: Payment) -> Payment:
     return payment
 
 
-def find_most_recent_matching(
+def get_candidate_window(
     db: Session,
     company_id: int,
     currency: str,
-    payer_phone: Optional[str] = None,
     max_age_minutes: Optional[int] = None,
-) -> Optional[Payment]:
-    """Return the most-recent Payment candidate matching the criteria.
+    limit: int = 200,
+    payer_phone_suffix: Optional[str] = None,
+) -> List[Payment]:
+    """Return the matchable payments of a company, newest first.
 
-    The query filters payments for the `company_id` and `currency` and
-    limits to payments with status in `['new','pending_confirmation']`.
-    Optionally narrows by `payer_phone` and by an age window given by
-    `max_age_minutes` (relative to now).
+    Loads the whole candidate window (status in `['new','pending_confirmation']`,
+    same currency, optionally bounded by age) in one query so that the
+    matching engine can score it in memory.
 
     Args:
         db: SQLAlchemy Session.
         company_id: Company id to scope results.
         currency: Currency code to match.
-        payer_phone: Optional phone to further filter.
         max_age_minutes: Optional integer to limit candidate age (minutes).
+        limit: Upper bound on the window size.
+        payer_phone_suffix: Optional trailing digits of the payer phone; only
+            payments whose `payer_phone` ends with them are loaded, so other
+            payers cannot fill the window.
 
     Returns:
-        The most-recent matching Payment or None.
+        A list of candidate Payments (possibly empty).
     """
     query = db.query(Payment).filter(
         Payment.company_id == company_id,
@@ -59,15 +76,158 @@ def find_most_recent_matching(
         Payment.status.in_(["new", "pending_confirmation"]),
     )
 
-    if payer_phone:
-        query = query.filter(Payment.payer_phone == payer_phone)
-
     if max_age_minutes is not None:
         cutoff = datetime.now(timezone.utc) - timedelta(minutes=int(max_age_minutes))
         query = query.filter(Payment.created_at >= cutoff)
 
-    payment = query.order_by(desc(Payment.created_at)).first()
-    return payment
+    if payer_phone_suffix:
+        query = query.filter(Payment.payer_phone.like(f"%{payer_phone_suffix}"))
+
+    return query.order_by(desc(Payment.created_at)).limit(limit).all()
+
+
+def find_check_candidate(
+    db: Session,
+    company_id: int,
+    created_after: datetime,
+    amount: Optional[int] = None,
+    txn_id: Optional[str] = None,
+    payer_phone: Optional[str] = None,
+    order_id: Optional[str] = None,
+) -> Optional[Payment]:
+    """Return the newest `new` Payment candidate for a `/payments/check` probe.
+
+    A `pending_confirmation` payment already claimed for `order_id` also
+    qualifies, so a merchant re-polling the same order gets its payment back.
+
+    With `amount`, only payments of that amount qualify: the probe is a seek
+    on the `(company_id, amount, created_at)` index. Without it, the newest
+    candidate of any amount is returned (the caller uses it for the
+    amount_mismatch hint and compares the amount).
+
+    Args:
+        db: SQLAlchemy Session.
+        company_id: Company id to scope results.
+        created_after: Lower bound for `created_at` (age window cutoff).
+        amount: Optional exact amount to match.
+        txn_id: Optional provider transaction id to match.
+        payer_phone: Optional payer phone to match.
+        order_id: Optional order whose own pending claim qualifies again.
+
+    Returns:
+        The best matching Payment or None.
+    """
+    # `new` payments, like the hot-path claim: a pending payment belongs to
+    # another order until its token expires, and expired ones are final
+    claimable = Payment.status == "new"
+    if order_id is not None:
+        # ... except this order's own claim, so a retried check is idempotent
+        claimable = or_(
+            claimable,
+            and_(Payment.status == "pending_confirmation", Payment.order_id == order_id),
+        )
+    query = db.query(Payment).filter(
+        Payment.company_id == company_id,
+        Payment.created_at >= created_after,
+        claimable,
+    )
+
+    if amount is not None:
+        query = query.filter(Payment.amount == amount)
+    if txn_id is not None:
+        query = query.filter(Payment.txn_id == txn_id)
+    if payer_phone:
+        query = query.filter(Payment.payer_phone == payer_phone)
+
+    return query.order_by(desc(Payment.created_at)).first()
+
+
+def claim_for_confirmation(
+    db: Session,
+    payment_id: int,
+    company_id: int,
+    amount: int,
+    order_id: str,
+    confirm_token: str,
+    confirm_expires_at: Optional[datetime] = None,
+    txn_id: Optional[str] = None,
+) -> bool:
+    """Atomically move a `new` payment to `pending_confirmation`.
+
+    The UPDATE only applies while the row still belongs to `company_id`, has
+    the expected `amount` (and `txn_id`, when given) and is still `new`, so two
+    concurrent checks can never claim the same payment.
+
+    Returns:
+        True when this call claimed the payment, False otherwise.
+    """
+    query = db.query(Payment).filter(
+        Payment.id == payment_id,
+        Payment.company_id == company_id,
+        Payment.amount == amount,
+        Payment.status == "new",
+    )
+    if txn_id is not None:
+        query = query.filter(Payment.txn_id == txn_id)
+
+    updated = query.update(
+        {
+            "status": "pending_confirmation",
+            "order_id": order_id,
+            "confirm_token": confirm_token,
+            "confirm_expires_at": confirm_expires_at,
+        },
+        synchronize_session=False,
+    )
+    db.commit()
+    return updated == 1
+
+
+def expire_stale_pending(
+    db: Session,
+    now: datetime,
+    token_ttl_minutes: int,
+    revert_window_minutes: int,
+) -> Tuple[int, int]:
+    """Release `pending_confirmation` payments whose confirm token expired.
+
+    Two bulk UPDATEs, both served by the `(status, confirm_expires_at)` index:
+
+    - payments created within `revert_window_minutes` go back to `new` so they
+      can be matched again;
+    - older ones are moved to `expired` and leave the matching working set.
+
+    Rows written before tokens carried an expiry (`confirm_expires_at IS NULL`)
+    are considered expired once `updated_at` is older than `token_ttl_minutes`.
+
+    Returns:
+        A tuple `(reverted, expired)` with the number of rows in each group.
+    """
+    stale = and_(
+        Payment.status == "pending_confirmation",
+        or_(
+            Payment.confirm_expires_at < now,
+            and_(
+                Payment.confirm_expires_at.is_(None),
+                Payment.updated_at < now - timedelta(minutes=token_ttl_minutes),
+            ),
+        ),
+    )
+    released = {"order_id": None, "confirm_token": None, "confirm_expires_at": None}
+
+    revert_cutoff = now - timedelta(minutes=revert_window_minutes)
+    reverted = (
+        db.query(Payment)
+        .filter(stale, Payment.created_at >= revert_cutoff)
+        .update(dict(released, status="new"), synchronize_session=False)
+    )
+    expired = (
+        db.query(Payment)
+        .filter(stale)
+        .update(dict(released, status="expired"), synchronize_session=False)
+    )
+    db.commit()
+    return reverted, expired
 
 
 def get_by_id_for_company(db: Session, company_id: int, payment_id: int) -> Optional[Payment]:
@@ -84,10 +244,53 @@ def get_by_id_for_company(db: Session, company_id: int, payment_id: int) -> Opti
     return db.query(Payment).filter(Payment.id == payment_id, Payment.company_id == company_id).first()
 
 
-def query_payments(
-    db: Session,
-    page: int = 1,
-    page_size: int = 50,
+_sqlite_fts_available: "WeakKeyDictionary" = WeakKeyDictionary()
+
+
+def _has_sqlite_fts(bind) -> bool:
+    """Whether the `payments_fts` FTS5 table exists (checked once per engine)."""
+    engine = getattr(bind, "engine", bind)
+    available = _sqlite_fts_available.get(engine)
+    if available is None:
+        with engine.connect() as conn:
+            available = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'payments_fts'")
+            ).first() is not None
+        _sqlite_fts_available[engine] = available
+    return available
+
+
+def _raw_message_search(q, query: str):
+    """Restrict a Payment query to payments whose raw_message matches `query`.
+
+    Every word must appear. On Postgres this is `to_tsvector('simple', ...)
+    @@ plainto_tsquery('simple', ...)`, served by the GIN expression index
+    `ix_payments_raw_message_fts`. On SQLite it is a MATCH against the FTS5
+    table `payments_fts`. Elsewhere (or without the FTS table) each word is
+    matched with an escaped LIKE.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return q
+    bind = q.session.get_bind()
+    if bind.dialect.name == "postgresql":
+        return q.filter(
+            func.to_tsvector(text("'simple'"), Payment.raw_message).op("@@")(
+                func.plainto_tsquery(text("'simple'"), " ".join(terms))
+            )
+        )
+    if bind.dialect.name == "sqlite" and _has_sqlite_fts(bind):
+        matching = text("SELECT rowid FROM payments_fts WHERE payments_fts MATCH :fts_query").bindparams(
+            fts_query=fts5_match_query(query)
+        )
+        return q.filter(Payment.id.in_(matching))
+    for term in terms:
+        q = q.filter(Payment.raw_message.contains(term, autoescape=True))
+    return q
+
+
+def _apply_payment_filters(
+    q,
     status: Optional[str] = None,
     min_amount: Optional[float] = None,
     max_amount: Optional[float] = None,
@@ -97,13 +300,16 @@ def query_payments(
     channel_id: Optional[int] = None,
     wallet_id: Optional[int] = None,
     txn_id: Optional[str] = None,
+    txn_match: str = "contains",
+    search: Optional[str] = None,
 ):
-    """Query payments with optional filters and pagination.
+    """Apply the admin listing filters to a Payment query.
 
-    Returns a tuple (items, total).
+    `txn_match` selects how `txn_id` is compared: "exact" (equality on the
+    txn_id index), "prefix" (range scan on the same index) or "contains"
+    (substring; served by the pg_trgm GIN index on Postgres). `search` is a
+    full-text search over `raw_message` (see `_raw_message_search`).
     """
-    q = db.query(Payment)
-
     if status is not None:
         q = q.filter(Payment.status == status)
     if min_amount is not None:
@@ -121,15 +327,218 @@ def query_payments(
     if wallet_id is not None:
         q = q.filter(Payment.wallet_id == wallet_id)
     if txn_id is not None and txn_id.strip() != "":
-        q = q.filter(Payment.txn_id.contains(txn_id))
+        if txn_match == "exact":
+            q = q.filter(Payment.txn_id == txn_id)
+        elif txn_match == "prefix":
+            q = q.filter(prefix_match(Payment.txn_id, txn_id))
+        else:
+            q = q.filter(Payment.txn_id.contains(txn_id, autoescape=True))
+    if search is not None and search.strip() != "":
+        q = _raw_message_search(q, search)
+    return q
+
+
+COUNT_EXACT = "exact"
+COUNT_ESTIMATED = "estimated"
+COUNT_CACHED = "cached"
+
+# Totals computed with the "cached" strategy, keyed by engine and filter signature
+_count_cache = TTLCache(ttl_seconds=settings.PAYMENTS_COUNT_CACHE_TTL_SECONDS)
+
+
+def _filter_signature(filters: dict) -> tuple:
+    if not filters.get("txn_id"):
+        # the match mode alone does not filter anything
+        filters = {k: v for k, v in filters.items() if k != "txn_match"}
+    return tuple(
+        sorted(
+            (name, value.isoformat() if isinstance(value, datetime) else value)
+            for name, value in filters.items()
+            if value is not None and value != ""
+        )
+    )
+
+
+def _estimated_payments_count(db: Session) -> Optional[int]:
+    """Row estimate from the Postgres planner statistics, or None if unavailable."""
+    if db.get_bind().dialect.name != "postgresql":
+        return None
+    # A partitioned parent has no statistics of its own: sum its partitions
+    estimate = db.execute(
+        text(
+            "SELECT COALESCE("
+            "(SELECT sum(GREATEST(c.reltuples, 0)) FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid WHERE i.inhparent = to_regclass(:table)), "
+            "(SELECT reltuples FROM pg_class WHERE oid = to_regclass(:table))"
+            ")::bigint"
+        ),
+        {"table": Payment.__tablename__},
+    ).scalar()
+    # reltuples is -1 (or 0 on older servers) until the table was analyzed
+    if estimate is None or estimate <= 0:
+        return None
+    return int(estimate)
+
+
+def _exact_payments_count(db: Session, **filters) -> int:
+    # plain SELECT count(id) ... WHERE ..., no subquery wrapping as with Query.count()
+    return _apply_payment_filters(db.query(func.count(Payment.id)), **filters).scalar() or 0
+
+
+def count_payments(db: Session, strategy: str = COUNT_EXACT, **filters) -> Tuple[int, str]:
+    """Count payments matching the admin listing filters.
+
+    Strategies:
+    - "exact": a `COUNT(*)` with the filters applied.
+    - "estimated": the planner estimate from `pg_class.reltuples`. It is only
+      meaningful for an unfiltered listing on Postgres; filtered queries fall
+      back to "cached" and other databases fall back to "exact".
+    - "cached": an exact count reused for `PAYMENTS_COUNT_CACHE_TTL_SECONDS`
+      per filter signature.
+
+    Returns (total, strategy_used).
+    """
+    signature = _filter_signature(filters)
+
+    if strategy == COUNT_ESTIMATED:
+        if signature:
+            strategy = COUNT_CACHED
+        else:
+            estimate = _estimated_payments_count(db)
+            if estimate is not None:
+                return estimate, COUNT_ESTIMATED
+            strategy = COUNT_EXACT
+
+    if strategy == COUNT_CACHED:
+        key = (id(db.get_bind()), signature)
+        total = _count_cache.get(key)
+        if total is None:
+            total = _exact_payments_count(db, **filters)
+            _count_cache.set(key, total)
+        return total, COUNT_CACHED
+
+    return _exact_payments_count(db, **filters), COUNT_EXACT
+
+
+def _summary_query(db: Session):
+    """Admin listing projection: only the summary columns, with company and
+    channel names joined in the same statement (no per-row lazy loads)."""
+    return (
+        db.query(
+            Payment.id.label("payment_id"),
+            Payment.company_id,
+            Company.name.label("company_name"),
+            Payment.channel_id,
+            Channel.name.label("channel_name"),
+            Payment.wallet_id,
+            Payment.txn_id,
+            Payment.amount,
+            Payment.currency,
+            Payment.status,
+            Payment.payer_phone,
+            Payment.created_at,
+            Payment.used_at,
+        )
+        .outerjoin(Company, Company.id == Payment.company_id)
+        .outerjoin(Channel, Channel.id == Payment.channel_id)
+    )
 
-    total = q.order_by(None).count()
 
-    items = (
-        q.order_by(Payment.created_at.desc())
+def fetch_payments_page(db: Session, page: int = 1, page_size: int = 50, **filters) -> list:
+    """Offset-paginated page of payment summary rows, newest first, without a total.
+
+    Rows expose the columns of `_summary_query` (`payment_id`, `company_name`, ...).
+    """
+    return (
+        _apply_payment_filters(_summary_query(db), **filters)
+        .order_by(Payment.created_at.desc())
         .offset((max(1, page) - 1) * page_size)
         .limit(page_size)
         .all()
     )
 
+
+def iter_payment_summaries(db: Session, batch_size: int = 1000, **filters) -> Iterator:
+    """Yield every matching summary row, newest first, from one query.
+
+    `yield_per` turns on `stream_results`, so Postgres reads through a
+    server-side cursor and only `batch_size` rows are held in memory.
+    """
+    q = (
+        _apply_payment_filters(_summary_query(db), **filters)
+        .order_by(Payment.created_at.desc(), Payment.id.desc())
+        .yield_per(batch_size)
+    )
+    yield from q
+
+
+def query_payments(
+    db: Session,
+    page: int = 1,
+    page_size: int = 50,
+    **filters,
+):
+    """Query payments with optional filters and pagination.
+
+    Filters are the keyword arguments of `_apply_payment_filters`.
+    Returns a tuple (items, total) using an exact count.
+    """
+    items = fetch_payments_page(db, page=page, page_size=page_size, **filters)
+    total, _ = count_payments(db, COUNT_EXACT, **filters)
     return items, total
+
+
+def query_payments_keyset(
+    db: Session,
+    page_size: int = 50,
+    cursor: Optional[str] = None,
+    **filters,
+):
+    """Keyset-paginated variant of `fetch_payments_page` (same summary rows).
+
+    Rows are ordered by `(created_at, id)` descending and a page starts right
+    after (or, for a `prev` cursor, right before) the row encoded in `cursor`,
+    so every page is an index range scan of `page_size + 1` rows on
+    `ix_payments_created_at_id` regardless of depth. No total is computed;
+    see `count_payments`.
+
+    Returns a tuple (items, next_cursor, prev_cursor); a cursor is `None`
+    when there is no page in that direction.
+
+    Raises:
+        ValueError: if `cursor` is malformed.
+    """
+    q = _apply_payment_filters(_summary_query(db), **filters)
+
+    key = tuple_(Payment.created_at, Payment.id)
+    direction = CURSOR_NEXT
+    if cursor:
+        created_at, row_id, direction = decode_cursor(cursor)
+        if direction == CURSOR_PREV:
+            q = q.filter(key > tuple_(created_at, row_id))
+        else:
+            q = q.filter(key < tuple_(created_at, row_id))
+
+    if direction == CURSOR_PREV:
+        q = q.order_by(Payment.created_at.asc(), Payment.id.asc())
+    else:
+        q = q.order_by(Payment.created_at.desc(), Payment.id.desc())
+
+    rows = q.limit(page_size + 1).all()
+    has_more = len(rows) > page_size
+    items = rows[:page_size]
+    if direction == CURSOR_PREV:
+        items.reverse()
+
+    if not items:
+        return items, None, None
+
+    first, last = items[0], items[-1]
+    if direction == CURSOR_PREV:
+        has_next, has_prev = True, has_more
+    else:
+        has_next, has_prev = has_more, cursor is not None
+
+    next_cursor = encode_cursor(last.created_at, last.payment_id, CURSOR_NEXT) if has_next else None
+    prev_cursor = encode_cursor(first.created_at, first.payment_id, CURSOR_PREV) if has_prev else None
+    return items, next_cursor, prev_cursor
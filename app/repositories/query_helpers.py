@@ -0,0 +1,130 @@
+"""Small helpers shared by repository queries.
+
+Cursors used for keyset pagination are opaque to clients: they are the
+urlsafe-base64 encoding of a JSON object holding the sort key of a boundary
+row and the direction to page in.
+"""
+import base64
+from datetime import datetime
+import json
+import re
+import threading
+import time
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from sqlalchemy import and_
+
+from app.db.sql_functions import binary_collation
+
+CURSOR_NEXT = "next"
+CURSOR_PREV = "prev"
+
+
+def encode_cursor(created_at: datetime, row_id: int, direction: str = CURSOR_NEXT) -> str:
+    """Encode a `(created_at, id)` sort key and a paging direction."""
+    payload = {"c": created_at.isoformat(), "i": int(row_id), "d": direction}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int, str]:
+    """Decode a cursor produced by `encode_cursor`.
+
+    Raises:
+        ValueError: if the cursor is malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        created_at = datetime.fromisoformat(payload["c"])
+        row_id = int(payload["i"])
+        direction = payload.get("d", CURSOR_NEXT)
+    except (ValueError, KeyError, TypeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+    if direction not in (CURSOR_NEXT, CURSOR_PREV):
+        raise ValueError("Invalid cursor")
+    return created_at, row_id, direction
+
+
+def prefix_upper_bound(prefix: str) -> Optional[str]:
+    """Smallest string that sorts after every string starting with `prefix`.
+
+    Returns None when no such bound exists (empty prefix, or only U+10FFFF).
+    """
+    trimmed = prefix.rstrip(chr(0x10FFFF))
+    if not trimmed:
+        return None
+    return trimmed[:-1] + chr(ord(trimmed[-1]) + 1)
+
+
+def prefix_match(column, prefix: str):
+    """Index-friendly "starts with" predicate.
+
+    `LIKE 'x%'` only uses a b-tree index under the C collation on Postgres
+    (and not at all on SQLite with its default case-insensitive LIKE), so the
+    prefix is also expressed as the range `[prefix, upper_bound)` which a
+    b-tree index on `column` can serve. The range is only correct in code
+    point order, so both predicates compare `binary_collation(column)`; on
+    Postgres the index must be declared on `column COLLATE "C"`. The LIKE is
+    kept as an exact filter.
+    """
+    collated = binary_collation(column)
+    clauses = [collated >= prefix, collated.startswith(prefix, autoescape=True)]
+    upper = prefix_upper_bound(prefix)
+    if upper is not None:
+        clauses.append(collated < upper)
+    return and_(*clauses)
+
+
+_SEARCH_TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def search_terms(query: str) -> List[str]:
+    """Split free text into the word tokens used for full-text search."""
+    return _SEARCH_TERM_RE.findall(query or "")
+
+
+def fts5_match_query(query: str) -> Optional[str]:
+    """Build an SQLite FTS5 MATCH expression requiring every word of `query`.
+
+    Each word is quoted as an FTS5 string so user input can never be parsed
+    as query syntax (AND/OR/NEAR, column filters, `*`). Returns None when the
+    query has no words.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return None
+    return " ".join('"%s"' % term for term in terms)
+
+
+class TTLCache:
+    """Thread-safe in-process cache whose entries expire after `ttl_seconds`."""
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 1024) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+            if len(self._entries) >= self.max_entries:
+                # oldest insertion goes first
+                del self._entries[next(iter(self._entries))]
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,243 @@
+"""Repository for pre-aggregated payment statistics.
+
+`payment_rollups_hourly` holds one row per (company, channel, wallet, hour,
+status). `refresh_hourly_rollups` is run periodically (see
+`services.maintenance`) and rebuilds every hour bucket that contains a payment
+created or updated since its previous run. `query_stats` serves dashboards
+from the rollup and can merge in live aggregates for the buckets the job has
+not caught up with yet.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, insert, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.db.sql_functions import hour_bucket
+from app.models.payment import Payment
+from app.models.payment_rollup import PaymentRollupHourly, RollupWatermark
+
+HOURLY_ROLLUP = "payments_hourly"
+HOUR = timedelta(hours=1)
+# Re-scan slightly before the watermark so rows committed while the previous
+# run was in progress (or stamped by a skewed DB clock) are not missed.
+WATERMARK_OVERLAP = timedelta(minutes=2)
+
+
+def _as_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        # SQLite returns naive timestamps; they are stored as UTC
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def floor_hour(value: datetime) -> datetime:
+    return _as_utc(value).replace(minute=0, second=0, microsecond=0)
+
+
+def _payment_filters(
+    q,
+    company_id: Optional[int] = None,
+    channel_id: Optional[int] = None,
+    wallet_id: Optional[int] = None,
+    status: Optional[str] = None,
+):
+    if company_id is not None:
+        q = q.filter(Payment.company_id == company_id)
+    if channel_id is not None:
+        q = q.filter(Payment.channel_id == channel_id)
+    if wallet_id is not None:
+        q = q.filter(Payment.wallet_id == wallet_id)
+    if status is not None:
+        q = q.filter(Payment.status == status)
+    return q
+
+
+def get_watermark(db: Session, name: str = HOURLY_ROLLUP) -> Optional[datetime]:
+    state = db.get(RollupWatermark, name)
+    if state is None or state.watermark is None:
+        return None
+    return _as_utc(state.watermark)
+
+
+def _locked_watermark(db: Session, name: str) -> RollupWatermark:
+    """The watermark row of `name`, locked until the caller commits."""
+    state = db.query(RollupWatermark).filter(RollupWatermark.name == name).with_for_update().first()
+    if state is not None:
+        return state
+    # Seeded by the migration; databases built with create_all (tests,
+    # development) get the row on the first run. FOR UPDATE cannot lock a
+    # row that does not exist yet, so create and commit it first.
+    try:
+        db.add(RollupWatermark(name=name, watermark=None))
+        db.commit()
+    except IntegrityError:
+        # another process created it meanwhile
+        db.rollback()
+    return db.query(RollupWatermark).filter(RollupWatermark.name == name).with_for_update().one()
+
+
+def refresh_hourly_rollups(db: Session, now: Optional[datetime] = None) -> int:
+    """Rebuild the hourly buckets touched since the previous run and commit.
+
+    The touched buckets are found with one GROUP BY query, and rebuilt with
+    one DELETE and one INSERT ... SELECT ... GROUP BY. On the very first run
+    every bucket is built. Returns the number of buckets rebuilt.
+    """
+    now = _as_utc(now or datetime.now(timezone.utc))
+    state = _locked_watermark(db, HOURLY_ROLLUP)
+
+    bucket_col = hour_bucket(Payment.created_at)
+    touched = db.query(bucket_col).filter(Payment.created_at.isnot(None))
+    if state.watermark is not None:
+        since = _as_utc(state.watermark) - WATERMARK_OVERLAP
+        touched = touched.filter(or_(Payment.updated_at >= since, Payment.created_at >= since))
+    buckets = [_as_utc(bucket) for (bucket,) in touched.group_by(bucket_col)]
+
+    rebuild = db.query(Payment).filter(Payment.created_at.isnot(None))
+    stale_rollups = db.query(PaymentRollupHourly)
+    if state.watermark is not None and buckets:
+        # the range lets the created_at index narrow the scan first
+        rebuild = rebuild.filter(
+            Payment.created_at >= min(buckets),
+            Payment.created_at < max(buckets) + HOUR,
+            bucket_col.in_(buckets),
+        )
+        stale_rollups = stale_rollups.filter(PaymentRollupHourly.bucket.in_(buckets))
+
+    if buckets:
+        stale_rollups.delete(synchronize_session=False)
+        group_cols = (Payment.company_id, Payment.channel_id, Payment.wallet_id, bucket_col, Payment.status)
+        rows = rebuild.with_entities(
+            *group_cols,
+            func.count(Payment.id),
+            func.coalesce(func.sum(Payment.amount), 0),
+        ).group_by(*group_cols)
+        db.execute(
+            insert(PaymentRollupHourly).from_select(
+                ["company_id", "channel_id", "wallet_id", "bucket", "status", "count", "sum_amount"],
+                rows.statement,
+            )
+        )
+
+    state.watermark = now
+    db.commit()
+    return len(buckets)
+
+
+def _live_buckets(
+    db: Session,
+    start: Optional[datetime],
+    end: datetime,
+    **filters,
+) -> Dict[Tuple[datetime, str], List[int]]:
+    """Aggregate payments per hour and status straight from `payments` (one query).
+
+    Without `start` every bucket before `end` is aggregated.
+    """
+    bucket_col = hour_bucket(Payment.created_at)
+    q = _payment_filters(
+        db.query(bucket_col, Payment.status, func.count(Payment.id), func.coalesce(func.sum(Payment.amount), 0)),
+        **filters,
+    )
+    # whole hour buckets: every bucket starting before `end` is included
+    until = floor_hour(end)
+    if until < _as_utc(end):
+        until += HOUR
+    q = q.filter(Payment.created_at.isnot(None), Payment.created_at < until)
+    if start is not None:
+        q = q.filter(Payment.created_at >= floor_hour(start))
+    return {
+        (_as_utc(bucket), status): [count, int(total or 0)]
+        for bucket, status, count, total in q.group_by(bucket_col, Payment.status)
+    }
+
+
+def query_stats(
+    db: Session,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    company_id: Optional[int] = None,
+    channel_id: Optional[int] = None,
+    wallet_id: Optional[int] = None,
+    status: Optional[str] = None,
+    granularity: str = "hour",
+    live: bool = True,
+    now: Optional[datetime] = None,
+):
+    """Payment counts and amount sums per bucket and status.
+
+    Bounds are applied at hour granularity. With `live=True` the buckets from
+    the hour containing the rollup watermark onwards are computed from
+    `payments` instead of the rollup, so the current partial hour is included;
+    before the first rollup run every bucket is computed that way.
+
+    Returns (items, watermark, live_merged) where items are dicts with
+    `bucket`, `status`, `count` and `sum_amount`, ordered by bucket.
+    """
+    now = _as_utc(now or datetime.now(timezone.utc))
+    watermark = get_watermark(db)
+    # no rollup yet: everything comes from `payments`
+    all_live = live and watermark is None
+    live_from = floor_hour(watermark) if live and watermark is not None else None
+
+    q = db.query(
+        PaymentRollupHourly.bucket,
+        PaymentRollupHourly.status,
+        func.sum(PaymentRollupHourly.count),
+        func.sum(PaymentRollupHourly.sum_amount),
+    )
+    if company_id is not None:
+        q = q.filter(PaymentRollupHourly.company_id == company_id)
+    if channel_id is not None:
+        q = q.filter(PaymentRollupHourly.channel_id == channel_id)
+    if wallet_id is not None:
+        q = q.filter(PaymentRollupHourly.wallet_id == wallet_id)
+    if status is not None:
+        q = q.filter(PaymentRollupHourly.status == status)
+    if created_from is not None:
+        q = q.filter(PaymentRollupHourly.bucket >= floor_hour(created_from))
+    if created_to is not None:
+        q = q.filter(PaymentRollupHourly.bucket <= _as_utc(created_to))
+    if live_from is not None:
+        q = q.filter(PaymentRollupHourly.bucket < live_from)
+    q = q.group_by(PaymentRollupHourly.bucket, PaymentRollupHourly.status)
+
+    merged: Dict[Tuple[datetime, str], List[int]] = {}
+    if not all_live:
+        merged = {
+            (_as_utc(bucket), row_status): [int(count or 0), int(total or 0)]
+            for bucket, row_status, count, total in q.all()
+        }
+
+    if live_from is not None or all_live:
+        start = created_from
+        if live_from is not None:
+            start = max(live_from, floor_hour(created_from)) if created_from is not None else live_from
+        end = min(now, _as_utc(created_to) + HOUR) if created_to is not None else now
+        merged.update(
+            _live_buckets(
+                db,
+                start,
+                end,
+                company_id=company_id,
+                channel_id=channel_id,
+                wallet_id=wallet_id,
+                status=status,
+            )
+        )
+
+    if granularity == "day":
+        by_day: Dict[Tuple[datetime, str], List[int]] = {}
+        for (bucket, row_status), (count, total) in merged.items():
+            acc = by_day.setdefault((bucket.replace(hour=0), row_status), [0, 0])
+            acc[0] += count
+            acc[1] += total
+        merged = by_day
+
+    items = [
+        {"bucket": bucket, "status": row_status, "count": count, "sum_amount": total}
+        for (bucket, row_status), (count, total) in sorted(merged.items())
+    ]
+    return items, watermark, live_from is not None or all_live
@@ -4,10 +4,13 @@
 This module centralizes queries for the `Wallet` entity used by
 `wallet_service`.
 """
-from typing import Optional, List
-from sqlalchemy.orm import Session
-from sqlalchemy import asc
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Optional, List
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import Row, asc, case, func, or_, select, update
 
+from app.models.channel import Channel
+from app.models.payment import Payment
 from app.models.wallet import Wallet
 
 
@@ -38,3 +41,153 @@ def get_company_channel_active_wallets(db: Session, company_id: int, channel_id:
     if hasattr(q, "order_by"):
         q = q.order_by(asc(Wallet.id))
     return q.all()
+
+
+def get_wallets_for_admin(
+    db: Session,
+    wallet_ids: Optional[Iterable[int]] = None,
+    company_id: Optional[int] = None,
+) -> List[Wallet]:
+    """Return wallets ordered by id with their channel and provider joined in.
+
+    Filters on `wallet_ids` and/or `company_id`. Rows already in the session
+    are refreshed, so this doubles as the re-read after a bulk write.
+    """
+    q = db.query(Wallet).options(joinedload(Wallet.channel).joinedload(Channel.provider))
+    if wallet_ids is not None:
+        q = q.filter(Wallet.id.in_(list(wallet_ids)))
+    if company_id is not None:
+        q = q.filter(Wallet.company_id == company_id)
+    return q.order_by(Wallet.id.asc()).populate_existing().all()
+
+
+def upsert_company_wallets(
+    db: Session,
+    company_id: int,
+    items: List[Dict[str, Any]],
+    defaults: Optional[Dict[str, Any]] = None,
+) -> List[int]:
+    """Insert or update a company's wallets keyed by `wallet_identifier`.
+
+    Each item holds only the fields the client sent. Existing wallets with a
+    matching identifier get exactly those fields, so an omitted `is_active`
+    never reactivates a deactivated wallet; the others are created with
+    `defaults` filling the missing fields. Loads the existing rows in one
+    query and flushes once; the caller owns the transaction. Returns the ids
+    of the affected wallets.
+    """
+    defaults = defaults or {}
+    identifiers = [item["wallet_identifier"] for item in items]
+    existing: Dict[str, List[Wallet]] = {}
+    for wallet in (
+        db.query(Wallet)
+        .filter(Wallet.company_id == company_id, Wallet.wallet_identifier.in_(identifiers))
+        .all()
+    ):
+        existing.setdefault(wallet.wallet_identifier, []).append(wallet)
+
+    affected: List[Wallet] = []
+    for item in items:
+        matches = existing.get(item["wallet_identifier"])
+        if matches:
+            for wallet in matches:
+                for field, value in item.items():
+                    setattr(wallet, field, value)
+            affected.extend(matches)
+        else:
+            wallet = Wallet(company_id=company_id, **{**defaults, **item})
+            db.add(wallet)
+            affected.append(wallet)
+    db.flush()
+    return [wallet.id for wallet in affected]
+
+
+def set_wallets_active(db: Session, wallet_ids: Iterable[int], is_active: bool) -> int:
+    """Set `is_active` on the given wallets with one UPDATE; returns the row count.
+
+    The caller owns the transaction.
+    """
+    result = db.execute(
+        update(Wallet)
+        .where(Wallet.id.in_(list(wallet_ids)))
+        .values(is_active=is_active)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+# How far back `last_payment_at` looks for a wallet's latest payment
+LAST_PAYMENT_LOOKBACK = timedelta(days=30)
+
+
+def wallet_day(now: Optional[datetime] = None) -> date:
+    """The day `used_today` counts against: the current UTC day.
+
+    Daily counters, their reset and the per-day payment aggregates all use
+    this boundary, whatever the server's local time zone.
+    """
+    now = now or datetime.now(timezone.utc)
+    if now.tzinfo is not None:
+        now = now.astimezone(timezone.utc)
+    return now.date()
+
+
+def get_company_wallet_utilization(
+    db: Session,
+    company_id: int,
+    day_start: datetime,
+    today: Optional[date] = None,
+) -> List[Row]:
+    """Daily usage of every wallet of a company, in one statement.
+
+    Each row has the wallet columns plus:
+    - `used_today`: the wallet counter, read as 0 when it was last reset
+      before `today` (the same rule as `wallet_service.increment_wallet_usage`).
+    - `payments_today` / `amount_today`: payments on the wallet created since
+      `day_start`, from a grouped subquery.
+    - `last_payment_at`: the wallet's latest payment from
+      `day_start - LAST_PAYMENT_LOOKBACK` up to now, today's included (None
+      when the latest is older).
+
+    Both payment aggregates are served by the `(wallet_id, created_at)`
+    index, and both are bounded in time, so the cost grows with recent
+    payments, not the table (on a partitioned `payments`, only the recent
+    partitions are read).
+    """
+    today = today or wallet_day()
+    todays = (
+        select(
+            Payment.wallet_id.label("wallet_id"),
+            func.count(Payment.id).label("payments_today"),
+            func.coalesce(func.sum(Payment.amount), 0).label("amount_today"),
+        )
+        .where(
+            Payment.wallet_id.in_(select(Wallet.id).where(Wallet.company_id == company_id)),
+            Payment.created_at >= day_start,
+        )
+        .group_by(Payment.wallet_id)
+        .subquery()
+    )
+    last_payment_at = (
+        select(func.max(Payment.created_at))
+        .where(Payment.wallet_id == Wallet.id, Payment.created_at >= day_start - LAST_PAYMENT_LOOKBACK)
+        .scalar_subquery()
+    )
+    stale = or_(Wallet.last_reset_date.is_(None), Wallet.last_reset_date < today)
+    return (
+        db.query(
+            Wallet.id.label("wallet_id"),
+            Wallet.wallet_label,
+            Wallet.wallet_identifier,
+            Wallet.is_active,
+            Wallet.daily_limit,
+            case((stale, 0.0), else_=func.coalesce(Wallet.used_today, 0.0)).label("used_today"),
+            func.coalesce(todays.c.payments_today, 0).label("payments_today"),
+            func.coalesce(todays.c.amount_today, 0).label("amount_today"),
+            last_payment_at.label("last_payment_at"),
+        )
+        .outerjoin(todays, todays.c.wallet_id == Wallet.id)
+        .filter(Wallet.company_id == company_id)
+        .order_by(Wallet.id.asc())
+        .all()
+    )
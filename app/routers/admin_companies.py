@@ -1,20 +1,30 @@
-from typing import List
+import asyncio
+import csv
+import io
+import json
+from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
-from app.db.session import get_db
+from app.config import settings
+from app.core import etag
+from app.db.session import get_admin_db, get_read_db, read_db_for
 from app.models.company import Company
 from app.models.channel import Channel
+from app.repositories import company_repository
 from app.schemas.admin_company import (
     AdminCompanyCreate,
     AdminCompanyOut,
     AdminCompanyListItem,
     AdminChannelOut,
+    AdminCompanyBulkResult,
 )
 from app.services.admin_company_service import AdminCompanyService
 from app.services.admin_onboarding_service import AdminOnboardingService
-from app.schemas.admin_onboarding import AdminOnboardingGenerateResponse
+from app.schemas.admin_onboarding import AdminOnboardingGenerateResponse, AdminOnboardingJobOut
+from app.services.onboarding_jobs import onboarding_jobs
 from pathlib import Path
 
 
@@ -23,8 +33,14 @@ router = APIRouter(
     tags=["admin-companies"],
 )
 
+BULK_MAX_ROWS = 5000
+
 
 def _company_to_admin_out(company: Company) -> AdminCompanyOut:
+    """Build the admin DTO from a company loaded by `get_company_aggregate`.
+
+    Only eagerly loaded attributes are read, so no further queries are issued.
+    """
     channels_out: List[AdminChannelOut] = []
     for ch in company.channels:
         provider_code = ch.provider.code if ch.provider is not None else None
@@ -75,39 +91,117 @@ def _company_to_admin_out(company: Company) -> AdminCompanyOut:
 @router.post("/", response_model=AdminCompanyOut, status_code=status.HTTP_201_CREATED)
 def create_company(
     data: AdminCompanyCreate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_admin_db),
 ):
     company = AdminCompanyService.create_company_with_channels(db, data)
     # Provision onboarding artifacts (default channel + wallet) for convenience.
     # Keep this router-level so unit tests calling the service directly are unaffected.
     company = AdminCompanyService.provision_onboarding(db, company)
-    db.refresh(company)
-    return _company_to_admin_out(company)
+    etag.bump(etag.COMPANIES, etag.company_wallets(company.id))
+    return _company_to_admin_out(company_repository.get_company_aggregate(db, company.id))
 
 
-@router.get("/", response_model=List[AdminCompanyListItem])
-def list_companies(db: Session = Depends(get_db)):
-    companies = db.query(Company).order_by(Company.id.asc()).all()
-    return [
-        AdminCompanyListItem(
-            id=c.id,
-            name=c.name,
-            country_code=c.country_code,
-            is_active=c.is_active,
+def _parse_bulk_rows(content_type: str, body: bytes) -> List[Dict[str, Any]]:
+    """Decode a bulk import body (JSON or CSV) into one dict per company.
+
+    JSON is a list of `AdminCompanyCreate` objects, or `{"companies": [...]}`.
+    CSV has a header row with the same field names; `provider_codes` holds
+    codes separated by `;` or `|`.
+    """
+    text = body.decode("utf-8-sig")
+    if "csv" in content_type:
+        rows: List[Dict[str, Any]] = []
+        for record in csv.DictReader(io.StringIO(text)):
+            row: Dict[str, Any] = {k.strip(): (v.strip() if v is not None else None) for k, v in record.items() if k}
+            for key, value in list(row.items()):
+                if value == "":
+                    row[key] = None
+            codes = (row.get("provider_codes") or "").replace("|", ";")
+            row["provider_codes"] = [c.strip() for c in codes.split(";") if c.strip()]
+            rows.append(row)
+        return rows
+    payload = json.loads(text)
+    if isinstance(payload, dict):
+        payload = payload.get("companies")
+    if not isinstance(payload, list):
+        raise ValueError("Expected a JSON list of companies")
+    return payload
+
+
+@router.post("/bulk", response_model=AdminCompanyBulkResult)
+async def bulk_create_companies(request: Request, db: Session = Depends(get_admin_db)):
+    """
+    Onboard many companies in one request.
+
+    Accepts `application/json` or `text/csv` (see `_parse_bulk_rows`). Every
+    company gets its channels and default wallet as with `POST /`; rows are
+    inserted in chunked transactions and reported individually, so a bad row
+    does not fail the whole import.
+    """
+    content_type = request.headers.get("content-type", "application/json").lower()
+    try:
+        rows = _parse_bulk_rows(content_type, await request.body())
+    except (ValueError, UnicodeDecodeError, csv.Error) as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid bulk payload: {exc}")
+    if len(rows) > BULK_MAX_ROWS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {BULK_MAX_ROWS} companies per request",
         )
-        for c in companies
-    ]
+
+    results = await run_in_threadpool(AdminCompanyService.bulk_create_companies, db, rows)
+    created_ids = [r["company_id"] for r in results if r["status"] == "created"]
+    if created_ids:
+        etag.bump(etag.COMPANIES, *(etag.company_wallets(company_id) for company_id in created_ids))
+    return AdminCompanyBulkResult(
+        total=len(results),
+        created=len(created_ids),
+        failed=len(results) - len(created_ids),
+        results=results,
+    )
+
+
+@router.get("/", response_model=List[AdminCompanyListItem])
+def list_companies(
+    request: Request,
+    response: Response,
+    db: Session = Depends(read_db_for(etag.COMPANIES)),
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[int] = Query(None, ge=0),
+    name: Optional[str] = Query(None),
+    is_active: Optional[bool] = Query(None),
+    country_code: Optional[str] = Query(None),
+):
+    """
+    List companies in id order, one page at a time.
+
+    The body stays a plain list; when more companies follow, the id to pass
+    as `cursor` for the next page is returned in the `X-Next-Cursor` header.
+    """
+    not_modified = etag.conditional_get(request, response, etag.COMPANIES)
+    if not_modified is not None:
+        return not_modified
+    rows, next_cursor = company_repository.list_companies(
+        db,
+        limit=limit,
+        cursor=cursor,
+        name=name,
+        is_active=is_active,
+        country_code=country_code,
+    )
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = str(next_cursor)
+    return [AdminCompanyListItem(**row._mapping) for row in rows]
 
 
 @router.get("/{company_id}", response_model=AdminCompanyOut)
-def get_company(company_id: int, db: Session = Depends(get_db)):
-    company = db.query(Company).filter(Company.id == company_id).first()
+def get_company(company_id: int, db: Session = Depends(get_read_db)):
+    company = company_repository.get_company_aggregate(db, company_id)
     if not company:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Company not found",
         )
-    _ = company.channels
     return _company_to_admin_out(company)
 
 
@@ -115,7 +209,7 @@ def get_company(company_id: int, db: Session = Depends(get_db)):
 def update_company(
     company_id: int,
     data: AdminCompanyCreate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_admin_db),
 ):
     """
     Update an existing company and its channels based on AdminCompanyCreate payload.
@@ -129,15 +223,14 @@ def update_company(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Company not found",
         )
-    # ensure relationships are loaded
-    _ = company.channels
-    return _company_to_admin_out(company)
+    etag.bump(etag.COMPANIES, etag.company_wallets(company.id))
+    return _company_to_admin_out(company_repository.get_company_aggregate(db, company.id))
 
 
 @router.post("/{company_id}/toggle", response_model=AdminCompanyOut)
 def toggle_company_active(
     company_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_admin_db),
 ):
     """
     Flip the is_active flag for the given company.
@@ -148,16 +241,44 @@ def toggle_company_active(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Company not found",
         )
-    # ensure channels are loaded
-    _ = company.channels
-    return _company_to_admin_out(company)
+    etag.bump(etag.COMPANIES)
+    return _company_to_admin_out(company_repository.get_company_aggregate(db, company.id))
 
 
+@router.post(
+    "/{company_id}/onboarding-jobs",
+    response_model=AdminOnboardingJobOut,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+def enqueue_onboarding_job(
+    company_id: int,
+    response: Response,
+    db: Session = Depends(get_admin_db),
+):
+    """
+    Queue the onboarding HTML/PDF for rendering and return the job at once.
+    Poll `GET /admin/onboarding-jobs/{job_id}` for its status and URLs.
+    """
+    job = AdminOnboardingService.enqueue_company_onboarding(db, company_id)
+    response.headers["Location"] = f"/admin/onboarding-jobs/{job.id}"
+    return AdminOnboardingService.job_to_out(job)
 
 
 @router.post("/{company_id}/onboarding-pdf", response_model=AdminOnboardingGenerateResponse)
-def generate_onboarding_pdf(
+async def generate_onboarding_pdf(
     company_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_admin_db),
 ):
-    return AdminOnboardingService.generate_company_onboarding_pdf(db, company_id)
+    """
+    Synchronous variant kept for existing clients: queues a job and waits for
+    it without holding a threadpool slot while the document renders.
+    """
+    job = await run_in_threadpool(AdminOnboardingService.enqueue_company_onboarding, db, company_id)
+    try:
+        job = await onboarding_jobs.wait_async(job, timeout=settings.ONBOARDING_JOB_WAIT_SECONDS)
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail=f"Onboarding job {job.id} is still running; poll /admin/onboarding-jobs/{job.id}",
+        )
+    return AdminOnboardingService.job_to_generate_response(job)
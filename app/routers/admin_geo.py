@@ -1,9 +1,10 @@
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
 
-from app.db.session import get_db
+from app.core import etag
+from app.db.session import get_admin_db, read_db_for
 from app.schemas.admin_geo import (
     AdminCountryOut,
     AdminPaymentProviderOut,
@@ -20,17 +21,35 @@ router = APIRouter(
 
 
 @router.get("/countries", response_model=List[AdminCountryOut])
-def list_countries(db: Session = Depends(get_db)):
+def list_countries(request: Request, response: Response, db: Session = Depends(read_db_for(etag.COUNTRIES))):
+    not_modified = etag.conditional_get(request, response, etag.COUNTRIES)
+    if not_modified is not None:
+        return not_modified
     return AdminGeoService.list_countries(db)
 
 
 @router.get("/providers", response_model=List[AdminPaymentProviderOut])
-def list_payment_providers(db: Session = Depends(get_db)):
+def list_payment_providers(
+    request: Request,
+    response: Response,
+    db: Session = Depends(read_db_for(etag.PAYMENT_PROVIDERS)),
+):
+    not_modified = etag.conditional_get(request, response, etag.PAYMENT_PROVIDERS)
+    if not_modified is not None:
+        return not_modified
     return AdminGeoService.list_payment_providers(db)
 
 
 @router.get("/countries/{country_code}/providers", response_model=AdminCountryWithProviders)
-def get_country_with_providers(country_code: str, db: Session = Depends(get_db)):
+def get_country_with_providers(
+    country_code: str,
+    request: Request,
+    response: Response,
+    db: Session = Depends(read_db_for(etag.COUNTRIES, etag.PAYMENT_PROVIDERS)),
+):
+    not_modified = etag.conditional_get(request, response, etag.COUNTRIES, etag.PAYMENT_PROVIDERS)
+    if not_modified is not None:
+        return not_modified
     result = AdminGeoService.get_country_with_providers(db, country_code=country_code)
     if result is None:
         raise HTTPException(
@@ -42,6 +61,7 @@ def get_country_with_providers(country_code: str, db: Session = Depends(get_db))
 
 
 @router.post("/countries", response_model=AdminCountryOut, status_code=201)
-def create_country(payload: AdminCountryCreate, db: Session = Depends(get_db)):
+def create_country(payload: AdminCountryCreate, db: Session = Depends(get_admin_db)):
     country = AdminGeoService.create_country(db, payload)
+    etag.bump(etag.COUNTRIES)
     return AdminCountryOut.model_validate(country)
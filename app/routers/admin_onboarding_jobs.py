@@ -0,0 +1,21 @@
+from fastapi import APIRouter
+
+from app.schemas.admin_onboarding import AdminOnboardingJobOut
+from app.services.admin_onboarding_service import AdminOnboardingService
+
+
+router = APIRouter(
+    prefix="/admin/onboarding-jobs",
+    tags=["admin-onboarding"],
+)
+
+
+@router.get("/{job_id}", response_model=AdminOnboardingJobOut)
+def get_onboarding_job(job_id: str):
+    """
+    Status of an onboarding render queued by
+    `POST /admin/companies/{company_id}/onboarding-jobs`; `html_url` and
+    `pdf_url` are set once it succeeded.
+    """
+    job = AdminOnboardingService.get_job(job_id)
+    return AdminOnboardingService.job_to_out(job)
@@ -1,9 +1,10 @@
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
 
-from app.db.session import get_db
+from app.core import etag
+from app.db.session import get_admin_db, read_db_for
 from app.schemas.admin_geo import (
     AdminPaymentProviderOut,
     AdminPaymentProviderCreate,
@@ -18,7 +19,14 @@ router = APIRouter(
 
 
 @router.get("/payment-providers", response_model=List[AdminPaymentProviderOut])
-def list_payment_providers(db: Session = Depends(get_db)):
+def list_payment_providers(
+    request: Request,
+    response: Response,
+    db: Session = Depends(read_db_for(etag.PAYMENT_PROVIDERS)),
+):
+    not_modified = etag.conditional_get(request, response, etag.PAYMENT_PROVIDERS)
+    if not_modified is not None:
+        return not_modified
     try:
         return AdminGeoService.list_payment_providers(db)
     except Exception as exc:
@@ -35,10 +43,11 @@ def list_payment_providers(db: Session = Depends(get_db)):
 )
 def create_payment_provider(
     data: AdminPaymentProviderCreate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_admin_db),
 ):
     try:
         provider = AdminGeoService.create_payment_provider(db, data)
+        etag.bump(etag.PAYMENT_PROVIDERS)
         return AdminPaymentProviderOut.model_validate(provider)
     except HTTPException:
         # re-raise known HTTP exceptions (e.g. 400 on duplicate code)
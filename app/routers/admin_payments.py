@@ -1,13 +1,21 @@
-from typing import Optional
+import csv
+import io
+import json
+from typing import Any, Dict, Iterable, Iterator, Literal, Optional
 from datetime import datetime
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
-from app.db.session import get_db
-from app.repositories.payment_repository import query_payments
+from app.db.session import get_read_db
+from app.repositories.payment_repository import (
+    count_payments,
+    fetch_payments_page,
+    iter_payment_summaries,
+    query_payments_keyset,
+)
 from app.schemas.admin_payment import PaginatedPaymentsResponse, PaymentAdminSummary
-from app.models.payment import Payment
 
 
 router = APIRouter(
@@ -15,12 +23,11 @@ router = APIRouter(
     tags=["admin-payments"],
 )
 
+# Rows fetched per round trip and serialized per streamed chunk by the export
+EXPORT_BATCH_SIZE = 1000
 
-@router.get("/", response_model=PaginatedPaymentsResponse)
-def list_payments(
-    db: Session = Depends(get_db),
-    page: int = Query(1, ge=1),
-    page_size: int = Query(50, ge=1, le=200),
+
+def payment_filters(
     status: Optional[str] = Query(None),
     min_amount: Optional[float] = Query(None),
     max_amount: Optional[float] = Query(None),
@@ -30,11 +37,11 @@ def list_payments(
     channel_id: Optional[int] = Query(None),
     wallet_id: Optional[int] = Query(None),
     txn_id: Optional[str] = Query(None),
-):
-    items, total = query_payments(
-        db=db,
-        page=page,
-        page_size=page_size,
+    txn_match: Literal["exact", "prefix", "contains"] = Query("contains"),
+    q: Optional[str] = Query(None),
+) -> Dict[str, Any]:
+    """Listing filters shared by the list and export endpoints."""
+    return dict(
         status=status,
         min_amount=min_amount,
         max_amount=max_amount,
@@ -44,26 +51,99 @@ def list_payments(
         channel_id=channel_id,
         wallet_id=wallet_id,
         txn_id=txn_id,
+        txn_match=txn_match,
+        search=q,
     )
 
-    out_items = []
-    for p in items:
-        out_items.append(
-            PaymentAdminSummary(
-                payment_id=p.id,
-                company_id=p.company_id,
-                company_name=getattr(p.company, "name", None),
-                channel_id=p.channel_id,
-                channel_name=getattr(p.channel, "name", None) if getattr(p, "channel", None) is not None else None,
-                wallet_id=p.wallet_id,
-                txn_id=p.txn_id,
-                amount=p.amount,
-                currency=p.currency,
-                status=p.status,
-                payer_phone=p.payer_phone,
-                created_at=p.created_at,
-                used_at=p.used_at,
+
+@router.get("/", response_model=PaginatedPaymentsResponse)
+def list_payments(
+    db: Session = Depends(get_read_db),
+    filters: Dict[str, Any] = Depends(payment_filters),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(50, ge=1, le=200),
+    pagination: Literal["offset", "keyset"] = Query("offset"),
+    cursor: Optional[str] = Query(None),
+    count: Literal["exact", "estimated", "cached"] = Query("exact"),
+):
+    next_cursor = prev_cursor = None
+    # A cursor always implies keyset mode; `page` is ignored there
+    if cursor or pagination == "keyset":
+        try:
+            items, next_cursor, prev_cursor = query_payments_keyset(
+                db=db, page_size=page_size, cursor=cursor, **filters
             )
-        )
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+    else:
+        items = fetch_payments_page(db=db, page=page, page_size=page_size, **filters)
+
+    total, total_strategy = count_payments(db, strategy=count, **filters)
+
+    out_items = [PaymentAdminSummary(**row._mapping) for row in items]
 
-    return PaginatedPaymentsResponse(items=out_items, total=total, page=page, page_size=page_size)
+    return PaginatedPaymentsResponse(
+        items=out_items,
+        total=total,
+        total_strategy=total_strategy,
+        page=page,
+        page_size=page_size,
+        next_cursor=next_cursor,
+        prev_cursor=prev_cursor,
+    )
+
+
+EXPORT_COLUMNS = list(PaymentAdminSummary.model_fields)
+
+
+def _export_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _csv_chunks(rows: Iterable) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for i, row in enumerate(rows, start=1):
+        writer.writerow([_export_value(row._mapping[col]) for col in EXPORT_COLUMNS])
+        if i % EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _ndjson_chunks(rows: Iterable) -> Iterator[str]:
+    lines = []
+    for row in rows:
+        lines.append(json.dumps({col: _export_value(row._mapping[col]) for col in EXPORT_COLUMNS}) + "\n")
+        if len(lines) >= EXPORT_BATCH_SIZE:
+            yield "".join(lines)
+            lines = []
+    if lines:
+        yield "".join(lines)
+
+
+@router.get("/export")
+def export_payments(
+    db: Session = Depends(get_read_db),
+    filters: Dict[str, Any] = Depends(payment_filters),
+    format: Literal["csv", "ndjson"] = Query("csv"),
+):
+    """Stream every payment matching the filters as CSV or NDJSON.
+
+    The rows come from a single query read through a server-side cursor
+    (`iter_payment_summaries`), so memory stays flat however large the export.
+    """
+    rows = iter_payment_summaries(db, batch_size=EXPORT_BATCH_SIZE, **filters)
+    if format == "ndjson":
+        return StreamingResponse(
+            _ndjson_chunks(rows),
+            media_type="application/x-ndjson",
+            headers={"Content-Disposition": 'attachment; filename="payments.ndjson"'},
+        )
+    return StreamingResponse(
+        _csv_chunks(rows),
+        media_type="text/csv",
+        headers={"Content-Disposition": 'attachment; filename="payments.csv"'},
+    )
@@ -0,0 +1,47 @@
+from typing import Literal, Optional
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app.db.session import get_read_db
+from app.repositories.stats_repository import query_stats
+from app.schemas.admin_stats import PaymentStatsResponse
+
+
+router = APIRouter(
+    prefix="/admin/stats",
+    tags=["admin-stats"],
+)
+
+
+@router.get("", response_model=PaymentStatsResponse)
+def payment_stats(
+    db: Session = Depends(get_read_db),
+    created_from: Optional[datetime] = Query(None),
+    created_to: Optional[datetime] = Query(None),
+    company_id: Optional[int] = Query(None),
+    channel_id: Optional[int] = Query(None),
+    wallet_id: Optional[int] = Query(None),
+    status: Optional[str] = Query(None),
+    granularity: Literal["hour", "day"] = Query("hour"),
+    live: bool = Query(True),
+):
+    """Payment counts and amount sums per hour or day, served from the rollup table."""
+    items, watermark, live_merged = query_stats(
+        db,
+        created_from=created_from,
+        created_to=created_to,
+        company_id=company_id,
+        channel_id=channel_id,
+        wallet_id=wallet_id,
+        status=status,
+        granularity=granularity,
+        live=live,
+    )
+    return PaymentStatsResponse(
+        granularity=granularity,
+        items=items,
+        rollup_watermark=watermark,
+        live_merged=live_merged,
+    )
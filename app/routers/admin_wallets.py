@@ -1,16 +1,23 @@
+from datetime import datetime, time, timezone
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
 
-from app.db.session import get_db
+from app.core import etag
+from app.db.session import get_admin_db, get_read_db, read_db_for_company_wallets, unit_of_work
 from app.models.wallet import Wallet
 from app.models.channel import Channel
 from app.models.payment import Payment
+from app.repositories import company_repository, wallet_repository
 from app.schemas.admin_wallets import (
+    AdminWalletBulkStatus,
+    AdminWalletBulkUpsert,
     AdminWalletCreate,
     AdminWalletOut,
     AdminWalletUpdate,
+    AdminWalletUtilization,
+    AdminWalletUtilizationResponse,
 )
 
 
@@ -36,13 +43,49 @@ def _wallet_to_out(w: Wallet) -> AdminWalletOut:
 
 
 @router.get("/companies/{company_id}/wallets", response_model=List[AdminWalletOut])
-def list_company_wallets(company_id: int, db: Session = Depends(get_db)):
-    wallets = db.query(Wallet).filter(Wallet.company_id == company_id).order_by(Wallet.id.asc()).all()
+def list_company_wallets(
+    company_id: int,
+    request: Request,
+    response: Response,
+    db: Session = Depends(read_db_for_company_wallets),
+):
+    not_modified = etag.conditional_get(request, response, etag.company_wallets(company_id))
+    if not_modified is not None:
+        return not_modified
+    wallets = wallet_repository.get_wallets_for_admin(db, company_id=company_id)
     return [_wallet_to_out(w) for w in wallets]
 
 
+@router.get("/companies/{company_id}/wallets/utilization", response_model=AdminWalletUtilizationResponse)
+def company_wallet_utilization(company_id: int, db: Session = Depends(get_read_db)):
+    """
+    Remaining daily capacity and today's activity for each wallet of a company.
+
+    One aggregate query per call, cheap enough for dashboard polling. "Today"
+    for payment counts and `used_today` alike is the current UTC day.
+    """
+    now = datetime.now(timezone.utc)
+    today = wallet_repository.wallet_day(now)
+    day_start = datetime.combine(today, time.min)
+    rows = wallet_repository.get_company_wallet_utilization(db, company_id, day_start=day_start, today=today)
+    # a company without wallets has no rows either: only then look it up
+    if not rows and not company_repository.company_exists(db, company_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Company not found")
+    wallets = []
+    for row in rows:
+        daily_limit = float(row.daily_limit or 0.0)
+        used_today = float(row.used_today or 0.0)
+        wallets.append(
+            AdminWalletUtilization(
+                **{**row._mapping, "daily_limit": daily_limit, "used_today": used_today},
+                remaining=max(daily_limit - used_today, 0.0),
+            )
+        )
+    return AdminWalletUtilizationResponse(company_id=company_id, as_of=now, wallets=wallets)
+
+
 @router.post("/companies/{company_id}/wallets", response_model=AdminWalletOut, status_code=status.HTTP_201_CREATED)
-def create_company_wallet(company_id: int, data: AdminWalletCreate, db: Session = Depends(get_db)):
+def create_company_wallet(company_id: int, data: AdminWalletCreate, db: Session = Depends(get_admin_db)):
     # ensure channel exists and belongs to company
     channel = db.query(Channel).filter(Channel.id == data.channel_id, Channel.company_id == company_id).first()
     if not channel:
@@ -59,11 +102,12 @@ def create_company_wallet(company_id: int, data: AdminWalletCreate, db: Session
     db.add(wallet)
     db.commit()
     db.refresh(wallet)
+    etag.bump(etag.company_wallets(wallet.company_id))
     return _wallet_to_out(wallet)
 
 
 @router.put("/wallets/{wallet_id}", response_model=AdminWalletOut)
-def update_wallet(wallet_id: int, data: AdminWalletUpdate, db: Session = Depends(get_db)):
+def update_wallet(wallet_id: int, data: AdminWalletUpdate, db: Session = Depends(get_admin_db)):
     wallet = db.query(Wallet).filter(Wallet.id == wallet_id).first()
     if not wallet:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Wallet not found")
@@ -80,11 +124,12 @@ def update_wallet(wallet_id: int, data: AdminWalletUpdate, db: Session = Depends
     db.add(wallet)
     db.commit()
     db.refresh(wallet)
+    etag.bump(etag.company_wallets(wallet.company_id))
     return _wallet_to_out(wallet)
 
 
 @router.post("/wallets/{wallet_id}/toggle", response_model=AdminWalletOut)
-def toggle_wallet(wallet_id: int, db: Session = Depends(get_db)):
+def toggle_wallet(wallet_id: int, db: Session = Depends(get_admin_db)):
     wallet = db.query(Wallet).filter(Wallet.id == wallet_id).first()
     if not wallet:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Wallet not found")
@@ -92,4 +137,59 @@ def toggle_wallet(wallet_id: int, db: Session = Depends(get_db)):
     db.add(wallet)
     db.commit()
     db.refresh(wallet)
+    etag.bump(etag.company_wallets(wallet.company_id))
     return _wallet_to_out(wallet)
+
+
+# Schema defaults (`is_active`) only apply to wallets the bulk upsert creates
+_WALLET_CREATE_DEFAULTS = {
+    name: field.default for name, field in AdminWalletCreate.model_fields.items() if not field.is_required()
+}
+
+
+@router.post("/companies/{company_id}/wallets/bulk", response_model=List[AdminWalletOut])
+def bulk_upsert_company_wallets(company_id: int, data: AdminWalletBulkUpsert, db: Session = Depends(get_admin_db)):
+    """
+    Create or update many wallets of a company in one transaction.
+
+    Wallets are matched on `wallet_identifier`: existing ones are updated,
+    the others created. The whole batch is rejected if an identifier repeats
+    or a channel does not belong to the company.
+    """
+    identifiers = [w.wallet_identifier for w in data.wallets]
+    if len(set(identifiers)) != len(identifiers):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Duplicate wallet_identifier in request")
+    channel_ids = {w.channel_id for w in data.wallets}
+    known = {
+        channel_id
+        for (channel_id,) in db.query(Channel.id).filter(Channel.id.in_(channel_ids), Channel.company_id == company_id)
+    }
+    if known != channel_ids:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Channel not found for company")
+
+    with unit_of_work(db):
+        wallet_ids = wallet_repository.upsert_company_wallets(
+            db,
+            company_id,
+            [w.model_dump(exclude_unset=True) for w in data.wallets],
+            defaults=_WALLET_CREATE_DEFAULTS,
+        )
+    etag.bump(etag.company_wallets(company_id))
+    return [_wallet_to_out(w) for w in wallet_repository.get_wallets_for_admin(db, wallet_ids=wallet_ids)]
+
+
+@router.post("/wallets/bulk-status", response_model=List[AdminWalletOut])
+def bulk_set_wallet_status(data: AdminWalletBulkStatus, db: Session = Depends(get_admin_db)):
+    """
+    Activate or deactivate many wallets with a single UPDATE.
+
+    Returns 404 without changing anything if any id is unknown.
+    """
+    wallet_ids = set(data.wallet_ids)
+    with unit_of_work(db):
+        updated = wallet_repository.set_wallets_active(db, wallet_ids, data.is_active)
+        if updated != len(wallet_ids):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Wallet not found")
+    wallets = wallet_repository.get_wallets_for_admin(db, wallet_ids=wallet_ids)
+    etag.bump(*{etag.company_wallets(w.company_id) for w in wallets})
+    return [_wallet_to_out(w) for w in wallets]
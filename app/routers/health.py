@@ -3,7 +3,7 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 from app.config import settings
-from app.db.session import get_db
+from app.db.session import all_pool_stats, get_db
 
 router = APIRouter(tags=["health"])
 
@@ -33,3 +33,13 @@ def health_check_db(db: Session = Depends(get_db)):
     except Exception:
         return {"status": "error", "database": "unreachable"}
     return {"status": "ok", "database": "reachable"}
+
+
+@router.get("/health/db/pool")
+def health_check_db_pool():
+    """
+    Connection pool usage of every engine of this process (default, per-role
+    pools and read replica), for monitoring pool exhaustion.
+    Counts are per worker process.
+    """
+    return {"status": "ok", "pools": all_pool_stats()}
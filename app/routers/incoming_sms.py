@@ -5,7 +5,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 import logging
 
-from app.db.session import get_db
+from app.db.session import get_ingest_db
 from app.schemas.incoming_sms import IncomingSmsCreate, IncomingSmsStored
 from app.services.incoming_sms_service import IncomingSmsService
 
@@ -22,7 +22,7 @@ logger = logging.getLogger("payment_gateway")
 @router.post("/", response_model=IncomingSmsStored, status_code=status.HTTP_201_CREATED)
 async def receive_incoming_sms(
     request: Request,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_ingest_db),
 ):
     """
     Receive an incoming SMS payload (from Tasker/mobile) and store it as a Payment.
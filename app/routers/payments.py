@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
-from app.db.session import get_db
+from app.db.session import get_merchant_db
 try:
     # Prefer the legacy deps implementation so tests that override that callable
     # (in tests/conftest.py) continue to work. If you want to explicitly use the
@@ -31,7 +31,7 @@ router = APIRouter(
 @router.post("/check", response_model=PaymentCheckResponse)
 def check_payment(
     payload: PaymentCheckRequest,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_merchant_db),
     current_company: Company = Depends(get_current_company),
 ):
     """
@@ -48,7 +48,7 @@ def check_payment(
 @router.post("/confirm", response_model=PaymentConfirmResponse)
 def confirm_payment(
     payload: PaymentConfirmRequest,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_merchant_db),
     current_company: Company = Depends(get_current_company),
 ):
     """
@@ -84,6 +84,8 @@ class PaymentMatchResponse(BaseModel):
     payment_id: Optional[int] = None
     txn_id: Optional[str] = None
     status: Optional[str] = None
+    # 0..1, lower when another candidate is almost as plausible
+    confidence: Optional[float] = None
 
 
 class PaymentStatusResponse(BaseModel):
@@ -94,30 +96,36 @@ class PaymentStatusResponse(BaseModel):
 @router.post("/match", response_model=PaymentMatchResponse)
 def payments_match(
     payload: PaymentMatchRequest,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_merchant_db),
     company: Company = Depends(get_current_company),
 ):
-    payment = payment_service.match_payment_for_order(
+    result = payment_service.find_best_match(
         db,
         company.id,
         float(payload.amount),
         payload.currency or "USD",
-        payload.payer_phone,
+        payer_phone=payload.payer_phone,
+        txn_id=payload.txn_id,
     )
 
-    if payment is None:
+    if result is None:
         return PaymentMatchResponse(found=False, match=False)
 
-    if abs(payment.amount - float(payload.amount)) > 0.01:
-        return PaymentMatchResponse(found=True, match=False, payment_id=payment.id, txn_id=payment.txn_id, status=payment.status)
-
-    return PaymentMatchResponse(found=True, match=True, payment_id=payment.id, txn_id=payment.txn_id, status=payment.status)
+    payment = result.payment
+    return PaymentMatchResponse(
+        found=True,
+        match=result.exact_amount,
+        payment_id=payment.id,
+        txn_id=payment.txn_id,
+        status=payment.status,
+        confidence=result.confidence,
+    )
 
 
 @router.post("/{payment_id}/pending-confirmation", response_model=PaymentStatusResponse)
 def payments_pending_confirmation(
     payment_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_merchant_db),
     company: Company = Depends(get_current_company),
 ):
     payment = db.query(payment_service.Payment).filter(payment_service.Payment.id == payment_id, payment_service.Payment.company_id == company.id).first()
@@ -131,14 +139,18 @@ def payments_pending_confirmation(
 @router.post("/{payment_id}/confirm-usage", response_model=PaymentStatusResponse)
 def payments_confirm_usage(
     payment_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_merchant_db),
     company: Company = Depends(get_current_company),
 ):
     payment = db.query(payment_service.Payment).filter(payment_service.Payment.id == payment_id, payment_service.Payment.company_id == company.id).first()
     if not payment:
         raise HTTPException(status_code=404, detail="Payment not found")
 
-    payment = payment_service.confirm_payment_usage(db, payment)
+    try:
+        payment = payment_service.confirm_payment_usage(db, payment)
+    except ValueError as exc:
+        # wallet daily limit exceeded; nothing was committed
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
     return PaymentStatusResponse(payment_id=payment.id, status=payment.status)
 
 # Refactored by Copilot – Payments Feature
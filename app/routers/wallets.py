@@ -9,7 +9,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, Field
 from app.config import settings, get_settings
-from app.db.session import get_db
+from app.db.session import get_merchant_db
 from app.dependencies.deps import get_current_company
 from app.models.company import Company
 from app.models.wallet import Wallet
@@ -34,7 +34,7 @@ router = APIRouter(tags=["wallets"])
 @router.post("/wallets/request", response_model=WalletResponse)
 def request_wallet(
     payload: WalletRequest,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_merchant_db),
     company: Company = Depends(get_current_company),
 ):
     """Select an available wallet for the requested amount for the current company.
@@ -82,7 +82,7 @@ def request_wallet(
 def request_wallet_for_provider(
     provider_code: str,
     payload: WalletRequest,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_merchant_db),
     company: Company = Depends(get_current_company),
 ):
     """Select an available wallet for a specific payment provider.
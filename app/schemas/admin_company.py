@@ -46,3 +46,20 @@ class AdminCompanyListItem(BaseModel):
     is_active: bool
 
     model_config = {"from_attributes": True}
+
+
+class AdminCompanyBulkRowResult(BaseModel):
+    row: int
+    status: str
+    name: Optional[str] = None
+    company_id: Optional[int] = None
+    api_key: Optional[str] = None
+    unknown_provider_codes: List[str] = []
+    error: Optional[str] = None
+
+
+class AdminCompanyBulkResult(BaseModel):
+    total: int
+    created: int
+    failed: int
+    results: List[AdminCompanyBulkRowResult]
@@ -1,5 +1,6 @@
+from datetime import datetime
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 
 
 class MerchantOnboardingExample(BaseModel):
@@ -24,3 +25,18 @@ class AdminOnboardingGenerateResponse(BaseModel):
     html_url: str
     pdf_url: str | None = None
     environment: str
+
+
+class AdminOnboardingJobOut(BaseModel):
+    job_id: str
+    company_id: int
+    # queued | running | succeeded | failed
+    status: str
+    environment: str
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    html_path: Optional[str] = None
+    pdf_path: Optional[str] = None
+    html_url: Optional[str] = None
+    pdf_url: Optional[str] = None
+    error: Optional[str] = None
@@ -22,5 +22,10 @@ class PaymentAdminSummary(BaseModel):
 class PaginatedPaymentsResponse(BaseModel):
     items: List[PaymentAdminSummary]
     total: int
+    # How `total` was computed: "exact", "estimated" or "cached"
+    total_strategy: str = "exact"
     page: int
     page_size: int
+    # Set in keyset mode; pass back as `cursor` to fetch the adjacent page
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
@@ -0,0 +1,19 @@
+from typing import List, Optional
+from datetime import datetime
+from pydantic import BaseModel
+
+
+class PaymentStatsBucket(BaseModel):
+    bucket: datetime
+    status: str
+    count: int
+    sum_amount: int
+
+
+class PaymentStatsResponse(BaseModel):
+    granularity: str
+    items: List[PaymentStatsBucket]
+    # Time up to which the rollup table is complete (None before the first run)
+    rollup_watermark: Optional[datetime] = None
+    # True when buckets after the watermark were computed live from payments
+    live_merged: bool = False
@@ -1,5 +1,6 @@
-from typing import Optional
-from pydantic import BaseModel
+from datetime import datetime
+from typing import List, Optional
+from pydantic import BaseModel, Field
 
 
 class AdminWalletBase(BaseModel):
@@ -33,3 +34,31 @@ class AdminWalletOut(BaseModel):
     provider_name: Optional[str] = None
 
     model_config = {"from_attributes": True}
+
+
+class AdminWalletBulkUpsert(BaseModel):
+    wallets: List[AdminWalletCreate] = Field(..., min_length=1, max_length=1000)
+
+
+class AdminWalletBulkStatus(BaseModel):
+    wallet_ids: List[int] = Field(..., min_length=1, max_length=1000)
+    is_active: bool
+
+
+class AdminWalletUtilization(BaseModel):
+    wallet_id: int
+    wallet_label: str
+    wallet_identifier: str
+    is_active: bool
+    daily_limit: float
+    used_today: float
+    remaining: float
+    payments_today: int
+    amount_today: float
+    last_payment_at: Optional[datetime] = None
+
+
+class AdminWalletUtilizationResponse(BaseModel):
+    company_id: int
+    as_of: datetime
+    wallets: List[AdminWalletUtilization]
@@ -7,6 +7,7 @@ class PaymentCheckRequest(BaseModel):
     order_id: str
     expected_amount: int
     txn_id: Optional[str] = None
+    payer_phone: Optional[str] = None
     max_age_minutes: Optional[int] = 30
 
 
@@ -1,13 +1,24 @@
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
+import logging
 import secrets
-from typing import Iterable, Dict
+from typing import Any, Iterable, Dict, List
+
+from pydantic import ValidationError
 
 from app.models.company import Company
 from app.models.channel import Channel
 from app.models.wallet import Wallet
 from app.models.country import PaymentProvider
 from app.schemas.admin_company import AdminCompanyCreate
+from app.schemas.admin_geo import AdminPaymentProviderOut
 from app.config import settings
+from app.db.session import unit_of_work
+from app.services.reference_data import reference_data
+
+logger = logging.getLogger("payment_gateway")
+
+BULK_CHUNK_SIZE = 200
 
 
 class AdminCompanyService:
@@ -17,15 +28,26 @@ class AdminCompanyService:
         return secrets.token_urlsafe(32)
 
     @staticmethod
-    def _get_providers_by_codes(db: Session, provider_codes: Iterable[str]) -> Dict[str, PaymentProvider]:
+    def _get_providers_by_codes(db: Session, provider_codes: Iterable[str]) -> Dict[str, AdminPaymentProviderOut]:
+        """Resolve provider codes from the reference-data cache; unknown codes are left out.
+
+        Codes missing from the snapshot are looked up in `payment_providers`
+        before being treated as unknown: a provider created through another
+        worker is only in this worker's snapshot once it expires. Finding one
+        invalidates the stale snapshot.
+        """
         if not provider_codes:
             return {}
-        providers = (
-            db.query(PaymentProvider)
-            .filter(PaymentProvider.code.in_(list(provider_codes)))
-            .all()
-        )
-        return {p.code: p for p in providers}
+        known = reference_data.get(db).providers_by_code
+        found = {code: known[code] for code in provider_codes if code in known}
+        missing = {code for code in provider_codes if code not in known}
+        if missing:
+            created_elsewhere = db.query(PaymentProvider).filter(PaymentProvider.code.in_(missing)).all()
+            if created_elsewhere:
+                reference_data.invalidate()
+            for provider in created_elsewhere:
+                found[provider.code] = AdminPaymentProviderOut.model_validate(provider)
+        return found
 
     @staticmethod
     def create_company_with_channels(db: Session, data: AdminCompanyCreate) -> Company:
@@ -34,7 +56,7 @@ class AdminCompanyService:
 
         - Generates a company API key.
         - Persists the company.
-        - Looks up PaymentProvider rows by `data.provider_codes`.
+        - Resolves `data.provider_codes` through the reference-data cache.
         - For each found provider, creates a Channel linked to the company.
         """
         # 1) create the Company
@@ -63,7 +85,7 @@ class AdminCompanyService:
             channel = Channel(
                 company_id=company.id,
                 name=f"{provider.name} Channel",
-                provider=provider,
+                provider_id=provider.id,
                 channel_api_key=AdminCompanyService.generate_api_key(),
                 is_active=True,
             )
@@ -167,7 +189,7 @@ class AdminCompanyService:
                 new_ch = Channel(
                     company_id=company.id,
                     name=f"{provider.name} Channel",
-                    provider=provider,
+                    provider_id=provider.id,
                     channel_api_key=AdminCompanyService.generate_api_key(),
                     is_active=True,
                 )
@@ -202,3 +224,148 @@ class AdminCompanyService:
         db.commit()
         db.refresh(company)
         return company
+
+    @staticmethod
+    def _bulk_insert_chunk(db: Session, entries: List[Dict[str, Any]], providers_by_code: Dict[str, AdminPaymentProviderOut]) -> None:
+        """Insert one chunk of validated rows and fill in their results.
+
+        Mirrors `create_company_with_channels` followed by
+        `provision_onboarding`: one channel per known provider (or a
+        "Primary Channel" when there is none) and a default wallet on the
+        company's first channel. Three multi-row INSERTs and two SELECTs per
+        chunk, whatever its size.
+        """
+        daily_limit = getattr(settings, 'DEFAULT_WALLET_DAILY_LIMIT', 100000.0)
+        with unit_of_work(db):
+            # API keys are generated here and unique, so the new ids are read
+            # back by key instead of relying on RETURNING order per dialect.
+            db.execute(
+                insert(Company),
+                [
+                    {
+                        "name": entry["data"].name,
+                        "api_key": entry["result"]["api_key"],
+                        "country_code": entry["data"].country_code,
+                        "telegram_bot_token": entry["data"].telegram_bot_token,
+                        "telegram_default_group_id": entry["data"].telegram_default_group_id,
+                        "is_active": True,
+                    }
+                    for entry in entries
+                ],
+            )
+            ids_by_key = dict(
+                db.query(Company.api_key, Company.id)
+                .filter(Company.api_key.in_([entry["result"]["api_key"] for entry in entries]))
+                .all()
+            )
+
+            channel_params = []
+            first_channel_key: Dict[int, str] = {}
+            for entry in entries:
+                company_id = ids_by_key[entry["result"]["api_key"]]
+                entry["result"]["company_id"] = company_id
+                providers = [providers_by_code[c] for c in entry["data"].provider_codes if c in providers_by_code]
+                channels = [(f"{p.name} Channel", p.id) for p in providers] or [("Primary Channel", None)]
+                for name, provider_id in channels:
+                    channel_key = AdminCompanyService.generate_api_key()
+                    first_channel_key.setdefault(company_id, channel_key)
+                    channel_params.append(
+                        {
+                            "company_id": company_id,
+                            "name": name,
+                            "provider_id": provider_id,
+                            "channel_api_key": channel_key,
+                            "is_active": True,
+                        }
+                    )
+            db.execute(insert(Channel), channel_params)
+            channel_ids_by_key = dict(
+                db.query(Channel.channel_api_key, Channel.id)
+                .filter(Channel.channel_api_key.in_(list(first_channel_key.values())))
+                .all()
+            )
+
+            db.execute(
+                insert(Wallet),
+                [
+                    {
+                        "company_id": company_id,
+                        "channel_id": channel_ids_by_key[channel_key],
+                        "wallet_label": "Default Wallet",
+                        "wallet_identifier": f"WALLET-{company_id}-1",
+                        "daily_limit": daily_limit,
+                        "is_active": True,
+                    }
+                    for company_id, channel_key in first_channel_key.items()
+                ],
+            )
+
+    @staticmethod
+    def bulk_create_companies(
+        db: Session,
+        rows: List[Dict[str, Any]],
+        chunk_size: int = BULK_CHUNK_SIZE,
+    ) -> List[Dict[str, Any]]:
+        """
+        Create many companies with their channels and default wallet.
+
+        - Each row is validated as `AdminCompanyCreate`; invalid rows are
+          reported and skipped.
+        - Provider codes are resolved once for the whole import, from the
+          reference-data cache (plus one query for codes it does not know);
+          unknown codes are ignored, as in the single-company path, and listed
+          in the row result.
+        - Valid rows are inserted `chunk_size` at a time, one transaction per
+          chunk. If a chunk fails, its rows are reported as failed and the
+          following chunks still run.
+
+        Returns one result dict per input row, in input order, with `row`
+        (1-based), `status` ("created" or "error"), `name`, `company_id`,
+        `api_key`, `unknown_provider_codes` and `error`.
+        """
+        results: List[Dict[str, Any]] = []
+        valid: List[Dict[str, Any]] = []
+        for index, raw in enumerate(rows, start=1):
+            result: Dict[str, Any] = {
+                "row": index,
+                "status": "error",
+                "name": raw.get("name") if isinstance(raw, dict) else None,
+                "company_id": None,
+                "api_key": None,
+                "unknown_provider_codes": [],
+                "error": None,
+            }
+            results.append(result)
+            try:
+                data = AdminCompanyCreate.model_validate(raw)
+            except ValidationError as exc:
+                result["error"] = "; ".join(
+                    f"{'.'.join(str(part) for part in err['loc']) or 'row'}: {err['msg']}" for err in exc.errors()
+                )
+                continue
+            if not data.name.strip():
+                result["error"] = "name: must not be empty"
+                continue
+            result["api_key"] = AdminCompanyService.generate_api_key()
+            valid.append({"data": data, "result": result})
+
+        codes = {code for entry in valid for code in entry["data"].provider_codes}
+        providers_by_code = AdminCompanyService._get_providers_by_codes(db, codes)
+        for entry in valid:
+            entry["result"]["unknown_provider_codes"] = [
+                c for c in entry["data"].provider_codes if c not in providers_by_code
+            ]
+
+        for start in range(0, len(valid), chunk_size):
+            chunk = valid[start:start + chunk_size]
+            try:
+                AdminCompanyService._bulk_insert_chunk(db, chunk, providers_by_code)
+            except Exception as exc:
+                logger.exception("Bulk company import failed for rows %d-%d", chunk[0]["result"]["row"], chunk[-1]["result"]["row"])
+                for entry in chunk:
+                    entry["result"].update(company_id=None, api_key=None, error=f"insert failed: {exc.__class__.__name__}")
+                continue
+            for entry in chunk:
+                entry["result"]["status"] = "created"
+
+        return results
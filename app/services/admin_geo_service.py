@@ -11,60 +11,39 @@ from app.schemas.admin_geo import (
     AdminCountryCreate,
     AdminPaymentProviderCreate,
 )
+from app.services.reference_data import reference_data
 
 
 class AdminGeoService:
     @staticmethod
     def list_countries(db: Session) -> List[AdminCountryOut]:
         """
-        Return all countries as AdminCountryOut sorted by name.
+        Return all countries as AdminCountryOut sorted by name (from the reference-data cache).
         """
-        countries = db.query(Country).order_by(Country.name.asc()).all()
-        return [AdminCountryOut.model_validate(c) for c in countries]
+        return list(reference_data.get(db).countries)
 
     @staticmethod
     def list_payment_providers(db: Session) -> List[AdminPaymentProviderOut]:
         """
-        Return all payment providers as AdminPaymentProviderOut sorted by name.
+        Return all payment providers as AdminPaymentProviderOut sorted by name (from the reference-data cache).
         """
-        providers = db.query(PaymentProvider).order_by(PaymentProvider.name.asc()).all()
-        return [AdminPaymentProviderOut.model_validate(p) for p in providers]
+        return list(reference_data.get(db).providers)
 
     @staticmethod
     def get_country_with_providers(db: Session, country_code: str) -> AdminCountryWithProviders | None:
         """
         Return a country and its supported payment providers by country code.
 
-        - Looks up Country by its code (case-sensitive or case-insensitive as stored).
-        - Joins CountryPaymentProvider and PaymentProvider.
+        - Looks up the country by its exact code in the reference-data cache.
         - Only includes providers where is_supported is True.
         - Returns None if the country is not found.
         """
-        country: Country | None = (
-            db.query(Country)
-            .filter(Country.code == country_code)
-            .first()
-        )
+        snapshot = reference_data.get(db)
+        country = snapshot.countries_by_code.get(country_code)
         if country is None:
             return None
-
-        links = (
-            db.query(CountryPaymentProvider)
-            .join(PaymentProvider, CountryPaymentProvider.provider_id == PaymentProvider.id)
-            .filter(
-                CountryPaymentProvider.country_id == country.id,
-                CountryPaymentProvider.is_supported.is_(True),
-            )
-            .all()
-        )
-
-        providers_out: List[AdminPaymentProviderOut] = []
-        for link in links:
-            provider = link.provider
-            providers_out.append(AdminPaymentProviderOut.model_validate(provider))
-
-        country_out = AdminCountryOut.model_validate(country)
-        return AdminCountryWithProviders(country=country_out, providers=providers_out)
+        providers = snapshot.providers_by_country.get(country_code, [])
+        return AdminCountryWithProviders(country=country, providers=list(providers))
 
     @staticmethod
     def create_country(db: Session, data: AdminCountryCreate) -> Country:
@@ -80,6 +59,7 @@ class AdminGeoService:
         country = Country(code=data.code, name=data.name)
         db.add(country)
         db.commit()
+        reference_data.invalidate()
         db.refresh(country)
         return country
 
@@ -107,5 +87,6 @@ class AdminGeoService:
                 db.add(link)
 
         db.commit()
+        reference_data.invalidate()
         db.refresh(provider)
         return provider
@@ -1,23 +1,42 @@
 from pathlib import Path
+from typing import Callable, Optional
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 
-from app.services.admin_company_service import AdminCompanyService
 from app.config import settings
 from app.models.company import Company
-from app.schemas.admin_onboarding import AdminOnboardingGenerateResponse
+from app.schemas.admin_onboarding import AdminOnboardingGenerateResponse, AdminOnboardingJobOut
+from app.services.onboarding_jobs import FAILED, OnboardingJob, onboarding_jobs
 
-try:
-    # import the generate_onboarding helper from repo root
-    from generate_onboarding_pdf import generate_onboarding
-except Exception:
-    generate_onboarding = None
+
+def load_generator() -> Optional[Callable]:
+    """Import the generate_onboarding helper from repo root on first use.
+
+    It pulls in markdown (and WeasyPrint when a PDF is rendered), which API
+    workers that never generate onboarding documents should not load.
+    Returns None when it cannot be imported on this host.
+    """
+    try:
+        from generate_onboarding_pdf import generate_onboarding
+    except Exception:
+        return None
+    return generate_onboarding
+
+
+def _static_url(path: Optional[str]) -> Optional[str]:
+    if path is None:
+        return None
+    return f"/static/onboarding/{Path(path).name}"
 
 
 class AdminOnboardingService:
     @staticmethod
-    def generate_company_onboarding_pdf(db: Session, company_id: int) -> AdminOnboardingGenerateResponse:
-        # use existing service to load company
+    def enqueue_company_onboarding(db: Session, company_id: int) -> OnboardingJob:
+        """Validate the company and queue the rendering of its onboarding documents.
+
+        Returns as soon as the job is queued; the HTML/PDF are written to
+        `ONBOARDING_OUTPUT_DIR` by a worker process.
+        """
         company = db.query(Company).filter(Company.id == company_id).first()
         if company is None:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Company not found")
@@ -25,8 +44,12 @@ class AdminOnboardingService:
         if not getattr(company, 'is_active', True):
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Company must be active to generate onboarding")
 
+        generate_onboarding = load_generator()
+        if generate_onboarding is None:
+            # Here we raise 503 to indicate generator isn't available on this host.
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Onboarding generator is not available on this server")
+
         merchant_name = company.name or f"company-{company.id}"
-        api_key = company.api_key
         # pick base URL from settings; fall back to existing default
         base_url = getattr(settings, 'DEFAULT_MERCHANT_BASE_URL_DEV', 'http://localhost:8000')
         env = getattr(settings, 'ENVIRONMENT_NAME', 'dev')
@@ -34,30 +57,60 @@ class AdminOnboardingService:
         output_dir = Path(getattr(settings, 'ONBOARDING_OUTPUT_DIR', 'generated_onboarding'))
         output_dir.mkdir(parents=True, exist_ok=True)
 
-        if generate_onboarding is None:
-            # Attempt to at least populate HTML URL if possible by raising a 503 or generating HTML via other means.
-            # Here we raise 503 to indicate generator isn't available on this host.
-            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Onboarding generator is not available on this server")
-
-        html_path, pdf_path = generate_onboarding(
+        # only plain values cross the process boundary: the worker needs no DB session
+        return onboarding_jobs.submit(
+            company.id,
+            generate_onboarding,
             merchant_name=merchant_name,
-            api_key=api_key,
+            api_key=company.api_key,
             base_url=base_url,
             environment=env,
             output_dir=output_dir,
         )
 
-        html_name = Path(html_path).name
-        pdf_name = Path(pdf_path).name if pdf_path is not None else None
+    @staticmethod
+    def get_job(job_id: str) -> OnboardingJob:
+        job = onboarding_jobs.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Onboarding job not found")
+        return job
 
-        html_url = f"/static/onboarding/{html_name}"
-        pdf_url = f"/static/onboarding/{pdf_name}" if pdf_name else None
+    @staticmethod
+    def job_to_out(job: OnboardingJob) -> AdminOnboardingJobOut:
+        return AdminOnboardingJobOut(
+            job_id=job.id,
+            company_id=job.company_id,
+            status=job.status,
+            environment=job.environment,
+            created_at=job.created_at,
+            finished_at=job.finished_at,
+            html_path=job.html_path,
+            pdf_path=job.pdf_path,
+            html_url=_static_url(job.html_path),
+            pdf_url=_static_url(job.pdf_path),
+            error=job.error,
+        )
 
+    @staticmethod
+    def job_to_generate_response(job: OnboardingJob) -> AdminOnboardingGenerateResponse:
+        """Response of the synchronous endpoint for a finished job."""
+        if job.status == FAILED or job.html_path is None:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Onboarding generation failed: {job.error}",
+            )
         return AdminOnboardingGenerateResponse(
-            company_id=company.id,
-            html_path=str(html_path),
-            pdf_path=str(pdf_path) if pdf_path is not None else None,
-            html_url=html_url,
-            pdf_url=pdf_url,
-            environment=env,
+            company_id=job.company_id,
+            html_path=job.html_path,
+            pdf_path=job.pdf_path,
+            html_url=_static_url(job.html_path),
+            pdf_url=_static_url(job.pdf_path),
+            environment=job.environment,
         )
+
+    @staticmethod
+    def generate_company_onboarding_pdf(db: Session, company_id: int) -> AdminOnboardingGenerateResponse:
+        """Queue the documents and block until they are rendered (scripts, tests)."""
+        job = AdminOnboardingService.enqueue_company_onboarding(db, company_id)
+        job = onboarding_jobs.wait(job, timeout=settings.ONBOARDING_JOB_WAIT_SECONDS)
+        return AdminOnboardingService.job_to_generate_response(job)
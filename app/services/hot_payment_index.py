@@ -0,0 +1,150 @@
+"""Process-local index of recently stored, unmatched payments.
+
+Almost every `/payments/check` poll is for a payment stored in the last few
+minutes. The ingest path registers each new payment here, keyed by txn_id and
+by amount per company, so the check path can find its candidate without a
+SELECT. The index is only a hint: the candidate is claimed with a conditional
+UPDATE (`payment_repository.claim_for_confirmation`), so a stale entry can
+never produce a wrong match, and a miss simply falls back to the database.
+
+Entries are evicted when they leave the time window, when a company holds more
+than `max_per_company` entries, and when the payment is claimed or confirmed.
+Each worker process keeps its own index.
+"""
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+import threading
+from typing import Dict, List, Optional
+
+from app.config import settings
+
+
+@dataclass(frozen=True)
+class HotPayment:
+    """Snapshot of the Payment fields needed to answer a check."""
+
+    payment_id: int
+    company_id: int
+    amount: int
+    currency: str
+    txn_id: Optional[str]
+    payer_phone: Optional[str]
+    created_at: datetime
+
+
+def _as_utc(value: Optional[datetime]) -> datetime:
+    if value is None:
+        return datetime.now(timezone.utc)
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+class _CompanyWindow:
+    def __init__(self) -> None:
+        # payment_id -> entry, in insertion (roughly created_at) order
+        self.by_id: "OrderedDict[int, HotPayment]" = OrderedDict()
+        self.by_txn: Dict[str, int] = {}
+        self.by_amount: Dict[int, List[int]] = {}
+
+    def remove(self, payment_id: int) -> None:
+        entry = self.by_id.pop(payment_id, None)
+        if entry is None:
+            return
+        if entry.txn_id is not None and self.by_txn.get(entry.txn_id) == payment_id:
+            del self.by_txn[entry.txn_id]
+        ids = self.by_amount.get(entry.amount)
+        if ids is not None:
+            try:
+                ids.remove(payment_id)
+            except ValueError:
+                pass
+            if not ids:
+                del self.by_amount[entry.amount]
+
+
+class HotPaymentIndex:
+    def __init__(self, window_minutes: int = 30, max_per_company: int = 1000) -> None:
+        self.window = timedelta(minutes=window_minutes)
+        self.max_per_company = max_per_company
+        self._companies: Dict[int, _CompanyWindow] = {}
+        self._lock = threading.Lock()
+
+    def add(self, payment) -> None:
+        """Register a freshly stored `new` payment. Other payments are ignored."""
+        if getattr(payment, "id", None) is None or getattr(payment, "status", None) != "new":
+            return
+        entry = HotPayment(
+            payment_id=payment.id,
+            company_id=payment.company_id,
+            amount=int(payment.amount or 0),
+            currency=payment.currency,
+            txn_id=payment.txn_id,
+            payer_phone=payment.payer_phone,
+            created_at=_as_utc(payment.created_at),
+        )
+        with self._lock:
+            window = self._companies.setdefault(entry.company_id, _CompanyWindow())
+            window.remove(entry.payment_id)
+            window.by_id[entry.payment_id] = entry
+            if entry.txn_id is not None:
+                window.by_txn[entry.txn_id] = entry.payment_id
+            window.by_amount.setdefault(entry.amount, []).append(entry.payment_id)
+            self._evict(window, datetime.now(timezone.utc))
+
+    def lookup(
+        self,
+        company_id: int,
+        created_after: datetime,
+        amount: Optional[int] = None,
+        txn_id: Optional[str] = None,
+        payer_phone: Optional[str] = None,
+    ) -> Optional[HotPayment]:
+        """Return the newest entry matching `txn_id`, or else `amount`."""
+        created_after = _as_utc(created_after)
+        with self._lock:
+            window = self._companies.get(company_id)
+            if window is None:
+                return None
+            self._evict(window, datetime.now(timezone.utc))
+
+            if txn_id is not None:
+                payment_id = window.by_txn.get(txn_id)
+                candidate_ids = [payment_id] if payment_id is not None else []
+            elif amount is not None:
+                candidate_ids = list(reversed(window.by_amount.get(int(amount), [])))
+            else:
+                return None
+
+            for payment_id in candidate_ids:
+                entry = window.by_id[payment_id]
+                if entry.created_at < created_after:
+                    continue
+                if payer_phone and entry.payer_phone != payer_phone:
+                    continue
+                return entry
+            return None
+
+    def discard(self, company_id: int, payment_id: int) -> None:
+        """Drop a payment that was claimed, confirmed or found stale."""
+        with self._lock:
+            window = self._companies.get(company_id)
+            if window is not None:
+                window.remove(payment_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._companies.clear()
+
+    def _evict(self, window: _CompanyWindow, now: datetime) -> None:
+        cutoff = now - self.window
+        while window.by_id:
+            oldest_id, oldest = next(iter(window.by_id.items()))
+            if oldest.created_at >= cutoff and len(window.by_id) <= self.max_per_company:
+                break
+            window.remove(oldest_id)
+
+
+# Module-level instance shared by the ingest and check paths
+hot_payment_index = HotPaymentIndex(window_minutes=settings.HOT_PAYMENT_WINDOW_MINUTES)
@@ -12,6 +12,7 @@ from app.models.channel import Channel
 from app.models.wallet import Wallet
 from app.models.payment import Payment
 from app.schemas.incoming_sms import IncomingSmsCreate
+from app.services.hot_payment_index import hot_payment_index
 
 logger = logging.getLogger(__name__)
 
@@ -75,6 +76,7 @@ class IncomingSmsService:
         db.add(payment)
         db.commit()
         db.refresh(payment)
+        hot_payment_index.add(payment)
         
         # 5) Send Telegram notification (best-effort, non-blocking)
         notify_telegram_about_payment(payment, channel)
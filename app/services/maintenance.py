@@ -0,0 +1,178 @@
+"""Periodic maintenance jobs run in the background of each API process.
+
+Jobs are registered with `register_periodic_task` and started/stopped by the
+application lifespan in `app.main`. Each run opens its own DB session, and a
+failing run is logged without stopping the task. Jobs registered with
+`exclusive=True` run in at most one process at a time: on Postgres each run
+first takes a session advisory lock, and workers that do not get it skip the
+run.
+"""
+from datetime import datetime, timezone
+import hashlib
+import logging
+import threading
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import text
+
+from app.config import settings
+from app.db import partitioning
+from app.db.session import SessionLocal, engine
+import app.repositories.payment_repository as payment_repository
+import app.repositories.stats_repository as stats_repository
+
+logger = logging.getLogger("payment_gateway")
+
+
+class PeriodicTask:
+    """Run `func` every `interval_seconds` on a daemon thread."""
+
+    def __init__(self, name: str, interval_seconds: float, func: Callable[[], object]) -> None:
+        self.name = name
+        self.interval_seconds = interval_seconds
+        self.func = func
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self.interval_seconds <= 0 or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f"periodic-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def run_once(self) -> object:
+        return self.func()
+
+    def _run(self) -> None:
+        # wait first so the app finishes starting before the first run
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                self.func()
+            except Exception:
+                logger.exception("Periodic task %s failed", self.name)
+
+
+_tasks: List[PeriodicTask] = []
+
+
+def advisory_lock_key(name: str) -> int:
+    """Stable signed 64-bit key for `pg_try_advisory_lock`, derived from a job name."""
+    return int.from_bytes(hashlib.sha256(name.encode("utf-8")).digest()[:8], "big", signed=True)
+
+
+def run_exclusively(name: str, func: Callable[[], object], bind=None) -> Optional[object]:
+    """Run `func` unless another process is already running the job `name`.
+
+    On Postgres the run holds `pg_try_advisory_lock` on its own connection;
+    if the lock is taken elsewhere the run is skipped and None is returned.
+    Other databases (SQLite in development and tests) always run `func`.
+    """
+    bind = bind if bind is not None else engine
+    if bind.dialect.name != "postgresql":
+        return func()
+    key = advisory_lock_key(name)
+    with bind.connect() as conn:
+        if not conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": key}).scalar():
+            logger.debug("Periodic task %s is running in another process; skipped", name)
+            return None
+        try:
+            return func()
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": key})
+            conn.commit()
+
+
+def register_periodic_task(
+    name: str,
+    interval_seconds: float,
+    func: Callable[[], object],
+    exclusive: bool = False,
+) -> PeriodicTask:
+    if exclusive:
+        job = func
+        func = lambda: run_exclusively(name, job)
+    task = PeriodicTask(name, interval_seconds, func)
+    _tasks.append(task)
+    return task
+
+
+def start_periodic_tasks() -> None:
+    for task in _tasks:
+        task.start()
+
+
+def stop_periodic_tasks() -> None:
+    for task in _tasks:
+        task.stop()
+
+
+def sweep_pending_confirmations() -> Dict[str, int]:
+    """Release pending payments whose confirm token expired (see repository)."""
+    db = SessionLocal()
+    try:
+        reverted, expired = payment_repository.expire_stale_pending(
+            db,
+            now=datetime.now(timezone.utc),
+            token_ttl_minutes=settings.CONFIRM_TOKEN_TTL_MINUTES,
+            revert_window_minutes=settings.PENDING_REVERT_WINDOW_MINUTES,
+        )
+    finally:
+        db.close()
+    if reverted or expired:
+        logger.info("Pending confirmation sweep: reverted=%s expired=%s", reverted, expired)
+    return {"reverted": reverted, "expired": expired}
+
+
+register_periodic_task(
+    "pending-confirmation-sweep",
+    settings.PENDING_SWEEP_INTERVAL_SECONDS,
+    sweep_pending_confirmations,
+    exclusive=True,
+)
+
+
+def refresh_payment_rollups() -> Dict[str, int]:
+    """Bring the hourly payment rollup up to date (see stats_repository)."""
+    db = SessionLocal()
+    try:
+        buckets = stats_repository.refresh_hourly_rollups(db)
+    finally:
+        db.close()
+    return {"buckets": buckets}
+
+
+register_periodic_task(
+    "payment-rollup-refresh",
+    settings.PAYMENT_ROLLUP_INTERVAL_SECONDS,
+    refresh_payment_rollups,
+    exclusive=True,
+)
+
+
+# also taken by scripts/payment_partitions.py, so cron runs and the periodic
+# job never issue partition DDL concurrently
+PARTITION_MAINTENANCE_JOB = "payment-partition-maintenance"
+
+
+def ensure_payment_partitions() -> Dict[str, int]:
+    """Pre-create upcoming monthly payments partitions (no-op unless partitioned)."""
+    with engine.begin() as conn:
+        created = partitioning.ensure_monthly_partitions(
+            conn, months_ahead=settings.PAYMENT_PARTITIONS_MONTHS_AHEAD
+        )
+    return {"created": len(created)}
+
+
+register_periodic_task(
+    PARTITION_MAINTENANCE_JOB,
+    settings.PAYMENT_PARTITION_INTERVAL_SECONDS,
+    ensure_payment_partitions,
+    exclusive=True,
+)
@@ -0,0 +1,280 @@
+"""Background jobs rendering merchant onboarding documents.
+
+Markdown rendering and WeasyPrint PDF generation take seconds of CPU, so they
+run in a small process pool instead of the API worker: `submit` returns a job
+immediately, and the admin UI polls `GET /admin/onboarding-jobs/{id}` for its
+status and download URLs.
+
+Job state is a JSON file per job id in `ONBOARDING_JOB_DIR`, written by the
+render process itself, so any API worker sharing that directory (like it
+shares `ONBOARDING_OUTPUT_DIR`) can answer a poll. The latest `MAX_JOBS` are
+kept. With `ONBOARDING_JOB_WORKERS=0` documents are rendered inline in the
+caller, which tests and local debugging use.
+"""
+import asyncio
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+import json
+import logging
+import multiprocessing
+import os
+from pathlib import Path
+import re
+import threading
+import uuid
+from typing import Callable, Dict, Optional, Tuple, Union
+
+from app.config import settings
+
+logger = logging.getLogger("payment_gateway")
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+MAX_JOBS = 1000
+
+_JOB_ID_RE = re.compile(r"[0-9a-f]{32}")
+
+
+@dataclass
+class OnboardingJob:
+    id: str
+    company_id: int
+    environment: str
+    status: str = QUEUED
+    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    finished_at: Optional[datetime] = None
+    html_path: Optional[str] = None
+    pdf_path: Optional[str] = None
+    error: Optional[str] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in (SUCCEEDED, FAILED)
+
+    def to_json(self) -> str:
+        data = asdict(self)
+        for key in ("created_at", "finished_at"):
+            if data[key] is not None:
+                data[key] = data[key].isoformat()
+        return json.dumps(data)
+
+    @classmethod
+    def from_json(cls, raw: str) -> "OnboardingJob":
+        data = json.loads(raw)
+        for key in ("created_at", "finished_at"):
+            if data.get(key) is not None:
+                data[key] = datetime.fromisoformat(data[key])
+        return cls(**data)
+
+
+class OnboardingJobStore:
+    """One JSON file per job in `directory`, replaced atomically on update."""
+
+    def __init__(self, directory: Union[str, Path]) -> None:
+        self.directory = Path(directory)
+
+    def _path(self, job_id: str) -> Optional[Path]:
+        # job ids come from URLs: never let one name a file outside the store
+        if not _JOB_ID_RE.fullmatch(job_id):
+            return None
+        return self.directory / f"{job_id}.json"
+
+    def save(self, job: OnboardingJob) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(job.id)
+        tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+        tmp.write_text(job.to_json(), encoding="utf-8")
+        os.replace(tmp, path)
+
+    def load(self, job_id: str) -> Optional[OnboardingJob]:
+        path = self._path(job_id)
+        if path is None:
+            return None
+        try:
+            return OnboardingJob.from_json(path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+
+    def prune(self, max_jobs: int) -> None:
+        """Delete the oldest finished jobs beyond `max_jobs`; unfinished ones are kept."""
+        try:
+            paths = sorted(self.directory.glob("*.json"), key=lambda p: p.stat().st_mtime)
+        except FileNotFoundError:
+            return
+        excess = len(paths) - max_jobs
+        for path in paths:
+            if excess <= 0:
+                break
+            job = self.load(path.stem)
+            if job is not None and job.done:
+                path.unlink(missing_ok=True)
+                excess -= 1
+
+
+def run_job(store_dir: str, job: OnboardingJob, render: Callable, kwargs: dict) -> OnboardingJob:
+    """Render one job and record its progress in the store (runs in the worker)."""
+    store = OnboardingJobStore(store_dir)
+    job.status = RUNNING
+    store.save(job)
+    try:
+        html_path, pdf_path = render(**kwargs)
+    except (Exception, SystemExit) as exc:  # the generator exits when its template is missing
+        job.status = FAILED
+        job.error = str(exc) or exc.__class__.__name__
+    else:
+        job.status = SUCCEEDED
+        job.html_path = str(html_path)
+        job.pdf_path = str(pdf_path) if pdf_path is not None else None
+    job.finished_at = datetime.now(timezone.utc)
+    store.save(job)
+    return job
+
+
+class OnboardingJobQueue:
+    """Run document renders on a process pool and track them by job id."""
+
+    def __init__(
+        self,
+        max_workers: int = 1,
+        max_jobs: int = MAX_JOBS,
+        store_dir: Optional[Union[str, Path]] = None,
+    ) -> None:
+        self.max_workers = max_workers
+        self.max_jobs = max_jobs
+        # None: settings.ONBOARDING_JOB_DIR, read on each use
+        self.store_dir = store_dir
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # future and pool of the jobs this process submitted, for `wait`
+        self._futures: Dict[str, Tuple[Future, Optional[ProcessPoolExecutor]]] = {}
+        self._lock = threading.Lock()
+        self._finish_lock = threading.Lock()
+
+    @property
+    def store(self) -> OnboardingJobStore:
+        return OnboardingJobStore(self.store_dir if self.store_dir is not None else settings.ONBOARDING_JOB_DIR)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn, not fork: the API process runs threads (threadpool,
+                # periodic tasks) whose locks a forked child could inherit held
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+
+    def _discard_executor(self, executor: ProcessPoolExecutor) -> None:
+        """Forget a broken pool so the next submit starts a fresh one."""
+        with self._lock:
+            if self._executor is not executor:
+                return
+            self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, company_id: int, render: Callable, /, **kwargs) -> OnboardingJob:
+        """Queue `render(**kwargs)` and return its job without waiting.
+
+        `render` must be a module-level function returning
+        (html_path, pdf_path_or_none), and `kwargs` must be picklable: they
+        are sent to a worker process.
+        """
+        store = self.store
+        job = OnboardingJob(
+            id=uuid.uuid4().hex,
+            company_id=company_id,
+            environment=kwargs.get("environment", ""),
+        )
+        store.save(job)
+        store.prune(self.max_jobs)
+
+        executor = None
+        if self.max_workers <= 0:
+            future: Future = Future()
+            future.set_running_or_notify_cancel()
+            future.set_result(run_job(str(store.directory), job, render, kwargs))
+        else:
+            executor = self._get_executor()
+            try:
+                future = executor.submit(run_job, str(store.directory), job, render, kwargs)
+            except BrokenProcessPool:
+                # a worker died (OOM kill, segfault in a native library)
+                self._discard_executor(executor)
+                executor = self._get_executor()
+                future = executor.submit(run_job, str(store.directory), job, render, kwargs)
+
+        with self._lock:
+            self._futures[job.id] = (future, executor)
+        future.add_done_callback(lambda f: self._finish(store, job, f))
+        return job
+
+    def _finish(self, store: OnboardingJobStore, job: OnboardingJob, future: Future) -> None:
+        # serialised so `wait` only returns once the done callback recorded the outcome
+        with self._finish_lock:
+            with self._lock:
+                submitted = self._futures.pop(job.id, None)
+            if submitted is None:
+                return  # already handled by `wait` or the done callback
+            executor = submitted[1]
+            if future.cancelled():
+                error = "cancelled"
+            else:
+                exc = future.exception()
+                if exc is None:
+                    return  # the worker recorded the outcome itself
+                error = str(exc) or exc.__class__.__name__
+                if isinstance(exc, BrokenProcessPool) and executor is not None:
+                    self._discard_executor(executor)
+            # the worker never recorded an outcome: it was cancelled or died
+            job.status = FAILED
+            job.error = error
+            job.finished_at = datetime.now(timezone.utc)
+            store.save(job)
+        logger.warning("Onboarding job %s for company %s failed: %s", job.id, job.company_id, error)
+
+    def get(self, job_id: str) -> Optional[OnboardingJob]:
+        return self.store.load(job_id)
+
+    def wait(self, job: OnboardingJob, timeout: Optional[float] = None) -> OnboardingJob:
+        """Block until `job` finished and return its final state.
+
+        Only jobs submitted by this process can be waited for; raises
+        `concurrent.futures.TimeoutError`.
+        """
+        with self._lock:
+            future, _ = self._futures.get(job.id, (None, None))
+        if future is not None:
+            future.exception(timeout=timeout)
+            # waiters wake up before done callbacks run, so record a crash here too
+            self._finish(self.store, job, future)
+        return self.get(job.id) or job
+
+    async def wait_async(self, job: OnboardingJob, timeout: Optional[float] = None) -> OnboardingJob:
+        """`wait` for async endpoints: the event loop stays free meanwhile.
+
+        Raises `asyncio.TimeoutError`. A failed render is recorded on the job,
+        never raised.
+        """
+        with self._lock:
+            future, _ = self._futures.get(job.id, (None, None))
+        if future is not None:
+            loop = asyncio.get_running_loop()
+            finished = asyncio.Event()
+            future.add_done_callback(lambda f: loop.call_soon_threadsafe(finished.set))
+            await asyncio.wait_for(finished.wait(), timeout)
+        return self.wait(job)
+
+    def shutdown(self) -> None:
+        """Stop the worker processes; renders still queued are cancelled."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+onboarding_jobs = OnboardingJobQueue(max_workers=settings.ONBOARDING_JOB_WORKERS)
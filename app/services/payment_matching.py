@@ -0,0 +1,205 @@
+"""Scored matching of stored payments against a merchant order.
+
+The engine works on a candidate window loaded with a single query (see
+`payment_repository.get_candidate_window`). Two conditions are hard:
+
+- payer phone: when the merchant gives one, only payments from that payer
+  (same trailing digits, so `0501234567` equals `+971501234567`) are
+  candidates; another payer's payment is never returned.
+- amount: a payment of exactly the expected amount always ranks above every
+  payment of another amount, however recent.
+
+Within those groups candidates are ranked on a weighted score, returned with
+a confidence value:
+
+- amount: relative distance between the payment amount and the expected amount
+- time: how recent the payment is within the matching window
+- txn: whether the stored txn_id equals or starts with the merchant's hint
+
+Signals the merchant did not provide (txn id) are left out of the weighting,
+so a request with only an amount is scored on amount and time.
+"""
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import List, Optional, Sequence
+
+from app.models.payment import Payment
+
+
+# Relative weight of each signal in the combined score
+SIGNAL_WEIGHTS = {
+    "amount": 0.5,
+    "time": 0.2,
+    "txn": 0.15,
+}
+
+# Largest difference still treated as the expected amount
+AMOUNT_TOLERANCE = 0.01
+# Trailing digits two phones must share to be the same payer; ignores
+# country code and trunk prefix (`0501234567` == `+971501234567`)
+PHONE_MATCH_DIGITS = 9
+
+
+@dataclass(frozen=True)
+class MatchResult:
+    """Best candidate of a scored match and how much it can be trusted."""
+
+    payment: Payment
+    score: float
+    confidence: float
+    exact_amount: bool = False
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        # SQLite returns naive timestamps; they are stored as UTC
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _digits(phone: Optional[str]) -> str:
+    return "".join(ch for ch in (phone or "") if ch.isdigit())
+
+
+def phone_digits_suffix(payer_phone: Optional[str]) -> str:
+    """Trailing digits identifying a payer, used to narrow the window in SQL."""
+    return _digits(payer_phone)[-PHONE_MATCH_DIGITS:]
+
+
+def same_payer(phone: Optional[str], payer_phone: str) -> bool:
+    have, wanted = phone_digits_suffix(phone), phone_digits_suffix(payer_phone)
+    if not have or not wanted:
+        return False
+    length = min(len(have), len(wanted))
+    return have[-length:] == wanted[-length:]
+
+
+def is_exact_amount(amount: Optional[float], expected: float) -> bool:
+    return abs(float(amount or 0) - float(expected)) <= AMOUNT_TOLERANCE
+
+
+def amount_scores(amounts: Sequence[float], expected: float) -> List[float]:
+    """Score amounts by relative distance to `expected` (1.0 means exact)."""
+    scale = max(abs(float(expected)), 1.0)
+    return [max(0.0, 1.0 - abs(float(a or 0) - float(expected)) / scale) for a in amounts]
+
+
+def time_scores(created: Sequence[Optional[datetime]], now: datetime, window_minutes: int) -> List[float]:
+    """Score timestamps linearly from 1.0 (now) down to 0.0 (window edge)."""
+    window_seconds = max(float(window_minutes) * 60.0, 1.0)
+    now = _as_utc(now)
+    out: List[float] = []
+    for ts in created:
+        ts = _as_utc(ts)
+        if ts is None:
+            out.append(0.0)
+            continue
+        age = max((now - ts).total_seconds(), 0.0)
+        out.append(max(0.0, 1.0 - age / window_seconds))
+    return out
+
+
+def txn_scores(txn_ids: Sequence[Optional[str]], txn_hint: str) -> List[float]:
+    """Score txn ids: 1.0 on equality, the covered fraction on a prefix match."""
+    hint = txn_hint.strip().lower()
+    out: List[float] = []
+    for txn in txn_ids:
+        value = (txn or "").strip().lower()
+        if not value or not hint:
+            out.append(0.0)
+        elif value == hint:
+            out.append(1.0)
+        elif value.startswith(hint):
+            out.append(len(hint) / len(value))
+        else:
+            out.append(0.0)
+    return out
+
+
+def score_candidates(
+    candidates: Sequence[Payment],
+    expected_amount: float,
+    payer_phone: Optional[str] = None,
+    txn_id: Optional[str] = None,
+    window_minutes: int = 30,
+    now: Optional[datetime] = None,
+) -> List[MatchResult]:
+    """Score every candidate in one pass and return them best-first.
+
+    Candidates from another payer than `payer_phone` are dropped. The rest
+    are ordered exact-amount first, then by the combined score: each signal is
+    computed column-wise over the window and the columns are combined with
+    `SIGNAL_WEIGHTS`. Results carry their raw score as confidence;
+    `best_match` discounts it by how close the runner-up is.
+    """
+    if payer_phone:
+        candidates = [c for c in candidates if same_payer(c.payer_phone, payer_phone)]
+    if not candidates:
+        return []
+
+    now = now or datetime.now(timezone.utc)
+
+    columns = [
+        (SIGNAL_WEIGHTS["amount"], amount_scores([c.amount for c in candidates], expected_amount)),
+        (SIGNAL_WEIGHTS["time"], time_scores([c.created_at for c in candidates], now, window_minutes)),
+    ]
+    if txn_id:
+        columns.append((SIGNAL_WEIGHTS["txn"], txn_scores([c.txn_id for c in candidates], txn_id)))
+
+    total_weight = sum(weight for weight, _ in columns)
+    scores = [
+        sum(weight * values[i] for weight, values in columns) / total_weight
+        for i in range(len(candidates))
+    ]
+    results = [
+        MatchResult(
+            payment=c,
+            score=round(score, 4),
+            confidence=round(score, 4),
+            exact_amount=is_exact_amount(c.amount, expected_amount),
+        )
+        for c, score in zip(candidates, scores)
+    ]
+    return sorted(results, key=lambda r: (r.exact_amount, r.score), reverse=True)
+
+
+def best_match(
+    candidates: Sequence[Payment],
+    expected_amount: float,
+    payer_phone: Optional[str] = None,
+    txn_id: Optional[str] = None,
+    window_minutes: int = 30,
+    now: Optional[datetime] = None,
+) -> Optional[MatchResult]:
+    """Return the best-ranked candidate, or None when none qualifies.
+
+    Confidence equals the score when the best candidate is alone in its
+    group (exact amount or not), and drops towards half the score as the
+    runner-up of that group approaches it, so two equally plausible payments
+    never yield a confident match.
+    """
+    ranked = score_candidates(
+        candidates,
+        expected_amount=expected_amount,
+        payer_phone=payer_phone,
+        txn_id=txn_id,
+        window_minutes=window_minutes,
+        now=now,
+    )
+    if not ranked:
+        return None
+
+    best = ranked[0]
+    if len(ranked) == 1 or best.score <= 0 or ranked[1].exact_amount != best.exact_amount:
+        return best
+
+    runner_up = ranked[1]
+    confidence = best.score * (1.0 - 0.5 * (runner_up.score / best.score))
+    return MatchResult(
+        payment=best.payment,
+        score=best.score,
+        confidence=round(confidence, 4),
+        exact_amount=best.exact_amount,
+    )
@@ -1,10 +1,13 @@
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import secrets
 from typing import Optional
 
 from sqlalchemy.orm import Session
 
+from app.config import settings
 from app.models.payment import Payment
+import app.repositories.payment_repository as payment_repository
+from app.services.hot_payment_index import hot_payment_index
 from app.schemas.payment_api import (
     PaymentCheckRequest,
     PaymentMatchInfo,
@@ -14,6 +17,22 @@ from app.schemas.payment_api import (
 )
 
 
+def confirm_token_expiry() -> datetime:
+    """Return the expiry timestamp for a confirm token issued now (UTC)."""
+    return datetime.now(timezone.utc) + timedelta(minutes=settings.CONFIRM_TOKEN_TTL_MINUTES)
+
+
+def is_confirm_token_expired(payment: Payment) -> bool:
+    """True when the payment's confirm token carries an expiry in the past."""
+    expires_at = payment.confirm_expires_at
+    if expires_at is None:
+        return False
+    if expires_at.tzinfo is None:
+        # SQLite returns naive timestamps; they are stored as UTC
+        expires_at = expires_at.replace(tzinfo=timezone.utc)
+    return expires_at < datetime.now(timezone.utc)
+
+
 class PaymentService:
     @staticmethod
     def check_payment_for_company(
@@ -30,20 +49,41 @@ class PaymentService:
         max_age = req.max_age_minutes or 30
         cutoff = datetime.utcnow() - timedelta(minutes=max_age)
 
-        q = (
-            db.query(Payment)
-            .filter(
-                Payment.company_id == company_id,
-                Payment.created_at >= cutoff,
-            )
-            .filter(Payment.status != "used")
-        )
+        if settings.HOT_PAYMENT_INDEX_ENABLED:
+            resp = PaymentService._check_hot_window(db, company_id, req, cutoff)
+            if resp is not None:
+                return resp
 
         if req.txn_id is not None:
-            q = q.filter(Payment.txn_id == req.txn_id)
-
-        # order by newest first
-        payment: Optional[Payment] = q.order_by(Payment.created_at.desc()).first()
+            # txn_id pins the payment; the amount is compared below so a wrong
+            # expected_amount is still reported as amount_mismatch.
+            payment: Optional[Payment] = payment_repository.find_check_candidate(
+                db,
+                company_id=company_id,
+                created_after=cutoff,
+                txn_id=req.txn_id,
+                payer_phone=req.payer_phone,
+                order_id=req.order_id,
+            )
+        else:
+            # the newest payment of the expected amount (an index seek) ...
+            payment = payment_repository.find_check_candidate(
+                db,
+                company_id=company_id,
+                created_after=cutoff,
+                amount=req.expected_amount,
+                payer_phone=req.payer_phone,
+                order_id=req.order_id,
+            )
+            if payment is None:
+                # ... or else the newest candidate, for the amount_mismatch hint
+                payment = payment_repository.find_check_candidate(
+                    db,
+                    company_id=company_id,
+                    created_after=cutoff,
+                    payer_phone=req.payer_phone,
+                    order_id=req.order_id,
+                )
 
         if payment is None:
             return PaymentCheckResponse(found=False, match=False)
@@ -71,10 +111,12 @@ class PaymentService:
         payment.status = "pending_confirmation"
         payment.order_id = req.order_id
         payment.confirm_token = confirm_token
+        payment.confirm_expires_at = confirm_token_expiry()
 
         db.add(payment)
         db.commit()
         db.refresh(payment)
+        hot_payment_index.discard(company_id, payment.id)
 
         match_info = PaymentMatchInfo(
             payment_id=payment.id,
@@ -92,6 +134,58 @@ class PaymentService:
             payment=match_info,
         )
 
+    @staticmethod
+    def _check_hot_window(
+        db: Session,
+        company_id: int,
+        req: PaymentCheckRequest,
+        cutoff: datetime,
+    ) -> Optional[PaymentCheckResponse]:
+        """
+        Answer a check from the in-memory hot window, or return None on a miss.
+
+        Only full matches are answered here; the claim is a conditional UPDATE,
+        so a stale index entry just falls through to the database path.
+        """
+        hot = hot_payment_index.lookup(
+            company_id,
+            created_after=cutoff,
+            amount=req.expected_amount if req.txn_id is None else None,
+            txn_id=req.txn_id,
+            payer_phone=req.payer_phone,
+        )
+        if hot is None or hot.amount != req.expected_amount:
+            return None
+
+        confirm_token = secrets.token_urlsafe(32)
+        claimed = payment_repository.claim_for_confirmation(
+            db,
+            payment_id=hot.payment_id,
+            company_id=company_id,
+            amount=req.expected_amount,
+            order_id=req.order_id,
+            confirm_token=confirm_token,
+            confirm_expires_at=confirm_token_expiry(),
+            txn_id=req.txn_id,
+        )
+        hot_payment_index.discard(company_id, hot.payment_id)
+        if not claimed:
+            return None
+
+        return PaymentCheckResponse(
+            found=True,
+            match=True,
+            confirm_token=confirm_token,
+            order_id=req.order_id,
+            payment=PaymentMatchInfo(
+                payment_id=hot.payment_id,
+                txn_id=hot.txn_id,
+                amount=hot.amount,
+                currency=hot.currency,
+                created_at=hot.created_at,
+            ),
+        )
+
     @staticmethod
     def confirm_payment_for_company(
         db: Session,
@@ -122,12 +216,14 @@ class PaymentService:
                 status=payment.status,
             )
 
+        if is_confirm_token_expired(payment):
+            raise ValueError("Confirm token expired")
+
         # normal confirm flow
-        payment.status = "used"
-        payment.used_at = datetime.utcnow()
-        db.add(payment)
-        db.commit()
-        db.refresh(payment)
+        with unit_of_work(db):
+            payment.status = "used"
+            payment.used_at = datetime.utcnow()
+            db.add(payment)
 
         return PaymentConfirmResponse(
             success=True,
@@ -151,11 +247,17 @@ from datetime import datetime, timedelta, timezone
 from typing import Optional
 
 import app.repositories.payment_repository as payment_repository
-from app.services.wallet_service import update_wallet_usage
+from app.services import payment_matching
+from app.services.payment_matching import MatchResult
+from app.db.session import unit_of_work
+from app.services.wallet_service import increment_wallet_usage
 import logging
 
 logger = logging.getLogger("payment_gateway")
 
+# Time-proximity horizon (minutes) used for scoring when no max age is given
+MATCH_WINDOW_MINUTES = 24 * 60
+
 
 def create_payment_from_sms(db: Session, payment_data: dict) -> Payment:
     """Create and persist a Payment from a normalized payment_data mapping.
@@ -182,37 +284,49 @@ def create_payment_from_sms(db: Session, payment_data: dict) -> Payment:
 
     payment = Payment(**filtered_data)
     # Delegate persistence to the repository
-    return payment_repository.create(db, payment)
+    payment = payment_repository.create(db, payment)
+    hot_payment_index.add(payment)
+    return payment
 
 
-def match_payment_for_order(
+def find_best_match(
     db: Session,
     company_id: int,
     amount: float,
     currency: str,
     payer_phone: Optional[str] = None,
+    txn_id: Optional[str] = None,
     max_age_minutes: Optional[int] = None,
-) -> Optional[Payment]:
-    """Find a recent payment matching the provided criteria.
+) -> Optional[MatchResult]:
+    """Score the company's candidate window and return the best match.
 
     Args:
         db: SQLAlchemy `Session` used to query payments.
         company_id: Company identifier to scope payment search.
-        amount: Expected payment amount (used for tolerance checks elsewhere).
+        amount: Expected payment amount.
         currency: Currency code to match (e.g., 'USD').
-        payer_phone: Optional phone number to further scope results.
+        payer_phone: Optional payer phone; payments of other payers are never returned.
+        txn_id: Optional full or partial provider transaction id.
         max_age_minutes: If provided, restrict to payments created within this many minutes.
 
     Returns:
-        The most-recent `Payment` matching the criteria, or `None` when no candidate found.
+        A `MatchResult` (payment, score, confidence, exact_amount) or `None`
+        when no candidate qualifies. Exact-amount payments always rank first.
     """
-    # Delegate querying to the repository (keeps same filtering & ordering logic)
-    return payment_repository.find_most_recent_matching(
+    candidates = payment_repository.get_candidate_window(
         db=db,
         company_id=company_id,
         currency=currency,
-        payer_phone=payer_phone,
         max_age_minutes=max_age_minutes,
+        payer_phone_suffix=payment_matching.phone_digits_suffix(payer_phone) or None,
+    )
+    window_minutes = max_age_minutes if max_age_minutes is not None else MATCH_WINDOW_MINUTES
+    return payment_matching.best_match(
+        candidates,
+        expected_amount=amount,
+        payer_phone=payer_phone,
+        txn_id=txn_id,
+        window_minutes=window_minutes,
     )
 
 
@@ -229,33 +343,34 @@ def mark_payment_pending_confirmation(db: Session, payment: Payment) -> Payment:
     """
     payment.status = "pending_confirmation"
     payment.confirm_token = generate_confirm_token()
+    payment.confirm_expires_at = confirm_token_expiry()
     db.add(payment)
     db.commit()
     db.refresh(payment)
+    hot_payment_index.discard(payment.company_id, payment.id)
     return payment
 
 
 def confirm_payment_usage(db: Session, payment: Payment) -> Payment:
     """Confirm the usage of a payment.
 
-    Actions performed:
+    Actions performed, in a single transaction:
     - set `payment.status = 'used'`
     - set `payment.used_at` to now
-    - persist changes
-    - if `payment.wallet_id` is present, call `update_wallet_usage` to reflect
-      the consumed amount against the wallet.
+    - if `payment.wallet_id` is present, call `increment_wallet_usage` to
+      reflect the consumed amount against the wallet.
 
-    Returns the refreshed `Payment` instance.
+    If the wallet increment fails (e.g. daily limit exceeded) nothing is
+    committed. Returns the `Payment` instance without re-reading it.
     """
-    payment.status = "used"
-    # Use timezone-aware UTC timestamp
-    payment.used_at = datetime.now(timezone.utc)
-    db.add(payment)
-    db.commit()
-    db.refresh(payment)
-
-    if payment.wallet_id:
-        # Update wallet usage (implementation provided by wallet_service)
-        update_wallet_usage(db, payment.wallet_id, payment.amount)
+    with unit_of_work(db):
+        payment.status = "used"
+        # Use timezone-aware UTC timestamp
+        payment.used_at = datetime.now(timezone.utc)
+        db.add(payment)
+        if payment.wallet_id:
+            # Conditional UPDATE on the wallet (implementation in wallet_service)
+            increment_wallet_usage(db, payment.wallet_id, payment.amount)
+    hot_payment_index.discard(payment.company_id, payment.id)
 
     return payment
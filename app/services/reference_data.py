@@ -0,0 +1,190 @@
+"""Process-wide cache of geo and payment-provider reference data.
+
+Countries, payment providers and their country links change only through the
+admin create endpoints, yet they are read by every admin page load, every
+company create/update and every wallet selection filtered by provider. This
+module keeps an immutable snapshot of all of them per database engine, loaded
+in three queries and shared by every request of the process.
+
+The cache is versioned: `invalidate()` (called by the geo/provider create
+services after their commit) bumps the version, and every snapshot loaded
+under an older version is reloaded on its next read. Snapshots also expire
+after `REFERENCE_DATA_TTL_SECONDS`, which bounds staleness for changes made
+outside this process (another worker, a seed script). Each worker process
+keeps its own cache.
+
+Reloads run outside the cache lock, one per database at a time: concurrent
+readers wait for it, or keep the previous snapshot when it only expired.
+For `READ_REPLICA_MAX_LAG_SECONDS` after an invalidation the read replica's
+snapshot is loaded from the primary, which already has the write.
+"""
+from dataclasses import dataclass, field
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+from weakref import WeakKeyDictionary
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.country import Country, CountryPaymentProvider, PaymentProvider
+from app.schemas.admin_geo import AdminCountryOut, AdminPaymentProviderOut
+
+logger = logging.getLogger("payment_gateway")
+
+
+@dataclass(frozen=True)
+class ReferenceData:
+    """Immutable snapshot of the reference tables."""
+
+    version: int
+    loaded_at: float
+    # both sorted by name, as the admin listings return them
+    countries: List[AdminCountryOut] = field(default_factory=list)
+    providers: List[AdminPaymentProviderOut] = field(default_factory=list)
+    countries_by_code: Dict[str, AdminCountryOut] = field(default_factory=dict)
+    providers_by_code: Dict[str, AdminPaymentProviderOut] = field(default_factory=dict)
+    # country code -> supported providers, in link order
+    providers_by_country: Dict[str, List[AdminPaymentProviderOut]] = field(default_factory=dict)
+
+    def provider_id(self, code: str) -> Optional[int]:
+        provider = self.providers_by_code.get(code)
+        return provider.id if provider is not None else None
+
+
+def load_reference_data(db: Session, version: int = 0) -> ReferenceData:
+    """Read the reference tables into a new snapshot (three queries)."""
+    countries = [
+        AdminCountryOut.model_validate(c) for c in db.query(Country).order_by(Country.name.asc()).all()
+    ]
+    providers = [
+        AdminPaymentProviderOut.model_validate(p)
+        for p in db.query(PaymentProvider).order_by(PaymentProvider.name.asc()).all()
+    ]
+    countries_by_id = {c.id: c for c in countries}
+    providers_by_id = {p.id: p for p in providers}
+
+    providers_by_country: Dict[str, List[AdminPaymentProviderOut]] = {c.code: [] for c in countries}
+    links = (
+        db.query(CountryPaymentProvider.country_id, CountryPaymentProvider.provider_id)
+        .filter(CountryPaymentProvider.is_supported.is_(True))
+        .order_by(CountryPaymentProvider.id.asc())
+        .all()
+    )
+    for country_id, provider_id in links:
+        country = countries_by_id.get(country_id)
+        provider = providers_by_id.get(provider_id)
+        if country is not None and provider is not None:
+            providers_by_country[country.code].append(provider)
+
+    return ReferenceData(
+        version=version,
+        loaded_at=time.monotonic(),
+        countries=countries,
+        providers=providers,
+        countries_by_code={c.code: c for c in countries},
+        providers_by_code={p.code: p for p in providers},
+        providers_by_country=providers_by_country,
+    )
+
+
+def _primary_session_factory(engine) -> Optional[Callable[[], Session]]:
+    """Session factory of the primary when `engine` is the read replica."""
+    from app.db import session as db_session
+
+    if db_session.read_engine is None or engine is not db_session.read_engine:
+        return None
+    return db_session.SessionLocal
+
+
+class ReferenceDataCache:
+    def __init__(self, ttl_seconds: float = 300.0) -> None:
+        self.ttl_seconds = ttl_seconds
+        self._version = 0
+        self._invalidated_at: Optional[float] = None
+        # keyed by engine so a read replica, or each test database, has its own snapshot
+        self._snapshots: "WeakKeyDictionary" = WeakKeyDictionary()
+        # engine -> event set when its running reload finished
+        self._loading: Dict[object, threading.Event] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def _is_current(self, snapshot: Optional[ReferenceData]) -> bool:
+        return (
+            snapshot is not None
+            and snapshot.version == self._version
+            and time.monotonic() - snapshot.loaded_at < self.ttl_seconds
+        )
+
+    def _load(self, db: Session, engine, version: int, invalidated_at: Optional[float]) -> ReferenceData:
+        recently_invalidated = (
+            invalidated_at is not None
+            and time.monotonic() - invalidated_at < settings.READ_REPLICA_MAX_LAG_SECONDS
+        )
+        primary_factory = _primary_session_factory(engine) if recently_invalidated else None
+        if primary_factory is None:
+            return load_reference_data(db, version=version)
+        # the replica may not have replayed the write that invalidated the cache
+        primary = primary_factory()
+        try:
+            return load_reference_data(primary, version=version)
+        finally:
+            primary.close()
+
+    def get(self, db: Session) -> ReferenceData:
+        """Current snapshot for the database behind `db`, loading it if needed."""
+        bind = db.get_bind()
+        engine = getattr(bind, "engine", bind)
+        snapshot = self._snapshots.get(engine)
+        if self._is_current(snapshot):
+            return snapshot
+        while True:
+            with self._lock:
+                snapshot = self._snapshots.get(engine)
+                if self._is_current(snapshot):
+                    return snapshot
+                loading = self._loading.get(engine)
+                if loading is None:
+                    loading = self._loading[engine] = threading.Event()
+                    version, invalidated_at = self._version, self._invalidated_at
+                    break
+                if snapshot is not None and snapshot.version == self._version:
+                    # only expired: keep serving it while another request reloads
+                    return snapshot
+            loading.wait()
+
+        try:
+            snapshot = self._load(db, engine, version, invalidated_at)
+            with self._lock:
+                self._snapshots[engine] = snapshot
+            return snapshot
+        finally:
+            with self._lock:
+                self._loading.pop(engine, None)
+            loading.set()
+
+    def invalidate(self) -> None:
+        """Make every snapshot reload on its next read."""
+        with self._lock:
+            self._version += 1
+            self._invalidated_at = time.monotonic()
+
+
+reference_data = ReferenceDataCache(ttl_seconds=settings.REFERENCE_DATA_TTL_SECONDS)
+
+
+def preload_reference_data() -> None:
+    """Load the primary database's snapshot at startup; failures are only logged."""
+    from app.db.session import SessionLocal
+
+    db = SessionLocal()
+    try:
+        reference_data.get(db)
+    except Exception:
+        logger.warning("Could not preload reference data; it will be loaded on first use", exc_info=True)
+    finally:
+        db.close()
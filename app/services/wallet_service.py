@@ -8,11 +8,13 @@ and signatures are preserved.
 """
 from typing import Optional
 from sqlalchemy.orm import Session
-from datetime import date
 from app.models.wallet import Wallet
-from sqlalchemy import asc
+from sqlalchemy import asc, case, or_, update
+
+from app.db.session import unit_of_work
 
 import app.repositories.wallet_repository as wallet_repository
+from app.services.reference_data import reference_data
 from datetime import datetime, time
 from typing import List
 from app.models.payment import Payment
@@ -26,12 +28,12 @@ def reset_wallet_if_needed(wallet: Wallet, db: Session) -> None:
         db: SQLAlchemy `Session` used to persist changes when a reset occurs.
 
     Behavior:
-        - If `wallet.last_reset_date` is None or older than today, set
+        - If `wallet.last_reset_date` is None or older than today (UTC), set
           `wallet.used_today = 0.0` and update `wallet.last_reset_date` to today,
           then persist via `db.add`, `db.commit`, `db.refresh`.
         - Otherwise perform no changes.
     """
-    today = date.today()
+    today = wallet_repository.wallet_day()
     if wallet.last_reset_date is None or wallet.last_reset_date < today:
         wallet.used_today = 0.0
         wallet.last_reset_date = today
@@ -58,44 +60,55 @@ def find_available_wallet(db: Session, company_id: int, amount: float) -> Option
     return None
 
 
+def increment_wallet_usage(db: Session, wallet_id: int, amount: float) -> Optional[Wallet]:
+    """Add `amount` to the wallet's `used_today` without committing.
+
+    The daily reset and the limit check are folded into a single conditional
+    UPDATE, so the wallet is never read first and concurrent confirmations
+    cannot push it over its limit. The caller owns the transaction.
+
+    Returns:
+        The updated `Wallet` (loaded from UPDATE ... RETURNING where the
+        dialect supports it), or `None` when the wallet does not exist.
+
+    Raises:
+        ValueError: if the increment would exceed `daily_limit`.
+    """
+    today = wallet_repository.wallet_day()
+    needs_reset = or_(Wallet.last_reset_date.is_(None), Wallet.last_reset_date < today)
+    new_usage = case((needs_reset, 0.0), else_=Wallet.used_today) + amount
+
+    stmt = (
+        update(Wallet)
+        .where(Wallet.id == wallet_id, new_usage <= Wallet.daily_limit)
+        .values(used_today=new_usage, last_reset_date=today)
+    )
+    if db.get_bind().dialect.update_returning:
+        wallet = db.scalars(stmt.returning(Wallet)).first()
+    else:
+        result = db.execute(stmt.execution_options(synchronize_session="fetch"))
+        wallet = db.get(Wallet, wallet_id) if result.rowcount else None
+
+    if wallet is None:
+        exists = db.query(Wallet.id).filter(Wallet.id == wallet_id).first()
+        if exists is not None:
+            raise ValueError("Daily limit exceeded")
+    return wallet
+
+
 def update_wallet_usage(db: Session, wallet_id: int, amount: float) -> Optional[Wallet]:
-    """Increment `used_today` on the wallet and persist changes.
+    """Increment `used_today` on the wallet and commit.
 
     Args:
-        db: SQLAlchemy `Session` used to query and persist the wallet.
+        db: SQLAlchemy `Session` used to persist the wallet.
         wallet_id: Identifier of the wallet to update.
         amount: Amount to add to the wallet's `used_today`.
 
     Returns:
         The updated `Wallet` when found and updated; otherwise `None`.
     """
-    wallet = wallet_repository.get_by_id(db, wallet_id)
-    if wallet:
-        reset_wallet_if_needed(wallet, db)
-        
-        # Atomic update to prevent race conditions
-        result = db.query(Wallet).filter(
-            Wallet.id == wallet_id,
-            Wallet.used_today + amount <= Wallet.daily_limit
-        ).update(
-            {"used_today": Wallet.used_today + amount},
-            synchronize_session=False
-        )
-        
-        if result == 0:
-            # Check if it failed because of limit or missing (we know it exists from get_by_id)
-            # Since we just fetched it, it's likely the limit.
-            # Refresh to see current state
-            db.refresh(wallet)
-            if wallet.used_today + amount > wallet.daily_limit:
-                raise ValueError("Daily limit exceeded")
-            # If result is 0 but limit not exceeded, something else happened (deleted?), return None
-            return None
-
-        db.commit()
-        db.refresh(wallet)
-        return wallet
-    return None
+    with unit_of_work(db):
+        return increment_wallet_usage(db, wallet_id, amount)
 
 
 class WalletService:
@@ -124,14 +137,14 @@ class WalletService:
 
         # Filter by preferred payment method if specified
         if preferred_payment_method is not None:
-            wallets = [
-                w for w in wallets
-                if w.channel and w.channel.provider and w.channel.provider.code == preferred_payment_method
-            ]
+            provider_id = reference_data.get(db).provider_id(preferred_payment_method)
+            if provider_id is None:
+                return None
+            wallets = [w for w in wallets if w.channel and w.channel.provider_id == provider_id]
             if not wallets:
                 return None
 
-        today = datetime.utcnow().date()
+        today = wallet_repository.wallet_day()
         candidates = []
 
         start_dt = datetime.combine(today, time.min)
@@ -1,22 +1,47 @@
 import argparse
-from datetime import date
+import hashlib
+import json
+import os
 from pathlib import Path
+import re
 import textwrap
+import uuid
 
 import markdown
 
-# حاول نستورد WeasyPrint، بس لا نفشل لو مش شغّال بالكامل (ويندوز 🙃)
-try:
-    from weasyprint import HTML  # type: ignore
-except Exception as e:  # ImportError أو مشاكل DLL
-    HTML = None
-    WEASYPRINT_IMPORT_ERROR = e
-else:
-    WEASYPRINT_IMPORT_ERROR = None
+# WeasyPrint (cairo, pango, fonts) ثقيل، فلا نستورده إلا عند أول PDF فعلاً:
+# load_weasyprint() تعيد الكلاس HTML أو None لو مش شغّال (ويندوز 🙃)
+HTML = None
+WEASYPRINT_IMPORT_ERROR = None
+_weasyprint_loaded = False
 
 
 TEMPLATE_PATH = Path("docs") / "MERCHANT_ONBOARDING_TEMPLATE.md"
 
+# الملفات المولّدة تُخزَّن باسم مشتق من hash القالب والمعاملات:
+#   <slug>-onboarding-<env>-<template digest[:8]>-<key[:16]>.html|.pdf
+# فنفس الطلب يرجع نفس الملفات بدون إعادة توليد
+CACHE_NAME_RE = re.compile(r"-onboarding-.*-(?P<template>[0-9a-f]{8})-[0-9a-f]{16}\.(html|pdf)$")
+# آخر digest للقالب تم تنظيف الملفات القديمة على أساسه
+TEMPLATE_MARKER = ".template-digest"
+
+# path -> (mtime_ns, size, text, sha256)
+_template_cache: dict = {}
+
+
+def load_weasyprint():
+    """Import WeasyPrint on first use; returns its `HTML` class or None."""
+    global HTML, WEASYPRINT_IMPORT_ERROR, _weasyprint_loaded
+    if not _weasyprint_loaded:
+        try:
+            from weasyprint import HTML as html_class  # type: ignore
+        except Exception as e:  # ImportError أو مشاكل DLL
+            html_class = None
+            WEASYPRINT_IMPORT_ERROR = e
+        HTML = html_class
+        _weasyprint_loaded = True
+    return HTML
+
 
 def slugify(name: str) -> str:
     base = name.strip().lower().replace(" ", "-")
@@ -24,11 +49,33 @@ def slugify(name: str) -> str:
     return "".join(ch for ch in base if ch.isalnum() or ch == "-") or "merchant"
 
 
-def render_template(merchant_name: str, api_key: str, base_url: str, environment: str) -> str:
+def load_template() -> tuple[str, str]:
+    """Return (template text, sha256 hex digest); re-read only when the file changes."""
     if not TEMPLATE_PATH.exists():
         raise SystemExit(f"Template not found at {TEMPLATE_PATH!s}")
 
-    template = TEMPLATE_PATH.read_text(encoding="utf-8")
+    stat = TEMPLATE_PATH.stat()
+    key = str(TEMPLATE_PATH.resolve())
+    cached = _template_cache.get(key)
+    if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        return cached[2], cached[3]
+
+    raw = TEMPLATE_PATH.read_bytes()
+    text = raw.decode("utf-8")
+    digest = hashlib.sha256(raw).hexdigest()
+    _template_cache[key] = (stat.st_mtime_ns, stat.st_size, text, digest)
+    return text, digest
+
+
+def render_template(
+    merchant_name: str,
+    api_key: str,
+    base_url: str,
+    environment: str,
+    template: str | None = None,
+) -> str:
+    if template is None:
+        template, _ = load_template()
 
     replacements = {
         "MERCHANT_NAME": merchant_name,
@@ -44,6 +91,53 @@ def render_template(merchant_name: str, api_key: str, base_url: str, environment
     return text
 
 
+def cache_key(template_digest: str, merchant_name: str, api_key: str, base_url: str, environment: str) -> str:
+    """Hash of everything the generated documents depend on."""
+    payload = json.dumps(
+        [template_digest, merchant_name, api_key, base_url, environment],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _write_atomic(path: Path, write) -> None:
+    # اكتب لملف مؤقت ثم rename، حتى لا يقرأ طلب آخر ملفاً نصف مكتوب
+    tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+def remove_stale_artifacts(output_dir: Path, template_digest: str) -> list[Path]:
+    """Delete cached documents rendered from another template version.
+
+    The directory is only scanned when the template digest differs from the
+    one recorded in `TEMPLATE_MARKER`. Files not named like cache entries
+    are left alone.
+    """
+    marker = output_dir / TEMPLATE_MARKER
+    try:
+        if marker.read_text(encoding="utf-8").strip() == template_digest:
+            return []
+    except OSError:
+        pass
+
+    removed = []
+    for path in output_dir.iterdir():
+        match = CACHE_NAME_RE.search(path.name)
+        if match is not None and match.group("template") != template_digest[:8]:
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                continue
+            removed.append(path)
+    _write_atomic(marker, lambda tmp: tmp.write_text(template_digest, encoding="utf-8"))
+    return removed
+
+
 def build_html(markdown_text: str, title: str) -> str:
     body = markdown.markdown(
         markdown_text,
@@ -111,34 +205,48 @@ def generate_onboarding(
 ) -> tuple[Path, Path | None]:
     """Generate onboarding HTML and optionally PDF.
 
+    Files are named after a hash of the template content and the parameters,
+    so repeating a request returns the existing files without rendering
+    anything; documents of an older template are deleted once it changes.
+
     Returns (html_path, pdf_path_or_none).
     """
-    markdown_text = render_template(
-        merchant_name=merchant_name,
-        api_key=api_key,
-        base_url=base_url,
-        environment=environment,
-    )
+    template, template_digest = load_template()
+    key = cache_key(template_digest, merchant_name, api_key, base_url, environment)
 
     slug = slugify(merchant_name)
-    today = date.today().isoformat()
     output_dir = Path(output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
+    remove_stale_artifacts(output_dir, template_digest)
 
-    base_name = f"{slug}-onboarding-{environment}-{today}"
+    base_name = f"{slug}-onboarding-{environment}-{template_digest[:8]}-{key[:16]}"
     html_path = output_dir / f"{base_name}.html"
     pdf_path = output_dir / f"{base_name}.pdf"
 
-    html = build_html(markdown_text, title=f"{merchant_name} – Onboarding")
-
-    html_path.write_text(html, encoding="utf-8")
+    if html_path.exists():
+        html = None
+    else:
+        markdown_text = render_template(
+            merchant_name=merchant_name,
+            api_key=api_key,
+            base_url=base_url,
+            environment=environment,
+            template=template,
+        )
+        html = build_html(markdown_text, title=f"{merchant_name} – Onboarding")
+        _write_atomic(html_path, lambda tmp: tmp.write_text(html, encoding="utf-8"))
 
+    if pdf_path.exists():
+        return html_path, pdf_path
     # If WeasyPrint is not importable, return None for pdf_path
-    if HTML is None:
+    html_class = load_weasyprint()
+    if html_class is None:
         return html_path, None
 
+    if html is None:
+        html = html_path.read_text(encoding="utf-8")
     try:
-        HTML(string=html).write_pdf(str(pdf_path))
+        _write_atomic(pdf_path, lambda tmp: html_class(string=html).write_pdf(str(tmp)))
     except Exception:
         return html_path, None
     return html_path, pdf_path
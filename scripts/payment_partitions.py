@@ -0,0 +1,67 @@
+"""Maintenance command for the monthly payments partitions (Postgres).
+
+Usage:
+    python scripts/payment_partitions.py list
+    python scripts/payment_partitions.py ensure [--months-ahead 2]
+    python scripts/payment_partitions.py retire --keep-months 12 [--action detach|archive|drop]
+
+`retire` handles partitions whose whole month is older than `--keep-months`
+full months: "detach" leaves them as standalone tables, "archive" also moves
+them into the `archive` schema, and "drop" deletes them.
+
+`ensure` and `retire` take the same advisory lock as the periodic partition
+job and exit with status 1 when another process holds it.
+"""
+import argparse
+import os
+import sys
+
+sys.path.append(os.getcwd())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list", help="show attached monthly partitions")
+    ensure = sub.add_parser("ensure", help="create the current and upcoming monthly partitions")
+    ensure.add_argument("--months-ahead", type=int, default=None)
+    retire = sub.add_parser("retire", help="detach, archive or drop old partitions")
+    retire.add_argument("--keep-months", type=int, required=True)
+    retire.add_argument("--action", choices=["detach", "archive", "drop"], default="detach")
+    args = parser.parse_args(argv)
+
+    from app.config import settings
+    from app.db import partitioning
+    from app.db.session import engine
+    from app.services.maintenance import PARTITION_MAINTENANCE_JOB, run_exclusively
+
+    with engine.connect() as conn:
+        if not partitioning.is_partitioned(conn):
+            print("payments is not partitioned on this database; nothing to do")
+            return 0
+        if args.command == "list":
+            for partition in partitioning.list_partitions(conn):
+                print(f"{partition.name}\t{partition.start}\t{partition.end}")
+            return 0
+
+    def run():
+        with engine.begin() as conn:
+            if args.command == "ensure":
+                months_ahead = args.months_ahead
+                if months_ahead is None:
+                    months_ahead = settings.PAYMENT_PARTITIONS_MONTHS_AHEAD
+                created = partitioning.ensure_monthly_partitions(conn, months_ahead=months_ahead)
+                return "created: " + (", ".join(created) or "none")
+            retired = partitioning.retire_partitions(conn, keep_months=args.keep_months, action=args.action)
+            return f"{args.action}: " + (", ".join(retired) or "none")
+
+    result = run_exclusively(PARTITION_MAINTENANCE_JOB, run)
+    if result is None:
+        print("partition maintenance is running in another process; try again later")
+        return 1
+    print(result)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
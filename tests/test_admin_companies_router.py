@@ -214,3 +214,154 @@ def test_toggle_company_active_flips_flag_via_endpoint():
     toggled = toggle_resp.json()
     assert toggled.get("id") == company_id
     assert toggled.get("is_active") != initial_active
+
+
+def test_list_companies_answers_if_none_match_with_304_until_a_write():
+    from sqlalchemy import event
+
+    app, SessionLocal = create_test_app_and_db()
+    client = TestClient(app)
+
+    db = SessionLocal()
+    db.add(PaymentProvider(code="eand_money", name="e& money"))
+    db.commit()
+    db.close()
+    created = client.post(
+        "/admin/companies",
+        json={"name": "ETag Co", "country_code": "UAE", "provider_codes": ["eand_money"]},
+    ).json()
+
+    first = client.get("/admin/companies")
+    assert first.status_code == 200
+    tag = first.headers["etag"]
+
+    statements = []
+    engine = SessionLocal.kw["bind"]
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)  # noqa: E731
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        cached = client.get("/admin/companies", headers={"If-None-Match": tag})
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    assert cached.status_code == 304
+    assert cached.headers["etag"] == tag
+    assert cached.content == b""
+    assert statements == []
+
+    # a toggle invalidates the list
+    client.post(f"/admin/companies/{created['id']}/toggle")
+    fresh = client.get("/admin/companies", headers={"If-None-Match": tag})
+    assert fresh.status_code == 200
+    assert fresh.headers["etag"] != tag
+    assert fresh.json()[-1]["is_active"] is False
+
+
+def test_list_companies_paginates_with_next_cursor_header():
+    from app.models.company import Company
+
+    app, SessionLocal = create_test_app_and_db()
+    client = TestClient(app)
+
+    db = SessionLocal()
+    db.add_all([Company(name=f"Shop {i}", api_key=f"shop-{i}", country_code="UAE") for i in range(5)])
+    db.commit()
+    db.close()
+
+    first = client.get("/admin/companies", params={"limit": 3, "name": "shop"})
+    assert first.status_code == 200
+    assert [c["name"] for c in first.json()] == ["Shop 0", "Shop 1", "Shop 2"]
+    cursor = first.headers["x-next-cursor"]
+
+    second = client.get("/admin/companies", params={"limit": 3, "name": "shop", "cursor": cursor})
+    assert [c["name"] for c in second.json()] == ["Shop 3", "Shop 4"]
+    assert "x-next-cursor" not in second.headers
+
+    assert client.get("/admin/companies", params={"country_code": "KSA"}).json() == []
+
+
+def test_bulk_create_companies_from_json_reports_each_row():
+    from app.models.channel import Channel
+    from app.models.company import Company
+    from app.models.wallet import Wallet
+
+    app, SessionLocal = create_test_app_and_db()
+    client = TestClient(app)
+
+    db = SessionLocal()
+    db.add_all([PaymentProvider(code="eand_money", name="e& money"), PaymentProvider(code="wallet_x", name="Wallet X")])
+    db.commit()
+    db.close()
+
+    resp = client.post(
+        "/admin/companies/bulk",
+        json={
+            "companies": [
+                {"name": "Bulk A", "country_code": "UAE", "provider_codes": ["eand_money", "wallet_x"]},
+                {"country_code": "UAE", "provider_codes": []},
+                {"name": "Bulk C", "provider_codes": ["nope"]},
+            ]
+        },
+    )
+    assert resp.status_code == 200
+    body = resp.json()
+    assert (body["total"], body["created"], body["failed"]) == (3, 2, 1)
+    first, missing, unknown = body["results"]
+    assert first["status"] == "created" and first["api_key"]
+    assert missing["status"] == "error" and "name" in missing["error"]
+    assert unknown["status"] == "created"
+    assert unknown["unknown_provider_codes"] == ["nope"]
+
+    db = SessionLocal()
+    a = db.get(Company, first["company_id"])
+    assert sorted(ch.name for ch in a.channels) == ["Wallet X Channel", "e& money Channel"]
+    assert [w.wallet_identifier for w in a.wallets] == [f"WALLET-{a.id}-1"]
+    c = db.get(Company, unknown["company_id"])
+    assert [ch.name for ch in c.channels] == ["Primary Channel"]
+    assert c.wallets[0].channel_id == c.channels[0].id
+    assert db.query(Wallet).count() == 2
+    assert db.query(Channel).count() == 3
+    db.close()
+
+
+def test_bulk_create_companies_from_csv_in_chunks():
+    from sqlalchemy import event
+
+    app, SessionLocal = create_test_app_and_db()
+    client = TestClient(app)
+
+    db = SessionLocal()
+    db.add(PaymentProvider(code="eand_money", name="e& money"))
+    db.commit()
+    db.close()
+
+    lines = ["name,country_code,provider_codes,telegram_bot_token"]
+    lines += [f"Shop {i},UAE,eand_money;wallet_x," for i in range(300)]
+    statements = []
+    engine = SessionLocal.kw["bind"]
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)  # noqa: E731
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        resp = client.post(
+            "/admin/companies/bulk",
+            content="\n".join(lines).encode(),
+            headers={"Content-Type": "text/csv"},
+        )
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["created"] == 300
+    assert body["results"][0]["unknown_provider_codes"] == ["wallet_x"]
+    assert len({r["api_key"] for r in body["results"]}) == 300
+    # a fixed number of statements per chunk, not per company
+    assert len([s for s in statements if s.lstrip().upper().startswith("INSERT")]) <= 12
+
+    listing = client.get("/admin/companies", params={"name": "shop", "limit": 500}).json()
+    assert len(listing) == 300
+
+
+def test_bulk_create_companies_rejects_malformed_payload():
+    app, _ = create_test_app_and_db()
+    client = TestClient(app)
+    resp = client.post("/admin/companies/bulk", content=b"{not json", headers={"Content-Type": "application/json"})
+    assert resp.status_code == 400
@@ -147,3 +147,31 @@ def test_toggle_company_active_flips_flag():
         assert updated.is_active != initial
     finally:
         db.close()
+
+
+def test_bulk_create_companies_isolates_failed_chunks(monkeypatch):
+    db = create_test_session()
+    try:
+        db.add(Company(name="Existing", api_key="taken-key"))
+        db.commit()
+
+        keys = iter(["key-1", "taken-key", "key-3"])
+        real_generate = AdminCompanyService.generate_api_key
+        calls = {"n": 0}
+
+        def fake_generate():
+            # company keys are generated first, one per valid row
+            calls["n"] += 1
+            return next(keys) if calls["n"] <= 3 else real_generate()
+
+        monkeypatch.setattr(AdminCompanyService, "generate_api_key", staticmethod(fake_generate))
+        rows = [{"name": f"Row {i}", "provider_codes": []} for i in range(3)]
+
+        results = AdminCompanyService.bulk_create_companies(db, rows, chunk_size=1)
+
+        assert [r["status"] for r in results] == ["created", "error", "created"]
+        assert results[1]["api_key"] is None
+        assert "IntegrityError" in results[1]["error"]
+        assert db.query(Company).filter(Company.name.like("Row %")).count() == 2
+    finally:
+        db.close()
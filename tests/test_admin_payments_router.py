@@ -0,0 +1,187 @@
+from datetime import datetime, timedelta
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.base import Base
+from app.db.session import get_db
+from app.models.company import Company
+from app.models.payment import Payment
+from app.routers.admin_payments import router as admin_payments_router
+
+
+def create_test_app_and_db():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        future=True,
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    app = FastAPI()
+    app.include_router(admin_payments_router)
+
+    Base.metadata.create_all(bind=engine)
+
+    def override_get_db():
+        db = TestingSessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    return app, TestingSessionLocal
+
+
+def _seed_payments(SessionLocal, count):
+    db = SessionLocal()
+    company = Company(name="Pay Co", api_key="pay-co")
+    db.add(company)
+    db.flush()
+    now = datetime.utcnow()
+    for i in range(count):
+        db.add(
+            Payment(
+                company_id=company.id,
+                amount=100 + i,
+                currency="AED",
+                raw_message=f"SMS {i}",
+                status="new",
+                created_at=now - timedelta(minutes=i),
+            )
+        )
+    db.commit()
+    company_id = company.id
+    db.close()
+    return company_id
+
+
+def test_list_payments_offset_mode_has_no_cursors():
+    app, SessionLocal = create_test_app_and_db()
+    _seed_payments(SessionLocal, 3)
+    client = TestClient(app)
+
+    resp = client.get("/admin/payments/", params={"page": 2, "page_size": 2})
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["total"] == 3
+    assert [p["amount"] for p in body["items"]] == [102]
+    assert body["total_strategy"] == "exact"
+    assert body["next_cursor"] is None
+    assert body["prev_cursor"] is None
+
+
+def test_list_payments_reports_count_strategy():
+    app, SessionLocal = create_test_app_and_db()
+    company_id = _seed_payments(SessionLocal, 3)
+    client = TestClient(app)
+
+    body = client.get("/admin/payments/", params={"count": "cached", "company_id": company_id}).json()
+    assert body["total"] == 3
+    assert body["total_strategy"] == "cached"
+
+    body = client.get("/admin/payments/", params={"count": "estimated"}).json()
+    assert body["total"] == 3
+    assert body["total_strategy"] == "exact"
+
+
+def test_list_payments_keyset_mode_follows_cursors():
+    app, SessionLocal = create_test_app_and_db()
+    _seed_payments(SessionLocal, 5)
+    client = TestClient(app)
+
+    first = client.get("/admin/payments/", params={"pagination": "keyset", "page_size": 2}).json()
+    assert [p["amount"] for p in first["items"]] == [100, 101]
+    assert first["prev_cursor"] is None
+
+    second = client.get("/admin/payments/", params={"cursor": first["next_cursor"], "page_size": 2}).json()
+    assert [p["amount"] for p in second["items"]] == [102, 103]
+
+    back = client.get("/admin/payments/", params={"cursor": second["prev_cursor"], "page_size": 2}).json()
+    assert [p["amount"] for p in back["items"]] == [100, 101]
+
+
+def test_list_payments_invalid_cursor_returns_400():
+    app, _ = create_test_app_and_db()
+    client = TestClient(app)
+
+    resp = client.get("/admin/payments/", params={"cursor": "garbage"})
+    assert resp.status_code == 400
+
+
+def test_list_payments_joins_names_in_one_query():
+    from sqlalchemy import event
+
+    from app.models.channel import Channel
+
+    app, SessionLocal = create_test_app_and_db()
+    company_id = _seed_payments(SessionLocal, 5)
+    db = SessionLocal()
+    channel = Channel(company_id=company_id, name="Main", channel_api_key="ch-main")
+    db.add(channel)
+    db.flush()
+    for payment in db.query(Payment).all():
+        payment.channel_id = channel.id
+    db.commit()
+    db.close()
+
+    statements = []
+    engine = SessionLocal.kw["bind"]
+    event.listen(engine, "before_cursor_execute", lambda conn, cur, stmt, *a: statements.append(stmt))
+    client = TestClient(app)
+
+    body = client.get("/admin/payments/", params={"page_size": 5}).json()
+
+    assert {p["company_name"] for p in body["items"]} == {"Pay Co"}
+    assert {p["channel_name"] for p in body["items"]} == {"Main"}
+    # one page query plus one count, independent of the number of rows
+    assert len([s for s in statements if s.lstrip().upper().startswith("SELECT")]) == 2
+
+
+def test_export_payments_csv_streams_all_rows():
+    import csv
+    import io
+
+    app, SessionLocal = create_test_app_and_db()
+    _seed_payments(SessionLocal, 3)
+    client = TestClient(app)
+
+    resp = client.get("/admin/payments/export", params={"format": "csv", "min_amount": 101})
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(resp.text)))
+    assert [r["amount"] for r in rows] == ["101", "102"]
+    assert rows[0]["company_name"] == "Pay Co"
+
+
+def test_export_payments_ndjson():
+    import json
+
+    app, SessionLocal = create_test_app_and_db()
+    _seed_payments(SessionLocal, 2)
+    client = TestClient(app)
+
+    resp = client.get("/admin/payments/export", params={"format": "ndjson"})
+    assert resp.status_code == 200
+    lines = [json.loads(line) for line in resp.text.splitlines()]
+    assert [line["amount"] for line in lines] == [100, 101]
+    assert lines[0]["payment_id"] is not None
+
+
+def test_list_payments_full_text_search():
+    app, SessionLocal = create_test_app_and_db()
+    _seed_payments(SessionLocal, 3)
+    client = TestClient(app)
+
+    resp = client.get("/admin/payments/", params={"q": "sms 1"})
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["total"] == 1
+    assert [p["amount"] for p in body["items"]] == [101]
+
+    resp = client.get("/admin/payments/export", params={"format": "ndjson", "q": "sms"})
+    assert len(resp.text.splitlines()) == 3
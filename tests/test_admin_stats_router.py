@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.base import Base
+from app.db.session import get_db
+from app.models.company import Company
+from app.models.payment import Payment
+from app.repositories.stats_repository import refresh_hourly_rollups
+from app.routers.admin_stats import router as admin_stats_router
+
+
+def create_test_app_and_db():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        future=True,
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    app = FastAPI()
+    app.include_router(admin_stats_router)
+
+    Base.metadata.create_all(bind=engine)
+
+    def override_get_db():
+        db = TestingSessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    return app, TestingSessionLocal
+
+
+def test_admin_stats_serves_rollup_per_day():
+    app, SessionLocal = create_test_app_and_db()
+    db = SessionLocal()
+    company = Company(name="Stats Co", api_key="stats")
+    db.add(company)
+    db.flush()
+    now = datetime.utcnow()
+    for amount, status in ((100, "new"), (40, "used"), (60, "used")):
+        db.add(
+            Payment(
+                company_id=company.id,
+                amount=amount,
+                currency="AED",
+                raw_message="SMS",
+                status=status,
+                created_at=now - timedelta(minutes=1),
+            )
+        )
+    db.commit()
+    company_id = company.id
+    refresh_hourly_rollups(db)
+    db.close()
+
+    client = TestClient(app)
+    resp = client.get("/admin/stats", params={"granularity": "day", "company_id": company_id})
+
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["granularity"] == "day"
+    assert body["rollup_watermark"] is not None
+    totals = {item["status"]: (item["count"], item["sum_amount"]) for item in body["items"]}
+    assert totals == {"new": (1, 100), "used": (2, 100)}
@@ -116,3 +116,249 @@ def test_admin_update_wallet_and_toggle():
     assert tog.status_code == 200
     toggled = tog.json()
     assert toggled.get("is_active") is False
+
+
+def test_list_company_wallets_etag_changes_on_wallet_update():
+    app, SessionLocal = create_test_app_and_db()
+    client = TestClient(app)
+
+    db = SessionLocal()
+    c = Company(name="C3", api_key="k3")
+    db.add(c)
+    db.commit()
+    ch = Channel(company_id=c.id, name="chan3", provider_id=None, channel_api_key="ck3", is_active=True)
+    db.add(ch)
+    db.commit()
+    company_id, channel_id = c.id, ch.id
+    db.close()
+
+    wid = client.post(f"/admin/companies/{company_id}/wallets", json={
+        "wallet_label": "W-E",
+        "wallet_identifier": "3001",
+        "daily_limit": 500,
+        "is_active": True,
+        "channel_id": channel_id,
+    }).json()["id"]
+
+    tag = client.get(f"/admin/companies/{company_id}/wallets").headers["etag"]
+    assert client.get(f"/admin/companies/{company_id}/wallets", headers={"If-None-Match": tag}).status_code == 304
+
+    client.put(f"/admin/wallets/{wid}", json={"wallet_label": "W-E2"})
+    resp = client.get(f"/admin/companies/{company_id}/wallets", headers={"If-None-Match": tag})
+    assert resp.status_code == 200
+    assert resp.json()[0]["wallet_label"] == "W-E2"
+
+
+def _company_with_channel(SessionLocal, key):
+    db = SessionLocal()
+    provider = PaymentProvider(code=f"{key}_prov", name=f"{key} Provider")
+    c = Company(name=f"{key} Co", api_key=f"{key}-k")
+    db.add_all([provider, c])
+    db.commit()
+    ch = Channel(company_id=c.id, name=f"{key} chan", provider_id=provider.id, channel_api_key=f"{key}-ck", is_active=True)
+    db.add(ch)
+    db.commit()
+    ids = c.id, ch.id
+    db.close()
+    return ids
+
+
+def test_bulk_upsert_wallets_by_identifier():
+    from sqlalchemy import event
+
+    app, SessionLocal = create_test_app_and_db()
+    client = TestClient(app)
+    company_id, channel_id = _company_with_channel(SessionLocal, "bulk")
+
+    def wallet(identifier, label, limit=500, active=True):
+        return {
+            "wallet_label": label,
+            "wallet_identifier": identifier,
+            "daily_limit": limit,
+            "is_active": active,
+            "channel_id": channel_id,
+        }
+
+    first = client.post(
+        f"/admin/companies/{company_id}/wallets/bulk",
+        json={"wallets": [wallet(f"SIM-{i}", f"SIM {i}") for i in range(50)]},
+    )
+    assert first.status_code == 200
+    assert len(first.json()) == 50
+    assert first.json()[0]["provider_code"] == "bulk_prov"
+
+    statements = []
+    engine = SessionLocal.kw["bind"]
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)  # noqa: E731
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        second = client.post(
+            f"/admin/companies/{company_id}/wallets/bulk",
+            json={"wallets": [wallet("SIM-0", "SIM 0 rotated", limit=900), wallet("SIM-new", "New SIM")]},
+        )
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    assert second.status_code == 200
+    by_identifier = {w["wallet_identifier"]: w for w in second.json()}
+    assert by_identifier["SIM-0"]["wallet_label"] == "SIM 0 rotated"
+    assert by_identifier["SIM-0"]["daily_limit"] == 900
+    assert by_identifier["SIM-0"]["id"] == first.json()[0]["id"]
+    assert "SIM-new" in by_identifier
+    # channel check, existing lookup, update, insert, one joined re-read
+    assert len([s for s in statements if s.lstrip().upper().startswith("SELECT")]) == 3
+
+    assert len(client.get(f"/admin/companies/{company_id}/wallets").json()) == 51
+
+    dup = client.post(
+        f"/admin/companies/{company_id}/wallets/bulk",
+        json={"wallets": [wallet("X", "a"), wallet("X", "b")]},
+    )
+    assert dup.status_code == 400
+    other_company, _ = _company_with_channel(SessionLocal, "other")
+    foreign = client.post(f"/admin/companies/{other_company}/wallets/bulk", json={"wallets": [wallet("Y", "y")]})
+    assert foreign.status_code == 400
+
+
+def test_bulk_upsert_keeps_deactivated_wallets_inactive():
+    app, SessionLocal = create_test_app_and_db()
+    client = TestClient(app)
+    company_id, channel_id = _company_with_channel(SessionLocal, "keep")
+    url = f"/admin/companies/{company_id}/wallets/bulk"
+
+    def wallet(identifier, label, **extra):
+        return {"wallet_label": label, "wallet_identifier": identifier, "daily_limit": 100, "channel_id": channel_id, **extra}
+
+    created = client.post(url, json={"wallets": [wallet("OFF", "Off"), wallet("ON", "On")]}).json()
+    off_id = next(w["id"] for w in created if w["wallet_identifier"] == "OFF")
+    assert client.post("/admin/wallets/bulk-status", json={"wallet_ids": [off_id], "is_active": False}).status_code == 200
+
+    # is_active omitted: the update must not fall back to the schema default
+    resp = client.post(url, json={"wallets": [wallet("OFF", "Off renamed"), wallet("NEW", "New")]})
+    assert resp.status_code == 200
+    by_identifier = {w["wallet_identifier"]: w for w in resp.json()}
+    assert by_identifier["OFF"]["wallet_label"] == "Off renamed"
+    assert by_identifier["OFF"]["is_active"] is False
+    # defaults still apply to wallets the upsert creates
+    assert by_identifier["NEW"]["is_active"] is True
+
+    resp = client.post(url, json={"wallets": [wallet("OFF", "Off renamed", is_active=True)]})
+    assert resp.json()[0]["is_active"] is True
+
+
+def test_bulk_wallet_status_updates_all_or_nothing():
+    app, SessionLocal = create_test_app_and_db()
+    client = TestClient(app)
+    company_id, channel_id = _company_with_channel(SessionLocal, "status")
+    created = client.post(
+        f"/admin/companies/{company_id}/wallets/bulk",
+        json={
+            "wallets": [
+                {"wallet_label": f"W{i}", "wallet_identifier": f"S{i}", "daily_limit": 10, "channel_id": channel_id}
+                for i in range(3)
+            ]
+        },
+    ).json()
+    ids = [w["id"] for w in created]
+
+    resp = client.post("/admin/wallets/bulk-status", json={"wallet_ids": ids[:2], "is_active": False})
+    assert resp.status_code == 200
+    assert [w["is_active"] for w in resp.json()] == [False, False]
+
+    missing = client.post("/admin/wallets/bulk-status", json={"wallet_ids": [ids[2], 999999], "is_active": False})
+    assert missing.status_code == 404
+    states = {w["id"]: w["is_active"] for w in client.get(f"/admin/companies/{company_id}/wallets").json()}
+    assert states == {ids[0]: False, ids[1]: False, ids[2]: True}
+
+
+def test_wallet_utilization_in_one_query():
+    from datetime import date, datetime, timedelta
+
+    from sqlalchemy import event
+
+    from app.models.payment import Payment
+    from app.models.wallet import Wallet
+
+    app, SessionLocal = create_test_app_and_db()
+    client = TestClient(app)
+    company_id, channel_id = _company_with_channel(SessionLocal, "util")
+
+    db = SessionLocal()
+    busy = Wallet(company_id=company_id, channel_id=channel_id, wallet_label="Busy", wallet_identifier="B",
+                  daily_limit=1000, used_today=400, last_reset_date=date.today())
+    stale = Wallet(company_id=company_id, channel_id=channel_id, wallet_label="Stale", wallet_identifier="S",
+                   daily_limit=500, used_today=450, last_reset_date=date.today() - timedelta(days=1))
+    db.add_all([busy, stale])
+    db.commit()
+    now = datetime.utcnow()
+    db.add_all(
+        [
+            Payment(company_id=company_id, wallet_id=busy.id, amount=100, raw_message="a", created_at=now),
+            Payment(company_id=company_id, wallet_id=busy.id, amount=300, raw_message="b", created_at=now),
+            Payment(company_id=company_id, wallet_id=stale.id, amount=50, raw_message="c",
+                    created_at=now - timedelta(days=2)),
+        ]
+    )
+    db.commit()
+    busy_id, stale_id = busy.id, stale.id
+    db.close()
+
+    statements = []
+    engine = SessionLocal.kw["bind"]
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)  # noqa: E731
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        resp = client.get(f"/admin/companies/{company_id}/wallets/utilization")
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    assert resp.status_code == 200
+    assert len(statements) == 1
+    wallets = {w["wallet_id"]: w for w in resp.json()["wallets"]}
+    assert wallets[busy_id]["used_today"] == 400
+    assert wallets[busy_id]["remaining"] == 600
+    assert wallets[busy_id]["payments_today"] == 2
+    assert wallets[busy_id]["amount_today"] == 400
+    # a counter last reset yesterday reads as unused today
+    assert wallets[stale_id]["used_today"] == 0
+    assert wallets[stale_id]["remaining"] == 500
+    assert wallets[stale_id]["payments_today"] == 0
+    assert wallets[stale_id]["last_payment_at"] is not None
+
+
+def test_wallet_utilization_last_payment_is_bounded():
+    from datetime import datetime, timedelta
+
+    from app.models.payment import Payment
+    from app.models.wallet import Wallet
+    from app.repositories.wallet_repository import LAST_PAYMENT_LOOKBACK
+
+    app, SessionLocal = create_test_app_and_db()
+    client = TestClient(app)
+    company_id, channel_id = _company_with_channel(SessionLocal, "util-old")
+
+    db = SessionLocal()
+    idle = Wallet(company_id=company_id, channel_id=channel_id, wallet_label="Idle", wallet_identifier="I",
+                  daily_limit=100)
+    db.add(idle)
+    db.commit()
+    db.add(Payment(company_id=company_id, wallet_id=idle.id, amount=10, raw_message="old",
+                   created_at=datetime.utcnow() - LAST_PAYMENT_LOOKBACK - timedelta(days=2)))
+    db.commit()
+    db.close()
+
+    resp = client.get(f"/admin/companies/{company_id}/wallets/utilization")
+    assert resp.status_code == 200
+    [wallet] = resp.json()["wallets"]
+    assert wallet["last_payment_at"] is None
+
+
+def test_wallet_utilization_unknown_company():
+    app, SessionLocal = create_test_app_and_db()
+    client = TestClient(app)
+    company_id, _ = _company_with_channel(SessionLocal, "util-empty")
+
+    assert client.get("/admin/companies/999999/wallets/utilization").status_code == 404
+    # an existing company without wallets is not an error
+    empty = client.get(f"/admin/companies/{company_id}/wallets/utilization")
+    assert empty.status_code == 200
+    assert empty.json()["wallets"] == []
@@ -0,0 +1,121 @@
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+import app.models  # noqa: F401  (registers every table)
+from app.models.channel import Channel
+from app.models.company import Company
+from app.models.country import PaymentProvider
+from app.models.wallet import Wallet
+from app.repositories import company_repository
+from app.routers.admin_companies import _company_to_admin_out
+
+
+engine = create_engine("sqlite:///:memory:", future=True)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+Base.metadata.create_all(bind=engine)
+
+
+def _seed_company(db, key, channels=20, wallets_per_channel=5):
+    company = Company(name="Aggregate Co", api_key=key)
+    db.add(company)
+    db.flush()
+    for i in range(channels):
+        provider = PaymentProvider(code=f"{key}_p{i}", name=f"Provider {i}")
+        channel = Channel(company=company, name=f"Channel {i}", provider=provider, channel_api_key=f"{key}-ch-{i}")
+        db.add(channel)
+        for j in range(wallets_per_channel):
+            db.add(
+                Wallet(
+                    company=company,
+                    channel=channel,
+                    wallet_label=f"W{i}-{j}",
+                    wallet_identifier=f"{i}{j:03d}",
+                    daily_limit=1000,
+                )
+            )
+    db.commit()
+    return company.id
+
+
+def test_get_company_aggregate_serializes_with_constant_queries():
+    db = TestingSessionLocal()
+    company_id = _seed_company(db, "agg")
+    db.close()
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)  # noqa: E731
+    db = TestingSessionLocal()
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        out = _company_to_admin_out(company_repository.get_company_aggregate(db, company_id))
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+        db.close()
+
+    assert len(out.channels) == 20
+    assert len(out.wallets) == 100
+    assert out.wallets[0].provider_code == "agg_p0"
+    # company, channels (+ providers), wallets (+ channels + providers)
+    assert len(statements) == 3
+
+
+def test_get_company_aggregate_refreshes_loaded_instances_and_handles_missing():
+    db = TestingSessionLocal()
+    company_id = _seed_company(db, "fresh", channels=1, wallets_per_channel=1)
+    company = company_repository.get_company_aggregate(db, company_id)
+    assert len(company.wallets) == 1
+
+    other = TestingSessionLocal()
+    other.add(Wallet(company_id=company_id, channel_id=company.channels[0].id, wallet_label="new", wallet_identifier="x"))
+    other.commit()
+    other.close()
+
+    assert len(company_repository.get_company_aggregate(db, company_id).wallets) == 2
+    assert company_repository.get_company_aggregate(db, 999999) is None
+    db.close()
+
+
+def test_list_companies_pages_and_filters():
+    db = TestingSessionLocal()
+    db.add_all(
+        [
+            Company(name="Zeta Foods", api_key="list-1", country_code="AE", is_active=True),
+            Company(name="zenith pay", api_key="list-2", country_code="SA", is_active=True),
+            Company(name="Alpha Zen", api_key="list-3", country_code="AE", is_active=False),
+            Company(name="Ze%ro", api_key="list-4", country_code="AE", is_active=True),
+        ]
+    )
+    db.commit()
+
+    def names(**filters):
+        rows, _ = company_repository.list_companies(db, limit=50, **filters)
+        return [row.name for row in rows]
+
+    assert names(name="ZE") == ["Zeta Foods", "zenith pay", "Ze%ro"]
+    assert names(name="ze%") == ["Ze%ro"]
+    assert names(name="ze", country_code="AE") == ["Zeta Foods", "Ze%ro"]
+    assert "Alpha Zen" not in names(is_active=True)
+
+    first, cursor = company_repository.list_companies(db, limit=2, name="ze")
+    assert [row.name for row in first] == ["Zeta Foods", "zenith pay"]
+    rest, last_cursor = company_repository.list_companies(db, limit=2, name="ze", cursor=cursor)
+    assert [row.name for row in rest] == ["Ze%ro"]
+    assert last_cursor is None
+    db.close()
+
+
+def test_list_companies_name_prefix_with_punctuation():
+    db = TestingSessionLocal()
+    db.add_all(
+        [
+            Company(name="Al-Noor Exchange", api_key="punct-1"),
+            Company(name="Al.Dar Trading", api_key="punct-2"),
+            Company(name="Alnoor Pay", api_key="punct-3"),
+        ]
+    )
+    db.commit()
+
+    rows, _ = company_repository.list_companies(db, limit=50, name="al-")
+    assert [row.name for row in rows] == ["Al-Noor Exchange"]
+    db.close()
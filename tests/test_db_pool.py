@@ -0,0 +1,82 @@
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+import app.db.session as session_module
+from app.config import settings
+from app.db.session import (
+    create_app_engine,
+    engine_options,
+    get_admin_db,
+    get_ingest_db,
+    get_merchant_db,
+    pool_stats,
+)
+
+
+def _drain(gen):
+    value = next(gen)
+    try:
+        next(gen)
+    except StopIteration:
+        pass
+    return value
+
+
+def test_engine_options_apply_pool_settings_except_on_sqlite(monkeypatch):
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", 7)
+    monkeypatch.setattr(settings, "DB_MAX_OVERFLOW", 3)
+    monkeypatch.setattr(settings, "DB_POOL_TIMEOUT_SECONDS", 4.5)
+    monkeypatch.setattr(settings, "DB_POOL_RECYCLE_SECONDS", 600)
+    monkeypatch.setattr(settings, "DB_POOL_PRE_PING", True)
+
+    assert engine_options("postgresql://u:p@db/pg") == {
+        "pool_size": 7,
+        "max_overflow": 3,
+        "pool_timeout": 4.5,
+        "pool_recycle": 600,
+        "pool_pre_ping": True,
+    }
+    assert engine_options("postgresql://u:p@db/pg", pool_size=2)["pool_size"] == 2
+    assert engine_options("sqlite:///:memory:") == {}
+    assert engine_options("sqlite:////tmp/app.db") == {}
+
+
+def test_sqlite_engine_registers_now_function():
+    sqlite_engine = create_app_engine("sqlite:///:memory:")
+    with sqlite_engine.connect() as conn:
+        assert conn.execute(text("SELECT now()")).scalar()
+
+
+def test_pool_stats_reports_checked_out_connections(tmp_path):
+    # file databases use a QueuePool on SQLite
+    file_engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}")
+    conn = file_engine.connect()
+    try:
+        stats = pool_stats(file_engine)
+        assert stats["pool"] == "QueuePool"
+        assert stats["checked_out"] == 1
+    finally:
+        conn.close()
+    assert pool_stats(file_engine)["checked_out"] == 0
+
+
+def test_role_dependencies_use_dedicated_pool_only_when_configured(monkeypatch):
+    ingest_engine = create_engine("sqlite:///:memory:")
+    monkeypatch.setattr(
+        session_module, "_role_sessions", {session_module.INGEST: sessionmaker(bind=ingest_engine)}
+    )
+    primary = object()
+
+    ingest_db = _drain(get_ingest_db(primary))
+    assert ingest_db is not primary
+    assert ingest_db.get_bind() is ingest_engine
+    assert _drain(get_merchant_db(primary)) is primary
+    assert _drain(get_admin_db(primary)) is primary
+
+
+def test_health_db_pool_endpoint(client):
+    resp = client.get("/health/db/pool")
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["status"] == "ok"
+    assert "pool" in body["pools"]["default"]
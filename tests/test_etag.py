@@ -0,0 +1,55 @@
+from fastapi import FastAPI, Request, Response
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.core import etag
+
+
+def _make_app():
+    app = FastAPI()
+
+    @app.get("/items")
+    def items(request: Request, response: Response):
+        not_modified = etag.conditional_get(request, response, "items")
+        if not_modified is not None:
+            return not_modified
+        return ["a"]
+
+    return app
+
+
+def test_etag_changes_only_when_a_resource_is_bumped():
+    first = etag.etag_for("test-a", "test-b")
+    assert etag.etag_for("test-a", "test-b") == first
+    etag.bump("test-c")
+    assert etag.etag_for("test-a", "test-b") == first
+    etag.bump("test-b")
+    assert etag.etag_for("test-a", "test-b") != first
+
+
+def test_conditional_get_matches_weak_and_listed_tags():
+    client = TestClient(_make_app())
+    tag = client.get("/items").headers["etag"]
+    assert tag.startswith('W/"')
+
+    assert client.get("/items", headers={"If-None-Match": tag}).status_code == 304
+    assert client.get("/items", headers={"If-None-Match": tag[2:]}).status_code == 304
+    assert client.get("/items", headers={"If-None-Match": f'"other", {tag}'}).status_code == 304
+    assert client.get("/items", headers={"If-None-Match": "*"}).status_code == 304
+    assert client.get("/items", headers={"If-None-Match": '"other"'}).status_code == 200
+
+
+def test_conditional_get_disabled(monkeypatch):
+    monkeypatch.setattr(settings, "ADMIN_ETAG_MAX_AGE_SECONDS", 0)
+    client = TestClient(_make_app())
+    resp = client.get("/items", headers={"If-None-Match": "*"})
+    assert resp.status_code == 200
+    assert "etag" not in resp.headers
+
+
+def test_bumped_within_tracks_recent_writes_per_resource():
+    assert etag.bumped_within(60, "test-recent") is False
+    etag.bump("test-recent")
+    assert etag.bumped_within(60, "test-other", "test-recent") is True
+    assert etag.bumped_within(60, "test-other") is False
+    assert etag.bumped_within(0, "test-recent") is False
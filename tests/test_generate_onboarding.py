@@ -0,0 +1,86 @@
+import generate_onboarding_pdf as gen
+
+
+PARAMS = dict(merchant_name="Cache Shop", api_key="key-1", base_url="http://localhost:8000", environment="dev")
+
+
+def _use_template(monkeypatch, tmp_path, text="# Welcome {{MERCHANT_NAME}}\n\nKey: `{{API_KEY}}`\n"):
+    template = tmp_path / "template.md"
+    template.write_text(text, encoding="utf-8")
+    monkeypatch.setattr(gen, "TEMPLATE_PATH", template)
+    return template
+
+
+def _count_renders(monkeypatch):
+    calls = []
+    build_html = gen.build_html
+
+    def counting_build_html(markdown_text, title):
+        calls.append(title)
+        return build_html(markdown_text, title)
+
+    monkeypatch.setattr(gen, "build_html", counting_build_html)
+    return calls
+
+
+def test_identical_request_reuses_cached_html(monkeypatch, tmp_path):
+    _use_template(monkeypatch, tmp_path)
+    calls = _count_renders(monkeypatch)
+    out = tmp_path / "out"
+
+    html_path, pdf_path = gen.generate_onboarding(output_dir=out, **PARAMS)
+    again, _ = gen.generate_onboarding(output_dir=out, **PARAMS)
+
+    assert again == html_path
+    assert len(calls) == 1
+    assert "key-1" in html_path.read_text(encoding="utf-8")
+    assert html_path.name.startswith("cache-shop-onboarding-dev-")
+
+    other, _ = gen.generate_onboarding(output_dir=out, **{**PARAMS, "api_key": "key-2"})
+    assert other != html_path
+    assert len(calls) == 2
+
+
+def test_template_change_removes_stale_documents(monkeypatch, tmp_path):
+    template = _use_template(monkeypatch, tmp_path)
+    out = tmp_path / "out"
+    out.mkdir()
+    unrelated = out / "shop-onboarding-dev-2025-11-29.html"
+    unrelated.write_text("manual export", encoding="utf-8")
+
+    old_html, _ = gen.generate_onboarding(output_dir=out, **PARAMS)
+    template.write_text("# Updated template for {{MERCHANT_NAME}}\n", encoding="utf-8")
+    new_html, _ = gen.generate_onboarding(output_dir=out, **PARAMS)
+
+    assert new_html != old_html
+    assert not old_html.exists()
+    assert "Updated template" in new_html.read_text(encoding="utf-8")
+    assert unrelated.exists()
+    assert (out / gen.TEMPLATE_MARKER).read_text(encoding="utf-8") == gen.load_template()[1]
+
+
+def test_cached_pdf_is_not_rendered_again(monkeypatch, tmp_path):
+    _use_template(monkeypatch, tmp_path)
+    written = []
+
+    class FakeHTML:
+        def __init__(self, string):
+            self.string = string
+
+        def write_pdf(self, target):
+            written.append(target)
+            with open(target, "wb") as fh:
+                fh.write(b"%PDF-fake")
+
+    monkeypatch.setattr(gen, "load_weasyprint", lambda: FakeHTML)
+    out = tmp_path / "out"
+
+    html_path, pdf_path = gen.generate_onboarding(output_dir=out, **PARAMS)
+    _, again = gen.generate_onboarding(output_dir=out, **PARAMS)
+
+    assert pdf_path is not None and again == pdf_path
+    assert pdf_path.read_bytes() == b"%PDF-fake"
+    assert pdf_path.stem == html_path.stem
+    assert len(written) == 1
+    # no temporary files are left behind
+    assert sorted(p.suffix for p in out.iterdir() if not p.name.startswith(".template")) == [".html", ".pdf"]
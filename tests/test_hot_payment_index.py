@@ -0,0 +1,115 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+from app.models.company import Company
+from app.models.payment import Payment
+from app.schemas.payment_api import PaymentCheckRequest
+from app.services.hot_payment_index import HotPaymentIndex, hot_payment_index
+from app.services.payment_service import PaymentService
+
+
+def _payment(pid, amount=150, txn_id=None, minutes_ago=1, status="new", company_id=1) -> Payment:
+    p = Payment(company_id=company_id, amount=amount, currency="AED", raw_message="x", txn_id=txn_id, status=status)
+    p.id = pid
+    p.created_at = datetime.now(timezone.utc) - timedelta(minutes=minutes_ago)
+    return p
+
+
+@pytest.fixture(autouse=True)
+def _clear_shared_index():
+    hot_payment_index.clear()
+    yield
+    hot_payment_index.clear()
+
+
+def test_lookup_by_amount_returns_newest_entry():
+    index = HotPaymentIndex(window_minutes=30)
+    index.add(_payment(1, minutes_ago=5))
+    index.add(_payment(2, minutes_ago=1))
+    cutoff = datetime.now(timezone.utc) - timedelta(minutes=30)
+
+    assert index.lookup(1, created_after=cutoff, amount=150).payment_id == 2
+    assert index.lookup(1, created_after=cutoff, amount=999) is None
+    assert index.lookup(2, created_after=cutoff, amount=150) is None
+
+
+def test_lookup_by_txn_and_discard():
+    index = HotPaymentIndex(window_minutes=30)
+    index.add(_payment(1, txn_id="TXN1"))
+    cutoff = datetime.now(timezone.utc) - timedelta(minutes=30)
+
+    assert index.lookup(1, created_after=cutoff, txn_id="TXN1").payment_id == 1
+    index.discard(1, 1)
+    assert index.lookup(1, created_after=cutoff, txn_id="TXN1") is None
+    assert index.lookup(1, created_after=cutoff, amount=150) is None
+
+
+def test_entries_are_evicted_by_age_and_non_new_payments_ignored():
+    index = HotPaymentIndex(window_minutes=30)
+    index.add(_payment(1, minutes_ago=45))
+    index.add(_payment(2, status="used"))
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=2)
+
+    assert index.lookup(1, created_after=cutoff, amount=150) is None
+
+
+def _session():
+    engine = create_engine("sqlite:///:memory:", future=True)
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+
+
+def test_check_payment_answers_from_hot_window_and_claims_in_db():
+    db = _session()
+    try:
+        company = Company(name="Hot Co", api_key="hot-key")
+        db.add(company)
+        db.flush()
+        payment = Payment(company_id=company.id, amount=150, currency="AED", raw_message="SMS", status="new")
+        db.add(payment)
+        db.commit()
+        db.refresh(payment)
+        hot_payment_index.add(payment)
+
+        resp = PaymentService.check_payment_for_company(
+            db, company_id=company.id, req=PaymentCheckRequest(order_id="ORD-H", expected_amount=150)
+        )
+
+        assert resp.match is True
+        assert resp.payment.payment_id == payment.id
+        db.refresh(payment)
+        assert payment.status == "pending_confirmation"
+        assert payment.confirm_token == resp.confirm_token
+        assert payment.order_id == "ORD-H"
+    finally:
+        db.close()
+
+
+def test_check_payment_falls_back_to_db_for_stale_entry():
+    db = _session()
+    try:
+        company = Company(name="Hot Co", api_key="hot-key")
+        db.add(company)
+        db.flush()
+        payment = Payment(company_id=company.id, amount=150, currency="AED", raw_message="SMS", status="new")
+        db.add(payment)
+        db.commit()
+        db.refresh(payment)
+        hot_payment_index.add(payment)
+
+        # consumed elsewhere (e.g. another worker) after being indexed
+        payment.status = "used"
+        db.commit()
+
+        resp = PaymentService.check_payment_for_company(
+            db, company_id=company.id, req=PaymentCheckRequest(order_id="ORD-H", expected_amount=150)
+        )
+
+        assert resp.found is False
+        assert resp.match is False
+    finally:
+        db.close()
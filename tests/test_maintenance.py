@@ -0,0 +1,53 @@
+from sqlalchemy import create_engine
+
+from app.services.maintenance import advisory_lock_key, run_exclusively
+
+
+class _FakePostgres:
+    """Records advisory lock calls; `granted` decides pg_try_advisory_lock."""
+
+    def __init__(self, granted):
+        self.granted = granted
+        self.statements = []
+        self.dialect = type("Dialect", (), {"name": "postgresql"})()
+
+    def connect(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, statement, params):
+        self.statements.append((str(statement), params))
+        return type("Result", (), {"scalar": lambda _self: self.granted})()
+
+    def commit(self):
+        pass
+
+
+def test_advisory_lock_key_is_stable_and_fits_bigint():
+    key = advisory_lock_key("pending-confirmation-sweep")
+    assert key == advisory_lock_key("pending-confirmation-sweep")
+    assert key != advisory_lock_key("payment-rollup-refresh")
+    assert -(2 ** 63) <= key < 2 ** 63
+
+
+def test_run_exclusively_runs_directly_on_sqlite():
+    assert run_exclusively("job", lambda: 42, bind=create_engine("sqlite:///:memory:")) == 42
+
+
+def test_run_exclusively_skips_when_lock_is_held_elsewhere():
+    calls = []
+    busy = _FakePostgres(granted=False)
+    assert run_exclusively("job", lambda: calls.append(1), bind=busy) is None
+    assert calls == []
+
+    free = _FakePostgres(granted=True)
+    assert run_exclusively("job", lambda: "done", bind=free) == "done"
+    assert [sql for sql, _ in free.statements] == [
+        "SELECT pg_try_advisory_lock(:key)",
+        "SELECT pg_advisory_unlock(:key)",
+    ]
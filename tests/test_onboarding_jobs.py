@@ -0,0 +1,222 @@
+from concurrent.futures.process import BrokenProcessPool
+import os
+from pathlib import Path
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.config import settings
+from app.db.base import Base
+from app.db.session import get_db
+from app.models.company import Company
+from app.routers.admin_companies import router as admin_companies_router
+from app.routers.admin_onboarding_jobs import router as admin_onboarding_jobs_router
+from app.services.onboarding_jobs import FAILED, SUCCEEDED, OnboardingJobQueue, onboarding_jobs
+from generate_onboarding_pdf import generate_onboarding
+
+
+def create_test_app_and_db():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        future=True,
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    app = FastAPI()
+    app.include_router(admin_companies_router)
+    app.include_router(admin_onboarding_jobs_router)
+    Base.metadata.create_all(bind=engine)
+
+    def override_get_db():
+        db = TestingSessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    return app, TestingSessionLocal
+
+
+def _fake_render(merchant_name, output_dir, environment="dev"):
+    html_path = Path(output_dir) / f"{merchant_name}.html"
+    html_path.write_text("<html></html>", encoding="utf-8")
+    return html_path, None
+
+
+def _missing_template(**kwargs):
+    raise SystemExit("Template not found at docs/missing.md")
+
+
+def test_inline_queue_records_result_and_failure(tmp_path):
+    queue = OnboardingJobQueue(max_workers=0, store_dir=tmp_path / "jobs")
+
+    ok = queue.submit(1, _fake_render, merchant_name="shop", output_dir=tmp_path)
+    assert queue.get(ok.id).status == SUCCEEDED
+    assert ok.html_path == str(tmp_path / "shop.html")
+    assert ok.pdf_path is None
+    assert ok.finished_at is not None
+
+    failed = queue.submit(1, _missing_template)
+    assert queue.get(failed.id).status == FAILED
+    assert "Template not found" in failed.error
+
+    assert queue.get("unknown") is None
+    assert queue.get("../" + ok.id) is None
+
+
+def test_job_state_is_shared_between_queue_instances(tmp_path):
+    # each API worker has its own queue; polls may reach any of them
+    accepting = OnboardingJobQueue(max_workers=0, store_dir=tmp_path / "jobs")
+    polled = OnboardingJobQueue(max_workers=0, store_dir=tmp_path / "jobs")
+
+    job = accepting.submit(3, _fake_render, merchant_name="shared", output_dir=tmp_path, environment="prod")
+
+    seen = polled.get(job.id)
+    assert seen == job
+    assert seen.status == SUCCEEDED
+    assert seen.environment == "prod"
+    assert seen.created_at.tzinfo is not None
+
+
+def test_queue_forgets_oldest_finished_jobs(tmp_path):
+    queue = OnboardingJobQueue(max_workers=0, max_jobs=2, store_dir=tmp_path / "jobs")
+    ids = []
+    for i in range(3):
+        ids.append(queue.submit(1, _fake_render, merchant_name=f"m{i}", output_dir=tmp_path).id)
+        # prune orders by mtime; keep it distinct on coarse filesystems
+        os.utime(tmp_path / "jobs" / f"{ids[-1]}.json", (i, i))
+
+    assert queue.get(ids[0]) is None
+    assert queue.get(ids[1]) is not None and queue.get(ids[2]) is not None
+
+
+def test_process_pool_renders_onboarding_document(tmp_path):
+    queue = OnboardingJobQueue(max_workers=1, store_dir=tmp_path / "jobs")
+    try:
+        job = queue.submit(
+            7,
+            generate_onboarding,
+            merchant_name="Pool Shop",
+            api_key="key-123",
+            base_url="http://localhost:8000",
+            environment="dev",
+            output_dir=tmp_path,
+        )
+        job = queue.wait(job, timeout=60)
+    finally:
+        queue.shutdown()
+
+    assert job.status == SUCCEEDED, job.error
+    html = Path(job.html_path).read_text(encoding="utf-8")
+    assert Path(job.html_path).parent == tmp_path
+    assert "key-123" in html
+
+
+def _crash(**kwargs):
+    os._exit(1)
+
+
+class _BrokenExecutor:
+    def __init__(self):
+        self.shut_down = False
+
+    def submit(self, *args, **kwargs):
+        raise BrokenProcessPool("A child process terminated abruptly")
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.shut_down = True
+
+
+def test_broken_process_pool_is_replaced(monkeypatch, tmp_path):
+    queue = OnboardingJobQueue(max_workers=1, store_dir=tmp_path / "jobs")
+    broken = _BrokenExecutor()
+    queue._executor = broken
+    try:
+        job = queue.submit(1, _fake_render, merchant_name="again", output_dir=tmp_path)
+        job = queue.wait(job, timeout=60)
+    finally:
+        queue.shutdown()
+
+    assert broken.shut_down
+    assert job.status == SUCCEEDED, job.error
+
+
+def test_crashed_worker_fails_the_job(tmp_path):
+    queue = OnboardingJobQueue(max_workers=1, store_dir=tmp_path / "jobs")
+    try:
+        job = queue.submit(1, _crash)
+        job = queue.wait(job, timeout=60)
+        assert job.status == FAILED
+        assert queue.get(job.id).status == FAILED
+        assert queue._executor is None
+    finally:
+        queue.shutdown()
+
+
+def _client_with_company(monkeypatch, tmp_path, is_active=True):
+    monkeypatch.setattr(onboarding_jobs, "max_workers", 0)
+    monkeypatch.setattr(settings, "ONBOARDING_OUTPUT_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "ONBOARDING_JOB_DIR", str(tmp_path / "jobs"))
+
+    app, SessionLocal = create_test_app_and_db()
+    db = SessionLocal()
+    company = Company(name="Jobs Shop", country_code="UAE", api_key="jobs-key", is_active=is_active)
+    db.add(company)
+    db.commit()
+    company_id = company.id
+    db.close()
+    return TestClient(app), company_id
+
+
+def test_enqueue_returns_job_and_status_endpoint_reports_urls(monkeypatch, tmp_path):
+    client, company_id = _client_with_company(monkeypatch, tmp_path)
+
+    resp = client.post(f"/admin/companies/{company_id}/onboarding-jobs")
+    assert resp.status_code == 202
+    job_id = resp.json()["job_id"]
+    assert resp.headers["location"] == f"/admin/onboarding-jobs/{job_id}"
+
+    status_resp = client.get(f"/admin/onboarding-jobs/{job_id}")
+    assert status_resp.status_code == 200
+    body = status_resp.json()
+    assert body["status"] == "succeeded"
+    assert body["company_id"] == company_id
+    assert body["html_url"].startswith("/static/onboarding/jobs-shop-onboarding-")
+    assert Path(body["html_path"]).exists()
+
+    assert client.get("/admin/onboarding-jobs/unknown").status_code == 404
+
+
+def test_sync_endpoint_waits_for_its_job(monkeypatch, tmp_path):
+    client, company_id = _client_with_company(monkeypatch, tmp_path)
+
+    resp = client.post(f"/admin/companies/{company_id}/onboarding-pdf")
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["company_id"] == company_id
+    assert body["html_url"].startswith("/static/onboarding/jobs-shop-onboarding-")
+
+
+def test_enqueue_rejects_inactive_company(monkeypatch, tmp_path):
+    client, company_id = _client_with_company(monkeypatch, tmp_path, is_active=False)
+
+    assert client.post(f"/admin/companies/{company_id}/onboarding-jobs").status_code == 400
+    assert client.post("/admin/companies/999/onboarding-jobs").status_code == 404
+
+
+def test_failed_job_is_reported(monkeypatch, tmp_path):
+    client, company_id = _client_with_company(monkeypatch, tmp_path)
+    monkeypatch.setattr("app.services.admin_onboarding_service.load_generator", lambda: _missing_template)
+
+    job_id = client.post(f"/admin/companies/{company_id}/onboarding-jobs").json()["job_id"]
+    body = client.get(f"/admin/onboarding-jobs/{job_id}").json()
+    assert body["status"] == "failed"
+    assert body["html_url"] is None
+    assert "Template not found" in body["error"]
+
+    assert client.post(f"/admin/companies/{company_id}/onboarding-pdf").status_code == 500
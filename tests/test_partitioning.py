@@ -0,0 +1,135 @@
+from datetime import date, datetime, timezone
+import os
+from pathlib import Path
+import subprocess
+import sys
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.db import partitioning
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def test_month_bounds_and_add_months():
+    assert partitioning.month_bounds(date(2026, 10, 19)) == (date(2026, 10, 1), date(2026, 11, 1))
+    assert partitioning.month_bounds(datetime(2026, 12, 31, 23, 59)) == (date(2026, 12, 1), date(2027, 1, 1))
+    assert partitioning.add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+    assert partitioning.add_months(date(2026, 11, 1), 14) == date(2028, 1, 1)
+
+
+def test_partition_names_round_trip():
+    name = partitioning.partition_name(date(2026, 3, 1))
+    assert name == "payments_2026_03"
+    parsed = partitioning.parse_partition_name(name)
+    assert (parsed.start, parsed.end) == (date(2026, 3, 1), date(2026, 4, 1))
+    assert partitioning.parse_partition_name("payments_default") is None
+    assert partitioning.parse_partition_name("wallets_2026_03") is None
+
+
+def test_create_partition_sql_uses_month_range():
+    sql = partitioning.create_partition_sql(date(2026, 12, 15))
+    assert 'PARTITION OF "payments"' in sql
+    assert "FROM ('2026-12-01') TO ('2027-01-01')" in sql
+    assert '"payments_2026_12"' in sql
+
+
+def test_maintenance_is_noop_when_not_partitioned():
+    engine = create_engine("sqlite:///:memory:")
+    with engine.begin() as conn:
+        assert partitioning.is_partitioned(conn) is False
+        assert partitioning.ensure_monthly_partitions(conn) == []
+        assert partitioning.retire_partitions(conn, keep_months=12) == []
+
+
+class _FakePartitionedConnection:
+    """Answers the catalog queries of a partitioned `payments` and records DDL."""
+
+    def __init__(self, partitions):
+        self.partitions = partitions
+        self.statements = []
+        self.dialect = type("Dialect", (), {"name": "postgresql"})()
+
+    def execute(self, statement, params=None):
+        sql = str(statement)
+        self.statements.append(sql)
+        if sql.startswith("SELECT relkind"):
+            value, rows = "p", []
+        elif sql.startswith("SELECT c.relname"):
+            value, rows = None, self.partitions
+        else:
+            value, rows = True, []
+        return type("Result", (), {"scalar": lambda _self: value, "scalars": lambda _self: iter(rows)})()
+
+
+def test_retire_releases_txn_guard_rows_before_detaching():
+    conn = _FakePartitionedConnection(["payments_2025_01", "payments_2026_10", "payments_default"])
+    retired = partitioning.retire_partitions(conn, keep_months=12, action="drop", today=date(2026, 10, 19))
+
+    assert retired == ["payments_2025_01"]
+    ddl = [sql for sql in conn.statements if not sql.startswith("SELECT")]
+    assert ddl == [
+        'DELETE FROM "payment_txn_ids" AS guard USING "payments_2025_01" AS retired '
+        "WHERE guard.txn_id = retired.txn_id",
+        'ALTER TABLE "payments" DETACH PARTITION "payments_2025_01"',
+        'DROP TABLE "payments_2025_01"',
+    ]
+
+
+POSTGRES_URL = os.environ.get("TEST_POSTGRES_URL")
+
+
+@pytest.mark.skipif(not POSTGRES_URL, reason="set TEST_POSTGRES_URL to an empty Postgres database")
+def test_partition_migration_smoke():
+    """Upgrade an empty Postgres database to head, exercise the partitioned table, downgrade."""
+    from sqlalchemy.exc import IntegrityError
+    from sqlalchemy.orm import Session
+
+    from app.models.company import Company
+    from app.models.channel import Channel
+    from app.models.payment import Payment
+
+    env = {**os.environ, "DATABASE_URL": POSTGRES_URL}
+
+    def alembic(*args):
+        subprocess.run([sys.executable, "-m", "alembic", *args], cwd=ROOT, env=env, check=True)
+
+    alembic("upgrade", "head")
+    engine = create_engine(POSTGRES_URL)
+    try:
+        with engine.begin() as conn:
+            assert partitioning.is_partitioned(conn)
+            assert partitioning.list_partitions(conn)
+
+        old = datetime(2001, 1, 15, tzinfo=timezone.utc)
+        with engine.begin() as conn:
+            conn.execute(text(partitioning.create_partition_sql(old)))
+        with Session(engine) as db:
+            company = Company(name="Partition smoke", api_key="partition-smoke")
+            channel = Channel(company=company, name="c", channel_api_key="partition-smoke-channel")
+            db.add_all([company, channel])
+            db.flush()
+            payment = Payment(company_id=company.id, channel_id=channel.id, amount=1, raw_message="m",
+                              txn_id="SMOKE-1")
+            archived = Payment(company_id=company.id, channel_id=channel.id, amount=1, raw_message="m",
+                               txn_id="SMOKE-OLD", created_at=old)
+            db.add_all([payment, archived])
+            db.commit()
+            payment.status = "used"
+            db.commit()
+
+            db.add(Payment(company_id=company.id, channel_id=channel.id, amount=1, raw_message="m",
+                           txn_id="SMOKE-1"))
+            with pytest.raises(IntegrityError):
+                db.commit()
+            db.rollback()
+
+        with engine.begin() as conn:
+            retired = partitioning.retire_partitions(conn, keep_months=12, action="drop")
+            assert partitioning.partition_name(old) in retired
+            guarded = conn.execute(text("SELECT txn_id FROM payment_txn_ids ORDER BY txn_id")).scalars().all()
+            assert guarded == ["SMOKE-1"]
+    finally:
+        engine.dispose()
+        alembic("downgrade", "base")
@@ -0,0 +1,95 @@
+from datetime import datetime, timedelta, timezone
+
+from app.models.payment import Payment
+from app.services import payment_matching
+
+
+NOW = datetime(2025, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def _payment(pid, amount, minutes_ago, payer_phone=None, txn_id=None) -> Payment:
+    p = Payment(
+        company_id=1,
+        amount=amount,
+        currency="AED",
+        raw_message="x",
+        payer_phone=payer_phone,
+        txn_id=txn_id,
+    )
+    p.id = pid
+    p.created_at = NOW - timedelta(minutes=minutes_ago)
+    return p
+
+
+def test_best_match_prefers_exact_amount_over_newer_payment():
+    candidates = [
+        _payment(1, 120, minutes_ago=1),
+        _payment(2, 150, minutes_ago=10),
+    ]
+    result = payment_matching.best_match(candidates, expected_amount=150, window_minutes=30, now=NOW)
+
+    assert result is not None
+    assert result.payment.id == 2
+
+
+def test_best_match_uses_txn_prefix_to_break_ties():
+    candidates = [
+        _payment(1, 150, minutes_ago=2, payer_phone="0501234567", txn_id="998877"),
+        _payment(2, 150, minutes_ago=3, payer_phone="+971501234567", txn_id="123456789"),
+    ]
+    result = payment_matching.best_match(
+        candidates,
+        expected_amount=150,
+        payer_phone="0501234567",
+        txn_id="12345",
+        window_minutes=30,
+        now=NOW,
+    )
+
+    assert result is not None
+    assert result.payment.id == 2
+    assert 0 < result.confidence < result.score
+
+
+def test_best_match_never_returns_another_payers_payment():
+    candidates = [
+        _payment(1, 150, minutes_ago=1, payer_phone="0509999999"),
+        _payment(2, 120, minutes_ago=20, payer_phone="+971501234567"),
+    ]
+    result = payment_matching.best_match(candidates, expected_amount=150, payer_phone="0501234567", now=NOW)
+
+    assert result is not None
+    assert result.payment.id == 2
+    assert result.exact_amount is False
+
+    only_other = payment_matching.best_match(candidates[:1], expected_amount=150, payer_phone="0501234567", now=NOW)
+    assert only_other is None
+
+
+def test_exact_amount_outranks_newer_near_amount_in_long_window():
+    candidates = [
+        _payment(1, 999, minutes_ago=0),
+        _payment(2, 1000, minutes_ago=5),
+    ]
+    result = payment_matching.best_match(candidates, expected_amount=1000, window_minutes=24 * 60, now=NOW)
+
+    assert result.payment.id == 2
+    assert result.exact_amount is True
+    # alone in the exact-amount group: the near miss does not lower confidence
+    assert result.confidence == result.score
+
+
+def test_best_match_confidence_drops_for_indistinguishable_candidates():
+    alone = payment_matching.best_match([_payment(1, 150, minutes_ago=5)], expected_amount=150, now=NOW)
+    twins = payment_matching.best_match(
+        [_payment(1, 150, minutes_ago=5), _payment(2, 150, minutes_ago=5)],
+        expected_amount=150,
+        now=NOW,
+    )
+
+    assert alone.confidence == alone.score
+    assert twins.confidence == round(alone.score / 2, 4)
+
+
+def test_best_match_empty_window_returns_none():
+    assert payment_matching.best_match([], expected_amount=150, now=NOW) is None
@@ -55,3 +55,34 @@ def test_payment_defaults_and_relationships():
     assert payment.channel is channel
     assert payment in company.payments
     assert payment in channel.payments
+
+
+def test_orm_writes_filter_on_the_partition_key():
+    from sqlalchemy import create_engine, event
+    from sqlalchemy.orm import Session
+
+    from app.db.base import Base
+
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    with Session(engine) as db:
+        payment = Payment(company_id=1, channel_id=1, amount=10, raw_message="m")
+        db.add(payment)
+        db.commit()
+        assert payment.created_at is not None
+
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)  # noqa: E731
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            payment.status = "used"
+            db.commit()
+            db.delete(payment)
+            db.commit()
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+
+    writes = [s for s in statements if s.startswith(("UPDATE payments", "DELETE FROM payments "))]
+    assert len(writes) == 2
+    for statement in writes:
+        assert "payments.id = ? AND payments.created_at = ?" in statement
@@ -1,7 +1,7 @@
 from datetime import datetime, timedelta, timezone
 import pytest
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 
 from app.db.base import Base
@@ -52,22 +52,31 @@ def test_create_persists_payment(db_session):
     assert got.company_id == 5
 
 
-def test_find_most_recent_matching_returns_latest_within_window(db_session):
-    now = datetime.now(timezone.utc)
-    old = _make_payment(company_id=1, currency="USD", created_at=now - timedelta(hours=2))
-    recent = _make_payment(company_id=1, currency="USD", created_at=now - timedelta(minutes=5))
-    db_session.add(old)
-    db_session.add(recent)
+def test_find_check_candidate_seeks_the_amount_index(db_session):
+    now = datetime.utcnow()
+    match = _make_payment(company_id=61, amount=150, created_at=now - timedelta(minutes=5))
+    newer_other = _make_payment(company_id=61, amount=999, created_at=now)
+    db_session.add_all([match, newer_other])
     db_session.commit()
 
-    # Ask for matches within last 60 minutes -> should return 'recent'
-    found = payment_repository.find_most_recent_matching(db_session, company_id=1, currency="USD", max_age_minutes=60)
-    assert found is not None
-    assert found.created_at >= recent.created_at
+    cutoff = now - timedelta(minutes=30)
+    found = payment_repository.find_check_candidate(db_session, company_id=61, created_after=cutoff, amount=150)
+    assert found.id == match.id
+    assert payment_repository.find_check_candidate(db_session, 61, cutoff, amount=42) is None
+    assert payment_repository.find_check_candidate(db_session, 61, cutoff).id == newer_other.id
 
-    # If window is small, no match
-    none_found = payment_repository.find_most_recent_matching(db_session, company_id=1, currency="USD", max_age_minutes=1)
-    assert none_found is None
+    captured = []
+    listener = lambda conn, cursor, statement, parameters, *args: captured.append((statement, parameters))  # noqa: E731
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        payment_repository.find_check_candidate(db_session, company_id=61, created_after=cutoff, amount=150)
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    [(statement, parameters)] = captured
+    rows = db_session.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+    plan = " ".join(row[-1] for row in rows)
+    assert "ix_payments_company_amount_created_at" in plan
+    assert "TEMP B-TREE" not in plan
 
 
 def test_get_by_id_for_company_scopes_to_company(db_session):
@@ -84,3 +93,136 @@ def test_get_by_id_for_company_scopes_to_company(db_session):
     res2 = payment_repository.get_by_id_for_company(db_session, company_id=2, payment_id=p2.id)
     assert res2 is not None
     assert res2.id == p2.id
+
+
+def test_expire_stale_pending_reverts_recent_and_expires_old(db_session):
+    now = datetime.now(timezone.utc)
+    recent = _make_payment(company_id=30, status="pending_confirmation", created_at=now - timedelta(minutes=20))
+    recent.confirm_token = "tok-recent"
+    recent.confirm_expires_at = now - timedelta(minutes=1)
+    old = _make_payment(company_id=30, status="pending_confirmation", created_at=now - timedelta(hours=5))
+    old.confirm_token = "tok-old"
+    old.confirm_expires_at = now - timedelta(hours=4)
+    live = _make_payment(company_id=30, status="pending_confirmation", created_at=now - timedelta(minutes=2))
+    live.confirm_token = "tok-live"
+    live.confirm_expires_at = now + timedelta(minutes=10)
+    db_session.add_all([recent, old, live])
+    db_session.commit()
+
+    reverted, expired = payment_repository.expire_stale_pending(
+        db_session, now=now, token_ttl_minutes=15, revert_window_minutes=60
+    )
+
+    assert (reverted, expired) == (1, 1)
+    db_session.expire_all()
+    assert recent.status == "new" and recent.confirm_token is None
+    assert old.status == "expired" and old.confirm_token is None
+    assert live.status == "pending_confirmation" and live.confirm_token == "tok-live"
+
+
+def test_query_payments_keyset_walks_pages_forward_and_back(db_session):
+    base = datetime.utcnow()
+    # two rows share a timestamp so the id tie-breaker is exercised
+    stamps = [base - timedelta(minutes=m) for m in (1, 2, 2, 3, 4)]
+    payments = [_make_payment(company_id=501, created_at=ts) for ts in stamps]
+    db_session.add_all(payments)
+    db_session.commit()
+    expected = [p.id for p in sorted(payments, key=lambda p: (p.created_at, p.id), reverse=True)]
+
+    page1, next_cursor, prev_cursor = payment_repository.query_payments_keyset(
+        db_session, page_size=2, company_id=501
+    )
+    assert [row.payment_id for row in page1] == expected[:2]
+    assert prev_cursor is None
+
+    page2, next2, prev2 = payment_repository.query_payments_keyset(
+        db_session, page_size=2, cursor=next_cursor, company_id=501
+    )
+    assert [row.payment_id for row in page2] == expected[2:4]
+
+    page3, next3, _ = payment_repository.query_payments_keyset(
+        db_session, page_size=2, cursor=next2, company_id=501
+    )
+    assert [row.payment_id for row in page3] == expected[4:]
+    assert next3 is None
+
+    back, _, back_prev = payment_repository.query_payments_keyset(
+        db_session, page_size=2, cursor=prev2, company_id=501
+    )
+    assert [row.payment_id for row in back] == expected[:2]
+    assert back_prev is None
+
+
+def test_query_payments_keyset_rejects_malformed_cursor(db_session):
+    with pytest.raises(ValueError):
+        payment_repository.query_payments_keyset(db_session, cursor="not-a-cursor")
+
+
+def test_count_payments_strategies(db_session):
+    payment_repository._count_cache.clear()
+    db_session.add_all([_make_payment(company_id=601, status="new") for _ in range(3)])
+    db_session.commit()
+
+    assert payment_repository.count_payments(db_session, "exact", company_id=601) == (3, "exact")
+    assert payment_repository.count_payments(db_session, "cached", company_id=601) == (3, "cached")
+
+    # a cached total is reused until it expires
+    db_session.add(_make_payment(company_id=601))
+    db_session.commit()
+    assert payment_repository.count_payments(db_session, "cached", company_id=601) == (3, "cached")
+    assert payment_repository.count_payments(db_session, "exact", company_id=601) == (4, "exact")
+
+    # no planner statistics on SQLite: filtered -> cached, unfiltered -> exact
+    assert payment_repository.count_payments(db_session, "estimated", company_id=601)[1] == "cached"
+    assert payment_repository.count_payments(db_session, "estimated")[1] == "exact"
+    payment_repository._count_cache.clear()
+
+
+def test_fetch_payments_page_txn_match_modes(db_session):
+    for txn in ("AB1234", "AB1299", "XAB12"):
+        p = _make_payment(company_id=701)
+        p.txn_id = txn
+        db_session.add(p)
+    db_session.commit()
+
+    def txns(mode, value):
+        rows = payment_repository.fetch_payments_page(
+            db_session, page_size=10, company_id=701, txn_id=value, txn_match=mode
+        )
+        return sorted(row.txn_id for row in rows)
+
+    assert txns("exact", "AB1234") == ["AB1234"]
+    assert txns("prefix", "AB12") == ["AB1234", "AB1299"]
+    assert txns("contains", "AB12") == ["AB1234", "AB1299", "XAB12"]
+
+
+def test_fetch_payments_page_full_text_search(db_session):
+    messages = [
+        "Received AED 250 from Ahmed ref TX900",
+        "Received AED 75 from Sara ref TX901",
+        "Transfer of AED 250 to Ahmed failed",
+    ]
+    for message in messages:
+        db_session.add(_make_payment(company_id=801, raw_message=message))
+    db_session.commit()
+
+    def search(value):
+        rows = payment_repository.fetch_payments_page(db_session, page_size=10, company_id=801, search=value)
+        return sorted(db_session.get(Payment, (row.payment_id, row.created_at)).raw_message for row in rows)
+
+    assert search("ahmed") == sorted([messages[0], messages[2]])
+    # every word must match, in any order
+    assert search("Ahmed received") == [messages[0]]
+    # query syntax in user input is treated as plain words
+    assert search('"sara* ref:') == [messages[1]]
+    assert search("nobody") == []
+
+    # the FTS table follows updates and deletes
+    payment = db_session.query(Payment).filter(Payment.raw_message == messages[1]).one()
+    payment.raw_message = "Received AED 75 from Omar ref TX901"
+    db_session.commit()
+    assert search("sara") == []
+    assert search("omar") == ["Received AED 75 from Omar ref TX901"]
+    db_session.delete(payment)
+    db_session.commit()
+    assert search("omar") == []
@@ -91,6 +91,148 @@ def test_check_payment_mismatch_does_not_change_status():
         db.close()
 
 
+def test_check_payment_prefers_expected_amount_over_newer_payment():
+    db = create_test_session()
+    try:
+        company = Company(name="Test Co", api_key="test-key")
+        db.add(company)
+        db.flush()
+
+        now = datetime.utcnow()
+        expected = Payment(
+            company_id=company.id,
+            amount=150,
+            currency="AED",
+            raw_message="Test SMS",
+            status="new",
+            created_at=now - timedelta(minutes=5),
+        )
+        newer_other = Payment(
+            company_id=company.id,
+            amount=999,
+            currency="AED",
+            raw_message="Other customer SMS",
+            status="new",
+            created_at=now - timedelta(minutes=1),
+        )
+        db.add_all([expected, newer_other])
+        db.commit()
+
+        req = PaymentCheckRequest(order_id="ORD-4", expected_amount=150)
+        resp = PaymentService.check_payment_for_company(db, company_id=company.id, req=req)
+
+        assert resp.found is True
+        assert resp.match is True
+        assert resp.payment.payment_id == expected.id
+
+        db.refresh(newer_other)
+        assert newer_other.status == "new"
+    finally:
+        db.close()
+
+
+def test_check_payment_mismatch_hint_only_probes_on_a_miss(monkeypatch):
+    from sqlalchemy import event
+
+    from app.config import settings
+
+    monkeypatch.setattr(settings, "HOT_PAYMENT_INDEX_ENABLED", False)
+    db = create_test_session()
+    try:
+        company = Company(name="Test Co", api_key="test-key")
+        db.add(company)
+        db.flush()
+        other = Payment(company_id=company.id, amount=999, currency="AED", raw_message="x", status="new")
+        db.add(other)
+        db.commit()
+        company_id, other_id = company.id, other.id
+
+        statements = []
+        engine = db.get_bind()
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            req = PaymentCheckRequest(order_id="ORD-5", expected_amount=150)
+            resp = PaymentService.check_payment_for_company(db, company_id=company_id, req=req)
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+
+        assert resp.reason == "amount_mismatch"
+        assert resp.payment.payment_id == other_id
+        # the amount-scoped seek missed, then one probe for the hint
+        assert len(statements) == 2
+    finally:
+        db.close()
+
+
+def test_check_payment_ignores_expired_and_pending_payments(monkeypatch):
+    from app.config import settings
+
+    monkeypatch.setattr(settings, "HOT_PAYMENT_INDEX_ENABLED", False)
+    db = create_test_session()
+    try:
+        company = Company(name="Test Co", api_key="test-key")
+        db.add(company)
+        db.flush()
+        expired = Payment(company_id=company.id, amount=150, currency="AED", raw_message="x", status="expired")
+        pending = Payment(
+            company_id=company.id,
+            amount=150,
+            currency="AED",
+            raw_message="y",
+            status="pending_confirmation",
+            order_id="ORD-OTHER",
+        )
+        db.add_all([expired, pending])
+        db.commit()
+
+        req = PaymentCheckRequest(order_id="ORD-6", expected_amount=150)
+        resp = PaymentService.check_payment_for_company(db, company_id=company.id, req=req)
+
+        assert resp.found is False
+        db.refresh(expired)
+        db.refresh(pending)
+        assert expired.status == "expired"
+        assert pending.order_id == "ORD-OTHER"
+    finally:
+        db.close()
+
+
+def test_check_payment_retry_for_the_same_order_returns_its_payment(monkeypatch):
+    from app.config import settings
+
+    monkeypatch.setattr(settings, "HOT_PAYMENT_INDEX_ENABLED", False)
+    db = create_test_session()
+    try:
+        company = Company(name="Test Co", api_key="test-key")
+        db.add(company)
+        db.flush()
+        payment = Payment(company_id=company.id, amount=150, currency="AED", raw_message="x", status="new")
+        db.add(payment)
+        db.commit()
+
+        req = PaymentCheckRequest(order_id="ORD-7", expected_amount=150)
+        first = PaymentService.check_payment_for_company(db, company_id=company.id, req=req)
+        # the merchant lost the response and polls again
+        retry = PaymentService.check_payment_for_company(db, company_id=company.id, req=req)
+
+        assert first.match is True and retry.match is True
+        assert retry.payment.payment_id == first.payment.payment_id == payment.id
+        assert retry.order_id == "ORD-7"
+        assert retry.confirm_token != first.confirm_token
+        db.refresh(payment)
+        assert payment.status == "pending_confirmation"
+        assert payment.confirm_token == retry.confirm_token
+
+        # another order still cannot take it
+        other = PaymentService.check_payment_for_company(
+            db, company_id=company.id, req=PaymentCheckRequest(order_id="ORD-8", expected_amount=150)
+        )
+        assert other.found is False
+    finally:
+        db.close()
+
+
 def test_check_payment_not_found_returns_false():
     db = create_test_session()
     try:
@@ -151,6 +293,37 @@ def test_confirm_payment_happy_path_and_idempotent():
         db.close()
 
 
+def test_confirm_payment_with_expired_token_raises():
+    db = create_test_session()
+    try:
+        company = Company(name="Test Co", api_key="test-key")
+        db.add(company)
+        db.flush()
+
+        payment = Payment(
+            company_id=company.id,
+            amount=150,
+            currency="AED",
+            raw_message="Test SMS",
+            status="pending_confirmation",
+            confirm_token="tok",
+            confirm_expires_at=datetime.utcnow() - timedelta(minutes=1),
+        )
+        db.add(payment)
+        db.commit()
+
+        with pytest.raises(ValueError, match="expired"):
+            PaymentService.confirm_payment_for_company(
+                db,
+                company_id=company.id,
+                req=PaymentConfirmRequest(payment_id=payment.id, confirm_token="tok"),
+            )
+        db.refresh(payment)
+        assert payment.status == "pending_confirmation"
+    finally:
+        db.close()
+
+
 def test_confirm_payment_invalid_token_raises():
     db = create_test_session()
     try:
@@ -216,9 +389,15 @@ class _FakeSession:
             def order_by(self, *args, **kwargs):
                 return self
 
+            def limit(self, *args, **kwargs):
+                return self
+
             def first(self):
                 return None
 
+            def all(self):
+                return []
+
         return _EmptyQuery()
 
 
@@ -257,12 +436,12 @@ def test_confirm_payment_usage_updates_status_and_used_at(monkeypatch):
 
     called = {}
 
-    def fake_update_wallet_usage(db_arg, wallet_id, amount):
+    def fake_increment_wallet_usage(db_arg, wallet_id, amount):
         called["wallet_id"] = wallet_id
         called["amount"] = amount
 
-    # Monkeypatch the update_wallet_usage used by the payment_service module
-    monkeypatch.setattr(payment_service, "update_wallet_usage", fake_update_wallet_usage)
+    # Monkeypatch the increment_wallet_usage used by the payment_service module
+    monkeypatch.setattr(payment_service, "increment_wallet_usage", fake_increment_wallet_usage)
 
     ret = payment_service.confirm_payment_usage(db, payment)
 
@@ -276,7 +455,74 @@ def test_confirm_payment_usage_updates_status_and_used_at(monkeypatch):
     assert called.get("amount") == 50.0
 
 
-def test_match_payment_for_order_no_match_returns_none():
+def test_find_best_match_no_match_returns_none():
     db = _FakeSession()
-    result = payment_service.match_payment_for_order(db, company_id=1, amount=10.0, currency="USD")
+    result = payment_service.find_best_match(db, company_id=1, amount=10.0, currency="USD")
     assert result is None
+
+
+def test_confirm_payment_usage_rolls_back_when_wallet_limit_exceeded():
+    from datetime import date
+
+    from app.models.wallet import Wallet
+
+    db = create_test_session()
+    try:
+        company = Company(name="Test Co", api_key="test-key")
+        db.add(company)
+        db.flush()
+        wallet = Wallet(
+            company_id=company.id,
+            channel_id=1,
+            wallet_label="W",
+            wallet_identifier="w-1",
+            daily_limit=100.0,
+            used_today=90.0,
+            last_reset_date=date.today(),
+        )
+        db.add(wallet)
+        db.flush()
+        payment = Payment(
+            company_id=company.id,
+            wallet_id=wallet.id,
+            amount=50,
+            currency="AED",
+            raw_message="Test SMS",
+            status="pending_confirmation",
+        )
+        db.add(payment)
+        db.commit()
+
+        with pytest.raises(ValueError, match="Daily limit"):
+            payment_service.confirm_payment_usage(db, payment)
+
+        db.refresh(payment)
+        db.refresh(wallet)
+        assert payment.status == "pending_confirmation"
+        assert payment.used_at is None
+        assert wallet.used_today == 90.0
+    finally:
+        db.close()
+
+
+def test_find_best_match_filters_other_payers_in_sql():
+    db = create_test_session()
+    try:
+        company = Company(name="Test Co", api_key="test-key")
+        db.add(company)
+        db.flush()
+        other = Payment(company_id=company.id, amount=150, currency="AED", raw_message="a", payer_phone="0509999999")
+        mine = Payment(company_id=company.id, amount=140, currency="AED", raw_message="b", payer_phone="+971501234567")
+        db.add_all([other, mine])
+        db.commit()
+
+        result = payment_service.find_best_match(
+            db, company.id, 150, "AED", payer_phone="0501234567"
+        )
+        assert result.payment.id == mine.id
+        assert result.exact_amount is False
+
+        assert payment_service.find_best_match(db, company.id, 150, "AED", payer_phone="0507777777") is None
+        assert payment_service.find_best_match(db, company.id, 150, "AED").payment.id == other.id
+    finally:
+        db.close()
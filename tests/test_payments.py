@@ -12,10 +12,10 @@ def test_payments_match_missing_amount(client):
 
 
 def test_payments_match_minimal_payload_shape(client):
-    # monkeypatch match_payment_for_order to return None (no match)
+    # monkeypatch find_best_match to return None (no match)
     import app.services.payment_service as ps
-    original = ps.match_payment_for_order
-    ps.match_payment_for_order = lambda db, company_id, amount, currency, payer_phone: None
+    original = ps.find_best_match
+    ps.find_best_match = lambda db, company_id, amount, currency, payer_phone=None, txn_id=None: None
 
     response = client.post(
         "/payments/match",
@@ -24,7 +24,7 @@ def test_payments_match_minimal_payload_shape(client):
     )
 
     # restore
-    ps.match_payment_for_order = original
+    ps.find_best_match = original
 
     assert response.status_code == 200
     body = response.json()
@@ -0,0 +1,82 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import Column, Integer, MetaData, String, Table, create_engine, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.repositories.query_helpers import (
+    CURSOR_PREV,
+    decode_cursor,
+    encode_cursor,
+    fts5_match_query,
+    prefix_match,
+    prefix_upper_bound,
+    search_terms,
+)
+
+
+def test_cursor_round_trip():
+    ts = datetime(2026, 10, 19, 12, 30, 15, 123456)
+    cursor = encode_cursor(ts, 42, CURSOR_PREV)
+    assert decode_cursor(cursor) == (ts, 42, CURSOR_PREV)
+
+
+@pytest.mark.parametrize("cursor", ["", "not-base64!", "eyJ4IjoxfQ"])
+def test_decode_cursor_rejects_garbage(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_prefix_upper_bound():
+    assert prefix_upper_bound("TX12") == "TX13"
+    assert prefix_upper_bound("az") == "a{"
+    assert prefix_upper_bound("") is None
+
+
+def test_prefix_match_selects_only_prefixed_values():
+    metadata = MetaData()
+    table = Table("t", metadata, Column("id", Integer, primary_key=True), Column("txn", String))
+    engine = create_engine("sqlite:///:memory:")
+    metadata.create_all(engine)
+    values = ["TX100", "TX1009", "TX101", "tx100a", "TX10%", "ATX100"]
+    with engine.begin() as conn:
+        conn.execute(insert(table), [{"txn": v} for v in values])
+        rows = conn.execute(select(table.c.txn).where(prefix_match(table.c.txn, "TX100"))).scalars().all()
+        wildcard = conn.execute(select(table.c.txn).where(prefix_match(table.c.txn, "TX10%"))).scalars().all()
+
+    assert sorted(rows) == ["TX100", "TX1009"]
+    assert wildcard == ["TX10%"]
+
+
+def test_prefix_match_handles_punctuation_in_prefix():
+    metadata = MetaData()
+    table = Table("t", metadata, Column("id", Integer, primary_key=True), Column("txn", String))
+    engine = create_engine("sqlite:///:memory:")
+    metadata.create_all(engine)
+    values = ["AB-9", "AB-10", "AB.", "AB.1", "AB", "AB9", "AB_1"]
+    with engine.begin() as conn:
+        conn.execute(insert(table), [{"txn": v} for v in values])
+        dash = conn.execute(select(table.c.txn).where(prefix_match(table.c.txn, "AB-"))).scalars().all()
+        underscore = conn.execute(select(table.c.txn).where(prefix_match(table.c.txn, "AB_"))).scalars().all()
+
+    assert sorted(dash) == ["AB-10", "AB-9"]
+    assert underscore == ["AB_1"]
+
+
+def test_prefix_match_compares_in_c_collation_on_postgres():
+    table = Table("t", MetaData(), Column("txn", String))
+    predicate = prefix_match(table.c.txn, "AB-")
+
+    postgres_sql = str(predicate.compile(dialect=postgresql.dialect()))
+    sqlite_sql = str(predicate.compile(dialect=sqlite.dialect()))
+
+    # locale collations ignore punctuation at first, so "AB-9" would sort
+    # after the range's upper bound "AB." and be missed
+    assert postgres_sql.count('COLLATE "C"') == 3
+    assert "COLLATE" not in sqlite_sql
+
+
+def test_fts5_match_query_quotes_every_word():
+    assert search_terms("AED 250, from: Ahmed") == ["AED", "250", "from", "Ahmed"]
+    assert fts5_match_query('ref NEAR "TX9*') == '"ref" "NEAR" "TX9"'
+    assert fts5_match_query("  --  ") is None
@@ -0,0 +1,146 @@
+import threading
+import time
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import app.db.session as session_module
+from app.core import etag
+from app.db.session import ReplicaLagGuard, get_read_db, read_db_for, read_db_for_company_wallets
+
+
+def _drain(gen):
+    value = next(gen)
+    try:
+        next(gen)
+    except StopIteration:
+        pass
+    return value
+
+
+def test_get_read_db_falls_back_to_primary_without_replica(monkeypatch):
+    monkeypatch.setattr(session_module, "ReadSessionLocal", None)
+    primary = object()
+    assert _drain(get_read_db(primary)) is primary
+
+
+def test_get_read_db_uses_replica_only_when_fresh(monkeypatch):
+    replica_engine = create_engine("sqlite:///:memory:")
+    monkeypatch.setattr(session_module, "read_engine", replica_engine)
+    monkeypatch.setattr(session_module, "ReadSessionLocal", sessionmaker(bind=replica_engine))
+    primary = object()
+
+    monkeypatch.setattr(session_module.replica_guard, "is_fresh", lambda bind: True)
+    replica = _drain(get_read_db(primary))
+    assert replica is not primary
+    assert replica.get_bind() is replica_engine
+
+    monkeypatch.setattr(session_module.replica_guard, "is_fresh", lambda bind: False)
+    assert _drain(get_read_db(primary)) is primary
+
+
+def test_replica_lag_guard_caches_and_rejects_lagging_replica(monkeypatch):
+    guard = ReplicaLagGuard(max_lag_seconds=10, check_interval_seconds=60)
+    lags = iter([3.0, 30.0])
+    calls = []
+
+    def fake_measure(bind):
+        calls.append(bind)
+        return next(lags)
+
+    monkeypatch.setattr(guard, "measure_lag", fake_measure)
+    assert guard.is_fresh("replica") is True
+    # cached within the check interval
+    assert guard.is_fresh("replica") is True
+    assert len(calls) == 1
+
+    guard.check_interval_seconds = 0
+    assert guard.is_fresh("replica") is False
+
+
+def test_replica_lag_guard_treats_unknown_lag_as_stale(monkeypatch):
+    guard = ReplicaLagGuard(max_lag_seconds=10)
+    monkeypatch.setattr(guard, "measure_lag", lambda bind: None)
+    assert guard.is_fresh("replica") is False
+
+
+def test_replica_lag_guard_probes_once_and_never_blocks_other_requests():
+    guard = ReplicaLagGuard(max_lag_seconds=10, check_interval_seconds=0)
+    probe_started = threading.Event()
+    release_probe = threading.Event()
+    calls = []
+
+    def slow_measure(bind):
+        calls.append(bind)
+        probe_started.set()
+        release_probe.wait(5)
+        return 1.0
+
+    guard.measure_lag = slow_measure
+    prober = threading.Thread(target=lambda: calls.append(guard.is_fresh("replica")))
+    prober.start()
+    assert probe_started.wait(5)
+
+    # a probe is in flight: other requests get the last verdict immediately
+    started = time.monotonic()
+    assert guard.is_fresh("replica") is False
+    assert time.monotonic() - started < 1
+
+    release_probe.set()
+    prober.join(5)
+    assert calls == ["replica", True]
+    assert guard.is_fresh("replica") is True
+    assert len(calls) == 3
+
+
+def test_replica_lag_guard_records_failed_probe_as_stale():
+    guard = ReplicaLagGuard(max_lag_seconds=10, check_interval_seconds=60)
+
+    def broken_measure(bind):
+        raise RuntimeError("boom")
+
+    guard.measure_lag = broken_measure
+    with pytest.raises(RuntimeError):
+        guard.is_fresh("replica")
+    # the in-flight flag was cleared and the verdict cached
+    assert guard.is_fresh("replica") is False
+    assert guard._probing is False
+
+
+def test_create_app_engine_passes_connect_args_to_server_databases(monkeypatch):
+    captured = {}
+
+    def fake_create_engine(url, **kwargs):
+        captured[url] = kwargs
+        return create_engine("sqlite://")
+
+    monkeypatch.setattr(session_module, "create_engine", fake_create_engine)
+
+    session_module.create_app_engine("postgresql://user:pw@replica/db", connect_args={"connect_timeout": 2})
+    session_module.create_app_engine("sqlite:///:memory:", connect_args={"connect_timeout": 2})
+
+    assert captured["postgresql://user:pw@replica/db"]["connect_args"] == {"connect_timeout": 2}
+    assert "connect_args" not in captured["sqlite:///:memory:"]
+
+
+def test_read_db_for_uses_primary_after_a_write_until_the_replica_caught_up(monkeypatch):
+    replica_engine = create_engine("sqlite:///:memory:")
+    monkeypatch.setattr(session_module, "read_engine", replica_engine)
+    monkeypatch.setattr(session_module, "ReadSessionLocal", sessionmaker(bind=replica_engine))
+    monkeypatch.setattr(session_module.replica_guard, "is_fresh", lambda bind: True)
+    monkeypatch.setattr(session_module.settings, "READ_REPLICA_MAX_LAG_SECONDS", 30)
+    primary = object()
+    dependency = read_db_for("replica-test-a")
+
+    assert _drain(dependency(primary)) is not primary
+    etag.bump("replica-test-b")
+    assert _drain(dependency(primary)) is not primary
+
+    # a fresh tag must not be served with a body the replica may not have yet
+    etag.bump("replica-test-a")
+    assert _drain(dependency(primary)) is primary
+    assert _drain(read_db_for_company_wallets(987654, primary)) is not primary
+
+    monkeypatch.setattr(session_module.settings, "READ_REPLICA_MAX_LAG_SECONDS", 0)
+    assert _drain(dependency(primary)) is not primary
@@ -0,0 +1,185 @@
+import sys
+import threading
+import time
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+import app.models  # noqa: F401  (registers every table)
+from app.models.country import Country, CountryPaymentProvider, PaymentProvider
+from app.schemas.admin_geo import AdminCountryCreate, AdminPaymentProviderCreate
+from app.config import settings
+import app.db.session as session_module
+from app.services.admin_geo_service import AdminGeoService
+from app.services.reference_data import ReferenceData, ReferenceDataCache, reference_data
+
+
+def create_session_factory():
+    engine = create_engine("sqlite:///:memory:", future=True)
+    Base.metadata.create_all(bind=engine)
+    return engine, sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def _count_statements(engine, func):
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)  # noqa: E731
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        result = func()
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    return result, statements
+
+
+def test_reads_are_served_from_memory_after_first_load():
+    engine, SessionLocal = create_session_factory()
+    db = SessionLocal()
+    uae = Country(code="UAE", name="United Arab Emirates")
+    eand = PaymentProvider(code="eand_money", name="e& money")
+    stripe = PaymentProvider(code="stripe", name="Stripe")
+    db.add_all([uae, eand, stripe])
+    db.flush()
+    db.add_all(
+        [
+            CountryPaymentProvider(country_id=uae.id, provider_id=eand.id, is_supported=True),
+            CountryPaymentProvider(country_id=uae.id, provider_id=stripe.id, is_supported=False),
+        ]
+    )
+    db.commit()
+
+    _, first = _count_statements(engine, lambda: AdminGeoService.list_countries(db))
+    assert len(first) == 3
+
+    def read_everything():
+        return (
+            AdminGeoService.list_countries(db),
+            AdminGeoService.list_payment_providers(db),
+            AdminGeoService.get_country_with_providers(db, "UAE"),
+            AdminGeoService.get_country_with_providers(db, "XXX"),
+        )
+
+    (countries, providers, uae_out, missing), statements = _count_statements(engine, read_everything)
+    assert statements == []
+    assert [c.code for c in countries] == ["UAE"]
+    assert [p.name for p in providers] == sorted(["e& money", "Stripe"])
+    assert [p.code for p in uae_out.providers] == ["eand_money"]
+    assert missing is None
+    db.close()
+
+
+def test_create_endpoints_invalidate_the_cache():
+    engine, SessionLocal = create_session_factory()
+    db = SessionLocal()
+    assert AdminGeoService.list_countries(db) == []
+    version = reference_data.version
+
+    AdminGeoService.create_country(db, AdminCountryCreate(code="KSA", name="Saudi Arabia"))
+    AdminGeoService.create_payment_provider(
+        db, AdminPaymentProviderCreate(code="stc_pay", name="STC Pay", country_code="KSA")
+    )
+
+    assert reference_data.version == version + 2
+    assert [c.code for c in AdminGeoService.list_countries(db)] == ["KSA"]
+    ksa = AdminGeoService.get_country_with_providers(db, "KSA")
+    assert [p.code for p in ksa.providers] == ["stc_pay"]
+    assert reference_data.get(db).provider_id("stc_pay") is not None
+    db.close()
+
+
+def test_snapshots_expire_after_ttl():
+    engine, SessionLocal = create_session_factory()
+    cache = ReferenceDataCache(ttl_seconds=0)
+    db = SessionLocal()
+    assert cache.get(db).providers == []
+    db.add(PaymentProvider(code="late", name="Late"))
+    db.commit()
+    assert [p.code for p in cache.get(db).providers] == ["late"]
+    db.close()
+
+
+def test_replica_snapshot_reloads_from_primary_after_invalidation(monkeypatch):
+    primary_engine, PrimarySession = create_session_factory()
+    replica_engine, ReplicaSession = create_session_factory()
+    monkeypatch.setattr(session_module, "read_engine", replica_engine)
+    monkeypatch.setattr(session_module, "SessionLocal", PrimarySession)
+    monkeypatch.setattr(settings, "READ_REPLICA_MAX_LAG_SECONDS", 30)
+    cache = ReferenceDataCache(ttl_seconds=300)
+
+    replica_db = ReplicaSession()
+    assert cache.get(replica_db).countries == []
+
+    # the write reached the primary only: the replica is lagging
+    primary_db = PrimarySession()
+    primary_db.add(Country(code="OMN", name="Oman"))
+    primary_db.commit()
+    primary_db.close()
+    cache.invalidate()
+
+    (snapshot, replica_statements) = _count_statements(replica_engine, lambda: cache.get(replica_db))
+    assert [c.code for c in snapshot.countries] == ["OMN"]
+    assert replica_statements == []
+
+    # once the replica had time to catch up, it serves its own snapshot again
+    monkeypatch.setattr(settings, "READ_REPLICA_MAX_LAG_SECONDS", 0)
+    cache.invalidate()
+    assert cache.get(replica_db).countries == []
+    replica_db.close()
+
+
+def test_concurrent_reads_share_one_reload_outside_the_lock(monkeypatch):
+    engine, SessionLocal = create_session_factory()
+    cache = ReferenceDataCache(ttl_seconds=300)
+    started = threading.Event()
+    release = threading.Event()
+    loads = []
+
+    def slow_load(db, version=0):
+        loads.append(version)
+        started.set()
+        release.wait(5)
+        return ReferenceData(version=version, loaded_at=time.monotonic())
+
+    # `app.services.reference_data` is shadowed by the cache instance re-exported from app.services
+    monkeypatch.setattr(sys.modules[ReferenceDataCache.__module__], "load_reference_data", slow_load)
+    results = []
+    readers = [threading.Thread(target=lambda: results.append(cache.get(SessionLocal()))) for _ in range(4)]
+    readers[0].start()
+    assert started.wait(5)
+    for reader in readers[1:]:
+        reader.start()
+
+    # the lock is free while the reload runs
+    assert cache._lock.acquire(timeout=1)
+    cache._lock.release()
+
+    release.set()
+    for reader in readers:
+        reader.join(5)
+    assert loads == [0]
+    assert len(results) == 4 and all(r is results[0] for r in results)
+
+
+def test_company_writes_find_providers_created_by_another_worker():
+    from app.schemas.admin_company import AdminCompanyCreate
+    from app.services.admin_company_service import AdminCompanyService
+
+    engine, SessionLocal = create_session_factory()
+    db = SessionLocal()
+    db.add(PaymentProvider(code="old_pay", name="Old Pay"))
+    db.commit()
+    assert reference_data.get(db).provider_id("new_pay") is None
+
+    # written without `invalidate()`, as another worker process would
+    db.add(PaymentProvider(code="new_pay", name="New Pay"))
+    db.commit()
+    version = reference_data.version
+
+    company = AdminCompanyService.create_company_with_channels(
+        db, AdminCompanyCreate(name="Fresh Co", provider_codes=["old_pay", "new_pay", "no_such_pay"])
+    )
+
+    assert sorted(c.name for c in company.channels) == ["New Pay Channel", "Old Pay Channel"]
+    assert reference_data.version == version + 1
+    assert reference_data.get(db).provider_id("new_pay") is not None
+    db.close()
@@ -0,0 +1,58 @@
+"""Startup-time budget for the API process.
+
+`import app.main` runs in a fresh interpreter so modules already imported by
+the test session do not hide a regression. The budgets are deliberately
+generous (a cold import takes about a second and ~70 MB here); the check that
+catches most regressions is that the onboarding document stack is not loaded.
+"""
+import json
+import os
+from pathlib import Path
+import subprocess
+import sys
+
+IMPORT_BUDGET_SECONDS = 5.0
+RSS_BUDGET_MB = 200
+# loaded on first onboarding render only
+LAZY_MODULES = ("generate_onboarding_pdf", "markdown", "weasyprint")
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - start
+try:
+    import resource
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    if sys.platform == "darwin":
+        rss_mb /= 1024  # bytes there, not KiB
+except ImportError:  # Windows
+    rss_mb = None
+print(json.dumps({"seconds": elapsed, "rss_mb": rss_mb, "modules": sorted(sys.modules)}))
+"""
+
+
+def _import_app_main():
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", "sqlite:///:memory:")
+    env.setdefault("SECRET_KEY", "test-secret")
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=Path(__file__).resolve().parents[1],
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=60,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_import_app_main_stays_within_budget():
+    probe = _import_app_main()
+
+    loaded = [name for name in LAZY_MODULES if name in probe["modules"]]
+    assert loaded == [], f"imported at startup: {loaded}"
+    assert probe["seconds"] < IMPORT_BUDGET_SECONDS, probe["seconds"]
+    if probe["rss_mb"] is not None:
+        assert probe["rss_mb"] < RSS_BUDGET_MB, probe["rss_mb"]
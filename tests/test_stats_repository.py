@@ -0,0 +1,171 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+from app.models.company import Company
+from app.models.payment import Payment
+from app.models.payment_rollup import PaymentRollupHourly, RollupWatermark
+import app.repositories.stats_repository as stats_repository
+
+
+@pytest.fixture
+def db_session():
+    engine = create_engine("sqlite:///:memory:", future=True)
+    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+NOW = datetime(2026, 10, 19, 12, 30, tzinfo=timezone.utc)
+
+
+def _payment(company_id, amount, created_at, status="new"):
+    return Payment(
+        company_id=company_id,
+        amount=amount,
+        currency="AED",
+        raw_message="SMS",
+        status=status,
+        created_at=created_at,
+        updated_at=created_at,
+    )
+
+
+def _seed(db):
+    company = Company(name="Stats Co", api_key="stats")
+    db.add(company)
+    db.flush()
+    db.add_all(
+        [
+            _payment(company.id, 100, NOW - timedelta(hours=2, minutes=10)),
+            _payment(company.id, 50, NOW - timedelta(hours=2, minutes=5), status="used"),
+            _payment(company.id, 70, NOW - timedelta(hours=1, minutes=20)),
+        ]
+    )
+    db.commit()
+    return company.id
+
+
+def test_refresh_builds_hourly_buckets(db_session):
+    company_id = _seed(db_session)
+
+    rebuilt = stats_repository.refresh_hourly_rollups(db_session, now=NOW)
+
+    assert rebuilt == 2
+    rows = {
+        (stats_repository.floor_hour(r.bucket).hour, r.status): (r.count, r.sum_amount)
+        for r in db_session.query(PaymentRollupHourly).filter_by(company_id=company_id)
+    }
+    assert rows == {(10, "new"): (1, 100), (10, "used"): (1, 50), (11, "new"): (1, 70)}
+    assert stats_repository.get_watermark(db_session) == NOW
+
+
+def test_refresh_only_rebuilds_touched_buckets(db_session):
+    _seed(db_session)
+    stats_repository.refresh_hourly_rollups(db_session, now=NOW)
+
+    later = NOW + timedelta(minutes=10)
+    payment = db_session.query(Payment).filter_by(amount=100).one()
+    payment.status = "used"
+    payment.updated_at = later
+    db_session.commit()
+
+    assert stats_repository.refresh_hourly_rollups(db_session, now=later + timedelta(minutes=1)) == 1
+
+    items, _, _ = stats_repository.query_stats(db_session, live=False, now=later)
+    assert [(i["status"], i["count"], i["sum_amount"]) for i in items] == [
+        ("used", 2, 150),
+        ("new", 1, 70),
+    ]
+
+
+def test_query_stats_merges_live_partial_bucket(db_session):
+    company_id = _seed(db_session)
+    stats_repository.refresh_hourly_rollups(db_session, now=NOW)
+
+    # arrives after the last rollup run
+    db_session.add(_payment(company_id, 30, NOW + timedelta(minutes=5)))
+    db_session.commit()
+    now = NOW + timedelta(minutes=10)
+
+    items, watermark, live_merged = stats_repository.query_stats(db_session, now=now)
+    assert live_merged is True
+    assert watermark == NOW
+    assert items[-1]["bucket"] == NOW.replace(minute=0)
+    assert (items[-1]["count"], items[-1]["sum_amount"]) == (1, 30)
+
+    stale, _, live_merged = stats_repository.query_stats(db_session, live=False, now=now)
+    assert live_merged is False
+    assert sum(i["count"] for i in stale) == 3
+
+    daily, _, _ = stats_repository.query_stats(db_session, granularity="day", status="new", now=now)
+    assert [(i["count"], i["sum_amount"]) for i in daily] == [(3, 200)]
+
+
+def _count_statements(db, func):
+    engine = db.get_bind()
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)  # noqa: E731
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        result = func()
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    return result, statements
+
+
+def test_refresh_cost_does_not_grow_with_touched_buckets(db_session):
+    company = Company(name="Many Hours", api_key="hours")
+    db_session.add(company)
+    db_session.flush()
+    db_session.add_all([_payment(company.id, 10, NOW - timedelta(hours=h)) for h in range(24)])
+    db_session.commit()
+    db_session.add(RollupWatermark(name=stats_repository.HOURLY_ROLLUP, watermark=NOW - timedelta(days=2)))
+    db_session.commit()
+
+    rebuilt, statements = _count_statements(
+        db_session, lambda: stats_repository.refresh_hourly_rollups(db_session, now=NOW)
+    )
+
+    assert rebuilt == 24
+    assert db_session.query(PaymentRollupHourly).count() == 24
+    # watermark lock, touched buckets, delete, insert ... select, watermark update
+    assert len([s for s in statements if not s.startswith(("BEGIN", "COMMIT"))]) == 5
+
+
+def test_refresh_creates_a_missing_watermark_row(db_session):
+    _seed(db_session)
+    assert db_session.get(RollupWatermark, stats_repository.HOURLY_ROLLUP) is None
+
+    assert stats_repository.refresh_hourly_rollups(db_session, now=NOW) == 2
+    assert stats_repository.refresh_hourly_rollups(db_session, now=NOW + timedelta(minutes=5)) == 0
+    assert db_session.query(RollupWatermark).count() == 1
+
+
+def test_query_stats_is_live_before_the_first_rollup(db_session):
+    _seed(db_session)
+
+    items, watermark, live_merged = stats_repository.query_stats(db_session, now=NOW)
+    assert watermark is None
+    assert live_merged is True
+    assert [(i["bucket"].hour, i["status"], i["count"]) for i in items] == [
+        (10, "new", 1),
+        (10, "used", 1),
+        (11, "new", 1),
+    ]
+
+    bounded, _, _ = stats_repository.query_stats(
+        db_session, created_from=NOW - timedelta(hours=1, minutes=30), now=NOW
+    )
+    assert [(i["bucket"].hour, i["count"]) for i in bounded] == [(11, 1)]
+
+    rollup_only, _, live_merged = stats_repository.query_stats(db_session, live=False, now=NOW)
+    assert rollup_only == []
+    assert live_merged is False
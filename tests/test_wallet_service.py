@@ -162,25 +162,59 @@ def test_reset_wallet_if_needed_same_day_no_reset():
     assert db.commits == 0
 
 
-def test_update_wallet_usage_increments_and_resets_if_needed(monkeypatch):
-    # prepare a wallet with an old last_reset_date
-    w = Wallet()
-    w.id = 7
-    w.used_today = 0.0
-    w.last_reset_date = date.today() - timedelta(days=2)
-    w.daily_limit = 100.0
+def test_update_wallet_usage_increments_and_resets_if_needed():
+    db = create_test_db()
+    company = Company(name="C_UWU", api_key="k_uwu")
+    db.add(company)
+    db.commit()
 
-    # FakeSession will return this wallet from query().first()
-    db = _FakeSession(wallet=w)
+    # prepare a wallet with an old last_reset_date
+    w = Wallet(
+        company_id=company.id,
+        channel_id=1,
+        wallet_label="W",
+        wallet_identifier="uwu-1",
+        daily_limit=100.0,
+        used_today=90.0,
+        last_reset_date=date.today() - timedelta(days=2),
+    )
+    db.add(w)
+    db.commit()
 
-    # Call update_wallet_usage
-    updated = wallet_service.update_wallet_usage(db, wallet_id=7, amount=20.0)
+    updated = wallet_service.update_wallet_usage(db, wallet_id=w.id, amount=20.0)
 
     # wallet should have been reset then incremented
     assert updated is w
+    assert w.used_today == 20.0
     assert w.last_reset_date == date.today()
 
 
+def test_update_wallet_usage_raises_when_limit_exceeded():
+    db = create_test_db()
+    company = Company(name="C_UWL", api_key="k_uwl")
+    db.add(company)
+    db.commit()
+
+    w = Wallet(
+        company_id=company.id,
+        channel_id=1,
+        wallet_label="W",
+        wallet_identifier="uwl-1",
+        daily_limit=100.0,
+        used_today=90.0,
+        last_reset_date=date.today(),
+    )
+    db.add(w)
+    db.commit()
+
+    with pytest.raises(ValueError):
+        wallet_service.update_wallet_usage(db, wallet_id=w.id, amount=20.0)
+    db.refresh(w)
+    assert w.used_today == 90.0
+
+    assert wallet_service.update_wallet_usage(db, wallet_id=9999, amount=1.0) is None
+
+
 def test_pick_wallet_with_preferred_payment_method_match():
     """Test that preferred_payment_method filters to matching provider."""
     db = create_test_db()